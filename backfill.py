@@ -0,0 +1,109 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import time
+from config import *
+from database.database import db, DatabaseUnavailable
+from outbound import outbound, MAINTENANCE
+from ingest import file_meta
+from health import tasks
+
+
+# Indexes DB channel posts that were stored before the files index existed.
+#
+# The channel history is read 200 ids at a time, oldest first, from the last
+# checkpoint up to the newest post seen at startup (later posts are indexed by
+# the ingestor as they are stored). Reads go through the outbound scheduler at
+# maintenance priority so they only use capacity nothing else wants, and the
+# checkpoint is saved after every chunk, so a restart resumes where it stopped.
+class Backfill:
+
+    CHUNK = 200  # get_messages limit
+    CHECKPOINT = 'backfill'
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.task = None
+        self.done_id = 0     # last id that is indexed
+        self.tip = 0         # newest post when the walk started
+        self.first_id = 0    # checkpoint the current run resumed from
+        self.indexed = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.LOGGER = LOGGER(__name__)
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    def start(self, client, tip: int):
+        if self.running:
+            return False
+        self.tip = tip
+        self.task = tasks.spawn(self._run(client), "backfill")
+        return True
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def reset(self):
+        self.stop()
+        self.done_id = 0
+        await db.set_checkpoint(self.CHECKPOINT, 0)
+
+    def rate(self):
+        # Posts read per second since this run started
+        if not self.started:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return (self.done_id - self.first_id) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        return (self.tip - self.done_id) / rate if rate and self.running else None
+
+    async def _run(self, client):
+        self.error = None
+        self.finished = None
+        try:
+            self.done_id = await db.get_checkpoint(self.CHECKPOINT) or 0
+        except DatabaseUnavailable as e:
+            self.error = f"checkpoint unavailable: {e}"
+            return
+        self.first_id = self.done_id
+        self.started = time.monotonic()
+        if self.done_id < self.tip:
+            self.LOGGER.info(f"Backfilling the files index from post {self.done_id + 1} to {self.tip}")
+
+        channel_id = client.db_channel.id
+        while self.done_id < self.tip:
+            ids = list(range(self.done_id + 1, min(self.done_id + self.CHUNK, self.tip) + 1))
+            try:
+                posts = await outbound.call(MAINTENANCE, None, lambda: client.get_messages(channel_id, ids))
+                docs = [file_meta(post) for post in posts if not post.empty and not post.service]
+                if docs:
+                    await db.add_files(docs)
+                await db.set_checkpoint(self.CHECKPOINT, ids[-1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the checkpoint and try the same chunk again later
+                self.error = f"{type(e).__name__}: {e}"
+                self.LOGGER.warning(f"Backfill of posts {ids[0]}-{ids[-1]} failed: {self.error}")
+                await asyncio.sleep(max(self.delay, 30))
+                continue
+            self.error = None
+            self.indexed += len(docs)
+            self.done_id = ids[-1]
+            await asyncio.sleep(self.delay)
+
+        self.finished = time.monotonic()
+        if self.done_id > self.first_id:
+            self.LOGGER.info(f"Backfill finished, {self.indexed} posts indexed up to {self.done_id}")
+
+
+backfill = Backfill(BACKFILL_DELAY)
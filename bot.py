@@ -1,13 +1,22 @@
 from aiohttp import web
 from plugins import web_server
 import asyncio
+import time
 import pyromod.listen
 from pyrogram import Client
 from pyrogram.enums import ParseMode
+from pyrogram.errors import FloodWait
+from pyrogram.session import Session
 import sys
 from datetime import datetime
 #rohit_1888 on Tg
 from config import *
+from database.database import db
+from outbound import outbound
+from ingest import ingestor
+from backfill import backfill
+from metrics import instrument, call_source, record_api_call
+from health import loop_monitor
 
 
 name ="""
@@ -29,8 +38,45 @@ class Bot(Client):
         )
         self.LOGGER = LOGGER
 
+    async def invoke(self, query, retries: int = Session.MAX_RETRIES, timeout: float = Session.WAIT_TIMEOUT,
+                     sleep_threshold: float = None):
+        # Every raw API call passes here and is counted per method and calling
+        # plugin. FloodWaits are raised by the session so each one is seen, and
+        # the short ones are slept through here as pyrogram would have done,
+        # after pausing the outbound scheduler so other calls wait them out too.
+        threshold = self.sleep_threshold if sleep_threshold is None else sleep_threshold
+        method = query.QUALNAME.removeprefix("functions.")
+        source = call_source()
+        while True:
+            start = time.perf_counter()
+            try:
+                result = await super().invoke(query, retries, timeout, 0)
+            except FloodWait as e:
+                record_api_call(method, source, time.perf_counter() - start, "FloodWait", e.value)
+                if e.value > threshold:
+                    raise
+                outbound.backoff(e.value)
+                await asyncio.sleep(e.value)
+                continue
+            except Exception as e:
+                record_api_call(method, source, time.perf_counter() - start, type(e).__name__)
+                raise
+            record_api_call(method, source, time.perf_counter() - start)
+            return result
+
     async def start(self):
+        try:
+            # An unreachable database only degrades the bot, see Rohit.connect
+            await db.connect()
+        except Exception as e:
+            self.LOGGER(__name__).warning(e)
+            self.LOGGER(__name__).warning("Could not connect to the database, check DATABASE_URL")
+            sys.exit()
+
         await super().start()
+        instrument(self.dispatcher)
+        loop_monitor.start()
+        outbound.start()
         usr_bot_me = await self.get_me()
         self.uptime = datetime.now()
 
@@ -39,6 +85,7 @@ class Bot(Client):
             self.db_channel = db_channel
             test = await self.send_message(chat_id = db_channel.id, text = "Test Message")
             await test.delete()
+            self.db_channel_tip = test.id  # newest post id at startup
         except Exception as e:
             self.LOGGER(__name__).warning(e)
             self.LOGGER(__name__).warning(f"Make Sure bot is Admin in DB Channel, and Double check the CHANNEL_ID Value, Current Value {CHANNEL_ID}")
@@ -54,16 +101,27 @@ class Bot(Client):
         self.LOGGER(__name__).info(f"Bot Running..! Made by @Spicylinebun")   
 
         # Start Web Server
-        app = web.AppRunner(await web_server())
+        app = web.AppRunner(await web_server(self))
         await app.setup()
         await web.TCPSite(app, "0.0.0.0", PORT).start()
 
+        if BACKFILL_ON_START:
+            backfill.start(self, self.db_channel_tip)
 
         try: await self.send_message(OWNER_ID, text = f"<b><blockquote> Bᴏᴛ Rᴇsᴛᴀʀᴛᴇᴅ by @Spicylinebun</blockquote></b>")
         except: pass
 
     async def stop(self, *args):
+        loop_monitor.stop()
+        backfill.stop()
+        ingestor.stop()
+        outbound.stop()
         await super().stop()
+        try:
+            await db.flush_stats()
+        except Exception as e:
+            self.LOGGER(__name__).warning(f"Could not persist stats: {e}")
+        db.close()
         self.LOGGER(__name__).info("Bot stopped.")
 
     def run(self):
@@ -0,0 +1,136 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import os
+from collections import OrderedDict
+from config import *
+from health import tasks
+
+
+# Parts of streamed files kept on disk, so a popular file is downloaded from
+# Telegram once rather than once per viewer and per seek.
+#
+# A part is stored as <dir>/<ab>/<file_unique_id>_<index> and the same file
+# uploaded twice shares its parts. The total size is capped and the least
+# recently used parts are removed first. Concurrent misses for one part share
+# a single download, which keeps running when the request that started it
+# goes away.
+class ChunkCache:
+
+    CHUNK = 1024 * 1024  # stream_media part size
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.parts = OrderedDict()  # (unique_id, index) -> size, oldest use first
+        self.size = 0
+        self.pending = {}  # (unique_id, index) -> download task
+        self.loaded = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.LOGGER = LOGGER(__name__)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _file(self, key):
+        unique_id, index = key
+        return os.path.join(self.path, unique_id[:2], f"{unique_id}_{index}")
+
+    def _scan(self):
+        found = []
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                full = os.path.join(root, name)
+                if name.endswith(".part"):
+                    os.remove(full)  # interrupted download
+                    continue
+                unique_id, _, index = name.rpartition("_")
+                if unique_id and index.isdigit():
+                    stat = os.stat(full)
+                    found.append((stat.st_atime, (unique_id, int(index)), stat.st_size))
+        return sorted(found)
+
+    async def _load(self):
+        # Parts left by the previous run, least recently used first
+        os.makedirs(self.path, exist_ok=True)
+        for _, key, size in await asyncio.to_thread(self._scan):
+            self.parts[key] = size
+            self.size += size
+        self.LOGGER.info(f"Chunk cache: {len(self.parts)} parts, {self.size / 2**20:.0f} MiB")
+        await self._evict()
+
+    async def _evict(self):
+        doomed = []
+        while self.size > self.max_bytes and self.parts:
+            key, size = self.parts.popitem(last=False)
+            self.size -= size
+            doomed.append(self._file(key))
+        if doomed:
+            # Readers that already opened a part keep it until they close it
+            await asyncio.to_thread(lambda: [os.remove(f) for f in doomed if os.path.exists(f)])
+
+    def _write(self, key, data):
+        target = self._file(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + ".part", "wb") as f:
+            f.write(data)
+        os.replace(target + ".part", target)
+
+    async def _download(self, bot, message, key):
+        data = b""
+        async for part in bot.stream_media(message, limit=1, offset=key[1]):
+            data += part
+        await asyncio.to_thread(self._write, key, data)
+        self.parts[key] = len(data)
+        self.size += len(data)
+        await self._evict()
+
+    def fetch(self, bot, message, unique_id: str, index: int):
+        """Task that has the part on disk once it finishes."""
+        key = (unique_id, index)
+        task = self.pending.get(key)
+        if task is None:
+            task = self.pending[key] = tasks.spawn(self._download(bot, message, key), "chunk_download")
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    def _done(self, key, task):
+        self.pending.pop(key, None)
+        if not task.cancelled() and task.exception():
+            self.LOGGER.warning(f"Could not cache part {key[1]} of {key[0]}: {task.exception()}")
+
+    async def open(self, bot, message, unique_id: str, index: int):
+        """Open file holding part `index` of the file, downloading it when missing."""
+        if self.loaded is None:
+            self.loaded = tasks.spawn(self._load(), "chunk_cache_load")
+        await asyncio.shield(self.loaded)
+
+        key = (unique_id, index)
+        for attempt in range(3):
+            if key in self.parts:
+                self.parts.move_to_end(key)
+                try:
+                    part = open(self._file(key), "rb")
+                except FileNotFoundError:
+                    self.size -= self.parts.pop(key, 0)  # removed behind our back
+                else:
+                    self.hits += not attempt
+                    return part
+            if key in self.pending:
+                self.coalesced += 1  # someone else is downloading it
+            else:
+                self.misses += 1
+            await asyncio.shield(self.fetch(bot, message, unique_id, index))
+        raise OSError(f"part {index} of {unique_id} could not be cached")
+
+    def prefetch(self, bot, message, unique_id: str, index: int):
+        # Start the next part while the current one is being sent
+        if self.enabled and (unique_id, index) not in self.parts:
+            self.fetch(bot, message, unique_id, index)
+
+
+chunk_cache = ChunkCache(STREAM_CACHE_DIR, STREAM_CACHE_SIZE * 2**20)
@@ -13,7 +13,7 @@
 import os
 from os import environ,getenv
 import logging
-from logging.handlers import RotatingFileHandler
+from logs import setup_logging
 
 #rohit_1888 on Tg
 #--------------------------------------------
@@ -29,12 +29,58 @@ OWNER_ID = int(os.environ.get("OWNER_ID", "7328629001")) # Owner id
 #--------------------------------------------
 PORT = os.environ.get("PORT", "8001")
 #--------------------------------------------
+DB_BACKEND = os.environ.get("DB_BACKEND", "mongo").strip().lower()  # mongo, sqlite or memory
+DB_SQLITE_PATH = os.environ.get("DB_SQLITE_PATH", "filestore.db")
 DB_URI = os.environ.get("DATABASE_URL", "")
 DB_NAME = os.environ.get("DATABASE_NAME", "Cluooo")
+DB_MAX_POOL_SIZE = int(os.environ.get("DB_MAX_POOL_SIZE", "50"))
+DB_MIN_POOL_SIZE = int(os.environ.get("DB_MIN_POOL_SIZE", "0"))
+DB_MAX_IDLE_MS = int(os.environ.get("DB_MAX_IDLE_MS", "60000"))  # close idle pooled connections
+DB_CONNECT_TIMEOUT_MS = int(os.environ.get("DB_CONNECT_TIMEOUT_MS", "10000"))
+DB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("DB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+DB_SOCKET_TIMEOUT_MS = int(os.environ.get("DB_SOCKET_TIMEOUT_MS", "20000"))
+DB_COMPRESSORS = os.environ.get("DB_COMPRESSORS", "zlib")  # e.g. "zstd,snappy,zlib", needs the matching packages
+DB_WRITE_CONCERN = os.environ.get("DB_WRITE_CONCERN", "1")  # number of nodes or "majority"
+DB_WRITE_JOURNAL = os.environ.get("DB_WRITE_JOURNAL", "False") == "True"
+DB_PROFILE = os.environ.get("DB_PROFILE", "True") == "True"  # time every MongoDB command for /metrics and /dbtop
+DB_SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "200"))  # MongoDB commands slower than this are logged
+DB_OP_TIMEOUT = float(os.environ.get("DB_OP_TIMEOUT", "3"))  # deadline for a single lookup/write, seconds
+DB_SCAN_TIMEOUT = float(os.environ.get("DB_SCAN_TIMEOUT", "120"))  # deadline for full collection reads
+DB_BREAKER_FAILURES = int(os.environ.get("DB_BREAKER_FAILURES", "5"))  # consecutive failures before degraded mode
+DB_BREAKER_COOLDOWN = float(os.environ.get("DB_BREAKER_COOLDOWN", "15"))  # seconds before probing the database again
+DB_SPILL_LIMIT = int(os.environ.get("DB_SPILL_LIMIT", "10000"))  # writes kept while the database is unavailable
+STATS_FLUSH_INTERVAL = int(os.environ.get("STATS_FLUSH_INTERVAL", "60"))  # seconds between counter writes
+STATS_KEEP_DAYS = int(os.environ.get("STATS_KEEP_DAYS", "7"))  # daily rollups kept in memory for /stats
 #--------------------------------------------
 FSUB_LINK_EXPIRY = int(os.getenv("FSUB_LINK_EXPIRY", "120"))  # 0 means no expiry
 BAN_SUPPORT = os.environ.get("BAN_SUPPORT", "https://t.me/XenohContactbot")
 TG_BOT_WORKERS = int(os.environ.get("TG_BOT_WORKERS", "200"))
+OUTBOUND_RATE = float(os.environ.get("OUTBOUND_RATE", "25"))  # Bot API calls per second across all chats
+OUTBOUND_BURST = float(os.environ.get("OUTBOUND_BURST", "30"))
+OUTBOUND_CHAT_RATE = float(os.environ.get("OUTBOUND_CHAT_RATE", "3"))  # messages per second into one chat
+OUTBOUND_CHAT_BURST = float(os.environ.get("OUTBOUND_CHAT_BURST", "20"))
+OUTBOUND_FLOOD_RETRIES = int(os.environ.get("OUTBOUND_FLOOD_RETRIES", "3"))  # retries of a call after FloodWait
+OUTBOUND_MAX_INFLIGHT = int(os.environ.get("OUTBOUND_MAX_INFLIGHT", "40"))  # Bot API calls running at once
+OUTBOUND_CHAT_INFLIGHT = int(os.environ.get("OUTBOUND_CHAT_INFLIGHT", "4"))  # share of those one chat may hold
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "50"))  # admin uploads stored per forward call, at most 100
+INGEST_LINGER = float(os.environ.get("INGEST_LINGER", "0.3"))  # seconds to let a burst of uploads gather into one batch
+DEDUP_UPLOADS = os.environ.get("DEDUP_UPLOADS", "True") == "True"  # hand out the existing link when a stored file is uploaded again
+DEDUP_MERGE_STATS = os.environ.get("DEDUP_MERGE_STATS", "True") == "True"  # count deliveries of duplicate posts towards the original
+BATCH_CACHE_SIZE = int(os.environ.get("BATCH_CACHE_SIZE", "2000"))  # batch manifests kept in memory
+DELIVERY_PAGE_SIZE = int(os.environ.get("DELIVERY_PAGE_SIZE", "0"))  # files per page of a batch link, 0 sends everything at once
+BACKFILL_ON_START = os.environ.get("BACKFILL_ON_START", "True") == "True"  # index older DB channel posts in the background
+BACKFILL_DELAY = float(os.environ.get("BACKFILL_DELAY", "1"))  # seconds between 200-post history reads
+STREAM_URL = os.environ.get("STREAM_URL", "").rstrip("/")  # public address of the web server, enables download buttons
+STREAM_SECRET = os.environ.get("STREAM_SECRET", "") or TG_BOT_TOKEN  # signs download links
+STREAM_LINK_TTL = int(os.environ.get("STREAM_LINK_TTL", "86400"))  # seconds a download link stays valid
+STREAM_MAX_CONCURRENT = int(os.environ.get("STREAM_MAX_CONCURRENT", "8"))  # downloads served at once
+STREAM_PER_IP = int(os.environ.get("STREAM_PER_IP", "2"))  # downloads one address may run at once
+STREAM_CACHE_DIR = os.environ.get("STREAM_CACHE_DIR", "stream_cache")  # where downloaded file parts are kept
+STREAM_CACHE_SIZE = int(os.environ.get("STREAM_CACHE_SIZE", "2048"))  # MiB of file parts kept on disk, 0 disables the cache
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")  # bearer token required by /metrics when set
+SLOW_HANDLER_SECONDS = float(os.environ.get("SLOW_HANDLER_SECONDS", "3"))  # handlers slower than this log their stage breakdown
+LOOP_MONITOR_INTERVAL = float(os.environ.get("LOOP_MONITOR_INTERVAL", "0.5"))  # seconds between event loop heartbeats
+LOOP_STALL_MS = float(os.environ.get("LOOP_STALL_MS", "250"))  # a heartbeat this late records what blocked the loop
 #--------------------------------------------
 START_PIC = os.environ.get("START_PIC", "https://telegra.ph/file/ec17880d61180d3312d6a.jpg")
 FORCE_PIC = os.environ.get("FORCE_PIC", "https://telegra.ph/file/e292b12890b8b4b9dcbd1.jpg")
@@ -65,6 +111,11 @@ CMD_TXT = """<blockquote><b>» ᴀᴅᴍɪɴ ᴄᴏᴍᴍᴀɴᴅs:</b></blockqu
 <b>›› /deladmin :</b> ʀᴇᴍᴏᴠᴇ ᴀɴ ᴀᴅᴍɪɴ
 <b>›› /admins :</b> ɢᴇᴛ ʟɪsᴛ ᴏꜰ ᴀᴅᴍɪɴs
 <b>›› /delreq :</b> Rᴇᴍᴏᴠᴇᴅ ʟᴇғᴛᴏᴠᴇʀ ɴᴏɴ-ʀᴇǫᴜᴇsᴛ ᴜsᴇʀs
+<b>›› /queues :</b> ᴏᴜᴛʙᴏᴜɴᴅ ǫᴜᴇᴜᴇ ᴅᴇᴘᴛʜs
+<b>›› /search :</b> ғɪɴᴅ sᴛᴏʀᴇᴅ ғɪʟᴇs ʙʏ ɴᴀᴍᴇ ᴏʀ ᴄᴀᴘᴛɪᴏɴ
+<b>›› /backfill :</b> ɪɴᴅᴇxɪɴɢ ᴘʀᴏɢʀᴇss ᴏғ ᴏʟᴅᴇʀ ᴘᴏsᴛs
+<b>›› /dbtop :</b> ᴄᴏsᴛʟɪᴇsᴛ ᴅᴀᴛᴀʙᴀsᴇ ǫᴜᴇʀɪᴇs
+<b>›› /health :</b> ᴇᴠᴇɴᴛ ʟᴏᴏᴘ ʟᴀɢ ᴀɴᴅ ʙᴀᴄᴋɢʀᴏᴜɴᴅ ᴛᴀsᴋs
 """
 #--------------------------------------------
 CUSTOM_CAPTION = os.environ.get("CUSTOM_CAPTION", "<b>• ʙʏ @Spicylinebun</b>") #set your Custom Caption here, Keep None for Disable Custom Caption
@@ -74,25 +125,33 @@ PROTECT_CONTENT = True if os.environ.get('PROTECT_CONTENT', "True") == "True" el
 DISABLE_CHANNEL_BUTTON = os.environ.get("DISABLE_CHANNEL_BUTTON", None) == 'True'
 #--------------------------------------------
 BOT_STATS_TEXT = "<b>BOT UPTIME</b>\n{uptime}"
+BOT_COUNTERS_TEXT = """
+<b>ᴜsᴇʀs:</b> <code>{users}</code>  <b>ʙᴀɴɴᴇᴅ:</b> <code>{banned}</code>
+
+<b>ᴛᴏᴅᴀʏ / ᴀʟʟ ᴛɪᴍᴇ</b>
+ɴᴇᴡ ᴜsᴇʀs: <code>{today[new_users]}</code> / <code>{total[new_users]}</code>
+ʟɪɴᴋs ᴏᴘᴇɴᴇᴅ: <code>{today[deliveries]}</code> / <code>{total[deliveries]}</code>
+ғɪʟᴇs sᴇʀᴠᴇᴅ: <code>{today[files_served]}</code> / <code>{total[files_served]}</code>
+ʙʀᴏᴀᴅᴄᴀsᴛs: <code>{today[broadcasts]}</code> / <code>{total[broadcasts]}</code>
+ᴊᴏɪɴ ʀᴇǫᴜᴇsᴛs: <code>{today[join_requests]}</code> / <code>{total[join_requests]}</code>
+ʙᴀɴs: <code>{today[bans]}</code> / <code>{total[bans]}</code>
+
+<b>ғɪʟᴇs sᴇʀᴠᴇᴅ, ʟᴀsᴛ {days} ᴅᴀʏs</b>
+<code>{trend}</code>"""
 USER_REPLY_TEXT = "ʙᴀᴋᴋᴀ ! ʏᴏᴜ ᴀʀᴇ ɴᴏᴛ ᴍʏ ꜱᴇɴᴘᴀɪ!!"
+BANLIST_TITLE = "<b>🚫 Bᴀɴɴᴇᴅ Usᴇʀs:</b>"
+ADMINS_TITLE = "<b>⚡ Current Admin List:</b>"
 #--------------------------------------------
 
 
 LOG_FILE_NAME = "filesharingbot.txt"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # "json" writes one JSON object per line
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_BURST = int(os.environ.get("LOG_BURST", "20"))  # records one log line may write per LOG_WINDOW, 0 disables the limit
+LOG_WINDOW = float(os.environ.get("LOG_WINDOW", "60"))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s - %(levelname)s] - %(name)s - %(message)s",
-    datefmt='%d-%b-%y %H:%M:%S',
-    handlers=[
-        RotatingFileHandler(
-            LOG_FILE_NAME,
-            maxBytes=50000000,
-            backupCount=10
-        ),
-        logging.StreamHandler()
-    ]
-)
+# Written by a background thread, see logs.py
+setup_logging(LOG_FILE_NAME, LOG_FORMAT == "json", LOG_LEVEL, LOG_BURST, LOG_WINDOW)
 logging.getLogger("pyrogram").setLevel(logging.WARNING)
 
 
@@ -0,0 +1,61 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import time
+
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of waiting on the database while the breaker is open."""
+
+
+# Classic three-state circuit breaker. After `threshold` consecutive failures
+# the circuit opens and calls fail fast for `cooldown` seconds; then one probe
+# is let through (half-open) and its outcome closes or re-opens the circuit.
+class CircuitBreaker:
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self.state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def success(self):
+        # Returns True when this success closed a previously open circuit
+        recovered = self.opened_at is not None
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        return recovered
+
+    def trip(self):
+        # Open at once, e.g. when the database is unreachable at startup
+        if self.opened_at is None:
+            self.trips += 1
+        self.opened_at = time.monotonic()
+        self.probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+        self.probing = False
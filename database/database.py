@@ -1,198 +1,590 @@
 #Codeflix_Botz
 #rohit_1888 on Tg
 
-import motor, asyncio
-import motor.motor_asyncio
+import asyncio
+import secrets
+import string
 import time
-import pymongo, os
-from config import DB_URI, DB_NAME
-from bot import Bot
+import os
+from collections import Counter, OrderedDict, deque
+from config import *
+from database.breaker import CircuitBreaker, DatabaseUnavailable
+from database.userindex import KnownUsers
+from database.stats import Stats
+from metrics import DB_SECONDS, span
+from health import tasks
 import logging
 from datetime import datetime, timedelta
 
-dbclient = pymongo.MongoClient(DB_URI)
-database = dbclient[DB_NAME]
 
-logging.basicConfig(level=logging.INFO)
+def make_storage(backend: str = DB_BACKEND):
+    # Storage engine selected by DB_BACKEND; imports are lazy so an embedded
+    # deployment does not need motor/pymongo installed
+    backend = backend.lower()
+    if backend == "mongo":
+        from database.mongo import MongoStorage
+        return MongoStorage(DB_URI, DB_NAME)
+    if backend == "sqlite":
+        from database.sqlite import SQLiteStorage
+        return SQLiteStorage(DB_SQLITE_PATH)
+    if backend == "memory":
+        from database.memory import MemoryStorage
+        return MemoryStorage()
+    raise ValueError(f"Unknown DB_BACKEND: {backend}")
+
+
+# Immutable view of the force-sub configuration. A new snapshot is built and
+# swapped in whenever the channel list or a mode changes, so readers never see
+# a half-updated state and never need a round trip of their own.
+class FsubSnapshot:
+
+    def __init__(self, version: int = 0, docs=None):
+        docs = docs or []
+        self.version = version
+        self.ids = tuple(doc['_id'] for doc in docs)
+        self.modes = {doc['_id']: doc.get('mode', 'off') for doc in docs}
+        self.settings = {doc['_id']: {k: v for k, v in doc.items() if k != '_id'} for doc in docs}
+
+    def __contains__(self, channel_id):
+        return channel_id in self.modes
+
+    def mode(self, channel_id: int):
+        return self.modes.get(channel_id, 'off')
+
+    def docs(self):
+        return [{'_id': cid, **self.settings[cid]} for cid in self.ids]
+
+    def with_channel(self, channel_id: int, **settings):
+        docs = self.docs()
+        for doc in docs:
+            if doc['_id'] == channel_id:
+                doc.update(settings)
+                break
+        else:
+            docs.append({'_id': channel_id, **settings})
+        return FsubSnapshot(self.version + 1, docs)
+
+    def without_channel(self, channel_id: int):
+        return FsubSnapshot(self.version + 1, [d for d in self.docs() if d['_id'] != channel_id])
 
 
 class Rohit:
 
-    def __init__(self, DB_URI, DB_NAME):
-        self.dbclient = motor.motor_asyncio.AsyncIOMotorClient(DB_URI)
-        self.database = self.dbclient[DB_NAME]
+    def __init__(self, store):
+        self.store = store
+
+        # Small, hot data lives in memory and is written through to storage,
+        # so /start and the admin filter keep working while it is down
+        self.fsub_snapshot = None
+        self._fsub_lock = asyncio.Lock()
+        self.ban_cache = set()
+        self.admin_cache = set()
+        self.del_timer_cache = 0
+        self.known_users = KnownUsers()
+        self.stats = Stats(STATS_KEEP_DAYS)
+        self.batch_cache = OrderedDict()  # LRU of batch manifests
+        self.batch_hits = 0
+        self.batch_misses = 0
+        self.duplicates = {}  # re-uploaded post id -> original post id
+        self.file_hits = Counter()  # deliveries per post, flushed with the stats
+
+        self.breaker = CircuitBreaker(DB_BREAKER_FAILURES, DB_BREAKER_COOLDOWN)
+        self.transient_errors = tuple(store.TRANSIENT_ERRORS) + (asyncio.TimeoutError,)
+        self.spill = deque()
+        self.spill_dropped = 0
+        self._replaying = False
+        self._replay_pending = False
+        self.LOGGER = LOGGER(__name__)
+
+    # CONNECTION
+    async def connect(self):
+        # Called once from Bot.start, so clients are bound to the running loop.
+        # When storage does not answer, the bot starts in degraded mode with
+        # empty caches and loads them once the breaker lets a probe through.
+        await self.store.connect()
+        tasks.spawn(self.stats_loop(), "stats_flush")
+        try:
+            await self._call(self._bootstrap, DB_SCAN_TIMEOUT)
+        except DatabaseUnavailable as e:
+            self.LOGGER.warning(f"Database unavailable at startup, running in degraded mode: {e}")
+            self.breaker.trip()
+            if self.fsub_snapshot is None:
+                self.fsub_snapshot = FsubSnapshot(1)
+            tasks.spawn(self._bootstrap_later(), "db_bootstrap")
+            return
+        await self._after_bootstrap()
+
+    async def _bootstrap(self):
+        docs, _, _ = await asyncio.gather(self.store.get_channels(), self.load_caches(), self.load_stats())
+        version = self.fsub_snapshot.version + 1 if self.fsub_snapshot else 1
+        self.fsub_snapshot = FsubSnapshot(version, docs)
+
+    async def _bootstrap_later(self):
+        while True:
+            await asyncio.sleep(self.breaker.cooldown)
+            # Writes made while degraded go first, so the loaded caches include them
+            await self.replay_spill()
+            if self.spill:
+                continue
+            try:
+                await self._call(self._bootstrap, DB_SCAN_TIMEOUT)
+            except DatabaseUnavailable:
+                continue
+            except Exception as e:
+                self.LOGGER.warning(f"Loading caches failed, retrying: {e}")
+                continue
+            self.LOGGER.info("Database reachable, caches loaded")
+            await self._after_bootstrap()
+            return
 
-        self.channel_data = self.database['channels']
-        self.admins_data = self.database['admins']
-        self.user_data = self.database['users']
-        self.banned_user_data = self.database['banned_user']
-        self.autho_user_data = self.database['autho_user']
-        self.del_timer_data = self.database['del_timer']
-        self.fsub_data = self.database['fsub']   
-        self.rqst_fsub_data = self.database['request_forcesub']
-        self.rqst_fsub_Channel_data = self.database['request_forcesub_channel']
-        
+    async def _after_bootstrap(self):
+        try:
+            await self.store.ensure_indexes()
+        except Exception as e:
+            self.LOGGER.warning(f"Could not ensure indexes: {e}")
+        # Streaming every user id can take a while on big bots, so it runs in
+        # the background and lookups fall back to storage until it is ready
+        tasks.spawn(self.load_known_users(), "known_users_load")
+
+    def close(self):
+        self.store.close()
+
+    async def load_stats(self):
+        self.stats.load(await self.store.get_stats(['total'] + self.stats.recent_keys()))
+
+    async def flush_stats(self):
+        # One $inc per touched key ('total' and today's rollup)
+        for key, deltas in self.stats.take_pending().items():
+            deltas = dict(deltas)
+            await self._write(lambda key=key, deltas=deltas: self.store.inc_stats(key, deltas))
+        hits, self.file_hits = dict(self.file_hits), Counter()
+        if hits:
+            await self._write(lambda: self.store.inc_file_hits(hits))
+
+    async def stats_loop(self):
+        while True:
+            await asyncio.sleep(STATS_FLUSH_INTERVAL)
+            try:
+                await self.flush_stats()
+            except Exception as e:
+                self.LOGGER.warning(f"Could not persist stats: {e}")
+
+    async def count_users(self):
+        if self.known_users.ready:
+            return len(self.known_users)
+        return await self._call(self.store.count_users)
+
+    async def load_known_users(self):
+        started = time.monotonic()
+        try:
+            await self.known_users.load(self.store.iter_user_ids())
+        except Exception as e:
+            self.LOGGER.warning(f"Known-user index not loaded, /start will query storage: {e}")
+            return
+        self.LOGGER.info(
+            f"Known-user index: {len(self.known_users)} ids, "
+            f"{self.known_users.memory_bytes() / 2**20:.1f} MiB, {time.monotonic() - started:.1f}s"
+        )
+
+    async def load_caches(self):
+        bans, admins, timer, duplicates = await asyncio.gather(
+            self.store.get_bans(), self.store.get_admins(), self.store.get_del_timer(), self.store.get_duplicates()
+        )
+        self.ban_cache = set(bans)
+        self.admin_cache = set(admins)
+        self.del_timer_cache = timer if timer is not None else 0
+        self.duplicates = duplicates
+
+
+    # DEGRADED MODE
+    # Every storage call goes through _call: it fails fast while the breaker is
+    # open and gives up after a deadline instead of holding a worker hostage.
+    async def _call(self, factory, timeout=DB_OP_TIMEOUT):
+        if not self.breaker.allow():
+            raise DatabaseUnavailable("database circuit is open")
+        start = time.perf_counter()
+        try:
+            with span('db'):
+                result = await asyncio.wait_for(factory(), timeout)
+        except self.transient_errors as e:
+            DB_SECONDS.observe(time.perf_counter() - start, result='unavailable')
+            self.breaker.failure()
+            raise DatabaseUnavailable(str(e) or type(e).__name__) from e
+        except Exception:
+            # Any answer from the server, even an error, proves it is reachable
+            DB_SECONDS.observe(time.perf_counter() - start, result='error')
+            self._reachable()
+            raise
+        DB_SECONDS.observe(time.perf_counter() - start, result='ok')
+        self._reachable()
+        return result
+
+    def _reachable(self):
+        if self.breaker.success() and self.spill:
+            self.LOGGER.info("Database recovered, replaying %d spilled writes", len(self.spill))
+            tasks.spawn(self.replay_spill(), "db_replay")
+
+    async def _write(self, factory):
+        # Writes that cannot reach storage are kept in a bounded buffer and
+        # replayed in order once it answers again. Returns None when spilled.
+        if not self.spill:
+            try:
+                return await self._call(factory)
+            except DatabaseUnavailable:
+                pass
+        # Queue behind earlier spilled writes so they are applied in order
+        if len(self.spill) >= DB_SPILL_LIMIT:
+            self.spill.popleft()
+            self.spill_dropped += 1
+        self.spill.append(factory)
+        self._schedule_replay()
+        return None
+
+    def _schedule_replay(self):
+        # Probe again after the cooldown even if no other call comes along
+        if self._replay_pending:
+            return
+        self._replay_pending = True
+        asyncio.get_running_loop().call_later(self.breaker.cooldown, self._start_replay)
+
+    def _start_replay(self):
+        self._replay_pending = False
+        tasks.spawn(self.replay_spill(), "db_replay")
+
+    async def replay_spill(self):
+        if self._replaying:
+            return
+        self._replaying = True
+        try:
+            while self.spill:
+                factory = self.spill[0]
+                try:
+                    await self._call(factory)
+                except DatabaseUnavailable:
+                    self._schedule_replay()
+                    return
+                except Exception as e:
+                    self.LOGGER.warning(f"Dropping spilled write that failed on replay: {e}")
+                self.spill.popleft()
+        finally:
+            self._replaying = False
+
+    def health(self):
+        return {
+            'state': self.breaker.state,
+            'trips': self.breaker.trips,
+            'spilled': len(self.spill),
+            'dropped': self.spill_dropped,
+        }
 
 
     # USER DATA
     async def present_user(self, user_id: int):
-        found = await self.user_data.find_one({'_id': user_id})
-        return bool(found)
+        if self.known_users.ready:
+            return user_id in self.known_users
+        return await self._call(lambda: self.store.present_user(user_id))
 
     async def add_user(self, user_id: int):
-        await self.user_data.insert_one({'_id': user_id})
-        return
+        # Returns True when the user was not known before. Once the known-user
+        # index is loaded it decides, so a user whose write was spilled is
+        # still counted; until then the storage answer does.
+        if self.known_users.ready:
+            if user_id in self.known_users:
+                return False
+            self.known_users.add(user_id)
+            await self._write(lambda: self.store.add_user(user_id))
+            added = True
+        else:
+            self.known_users.add(user_id)
+            added = bool(await self._write(lambda: self.store.add_user(user_id)))
+        if added:
+            self.stats.incr('new_users')
+        return added
 
     async def full_userbase(self):
-        user_docs = await self.user_data.find().to_list(length=None)
-        user_ids = [doc['_id'] for doc in user_docs]
-        return user_ids
+        return await self._call(self.store.full_userbase, DB_SCAN_TIMEOUT)
 
     async def del_user(self, user_id: int):
-        await self.user_data.delete_one({'_id': user_id})
-        return
+        self.known_users.discard(user_id)
+        return bool(await self._write(lambda: self.store.del_user(user_id)))
 
 
     # ADMIN DATA
     async def admin_exist(self, admin_id: int):
-        found = await self.admins_data.find_one({'_id': admin_id})
-        return bool(found)
+        return admin_id in self.admin_cache
 
     async def add_admin(self, admin_id: int):
-        if not await self.admin_exist(admin_id):
-            await self.admins_data.insert_one({'_id': admin_id})
-            return
+        return bool(await self.add_admins([admin_id]))
 
     async def del_admin(self, admin_id: int):
-        if await self.admin_exist(admin_id):
-            await self.admins_data.delete_one({'_id': admin_id})
-            return
+        return bool(await self.del_admins([admin_id]))
 
     async def get_all_admins(self):
-        users_docs = await self.admins_data.find().to_list(length=None)
-        user_ids = [doc['_id'] for doc in users_docs]
-        return user_ids
+        return sorted(self.admin_cache)  # stable order for paged lists
+
+    async def add_admins(self, admin_ids):
+        # Returns the ids that were not admins before
+        return await self._insert_many_ids(self.store.add_admins, self.admin_cache, admin_ids)
+
+    async def del_admins(self, admin_ids=None):
+        # Remove the given admins, or every admin when admin_ids is None
+        return await self._delete_many_ids(self.store.del_admins, self.admin_cache, admin_ids)
 
 
     # BAN USER DATA
     async def ban_user_exist(self, user_id: int):
-        found = await self.banned_user_data.find_one({'_id': user_id})
-        return bool(found)
+        return user_id in self.ban_cache
 
     async def add_ban_user(self, user_id: int):
-        if not await self.ban_user_exist(user_id):
-            await self.banned_user_data.insert_one({'_id': user_id})
-            return
+        return bool(await self.ban_many([user_id]))
 
     async def del_ban_user(self, user_id: int):
-        if await self.ban_user_exist(user_id):
-            await self.banned_user_data.delete_one({'_id': user_id})
-            return
+        return bool(await self.unban_many([user_id]))
 
     async def get_ban_users(self):
-        users_docs = await self.banned_user_data.find().to_list(length=None)
-        user_ids = [doc['_id'] for doc in users_docs]
+        return sorted(self.ban_cache)
+
+    async def ban_many(self, user_ids):
+        # Returns the ids that were not banned before
+        banned = await self._insert_many_ids(self.store.add_bans, self.ban_cache, user_ids)
+        self.stats.incr('bans', len(banned))
+        return banned
+
+    async def unban_many(self, user_ids):
+        # Returns how many of the given ids were removed from the ban list
+        return await self._delete_many_ids(self.store.del_bans, self.ban_cache, user_ids)
+
+    async def unban_all(self):
+        # Clears the ban list and returns the ids that were on it
+        user_ids = list(self.ban_cache)
+        await self._delete_many_ids(self.store.del_bans, self.ban_cache, user_ids)
         return user_ids
 
 
 
     # AUTO DELETE TIMER SETTINGS
-    async def set_del_timer(self, value: int):        
-        existing = await self.del_timer_data.find_one({})
-        if existing:
-            await self.del_timer_data.update_one({}, {'$set': {'value': value}})
-        else:
-            await self.del_timer_data.insert_one({'value': value})
+    async def set_del_timer(self, value: int):
+        # Returns True when the value changed
+        changed = value != self.del_timer_cache
+        self.del_timer_cache = value
+        await self._write(lambda: self.store.set_del_timer(value))
+        return changed
 
     async def get_del_timer(self):
-        data = await self.del_timer_data.find_one({})
-        if data:
-            return data.get('value', 600)
-        return 0
+        return self.del_timer_cache
+
+    async def get_checkpoint(self, name: str):
+        return await self._call(lambda: self.store.get_checkpoint(name))
+
+    async def set_checkpoint(self, name: str, value: int):
+        await self._write(lambda: self.store.set_checkpoint(name, value))
 
 
     # CHANNEL MANAGEMENT
+    async def load_fsub_snapshot(self):
+        # One query for ids, modes and settings of every force-sub channel
+        async with self._fsub_lock:
+            docs = await self._call(self.store.get_channels)
+            version = self.fsub_snapshot.version + 1 if self.fsub_snapshot else 1
+            self.fsub_snapshot = FsubSnapshot(version, docs)
+            return self.fsub_snapshot
+
+    async def get_fsub_snapshot(self):
+        if self.fsub_snapshot is None:
+            return await self.load_fsub_snapshot()
+        return self.fsub_snapshot
+
     async def channel_exist(self, channel_id: int):
-        found = await self.fsub_data.find_one({'_id': channel_id})
-        return bool(found)
+        snapshot = await self.get_fsub_snapshot()
+        return channel_id in snapshot
 
     async def add_channel(self, channel_id: int):
-        if not await self.channel_exist(channel_id):
-            await self.fsub_data.insert_one({'_id': channel_id})
-            return
+        snapshot = await self.get_fsub_snapshot()
+        if channel_id in snapshot:
+            return False
+        self.fsub_snapshot = snapshot.with_channel(channel_id)
+        await self._write(lambda: self.store.add_channel(channel_id))
+        return True
 
     async def rem_channel(self, channel_id: int):
-        if await self.channel_exist(channel_id):
-            await self.fsub_data.delete_one({'_id': channel_id})
-            return
+        snapshot = await self.get_fsub_snapshot()
+        if channel_id not in snapshot:
+            return False
+        self.fsub_snapshot = snapshot.without_channel(channel_id)
+        await self._write(lambda: self.store.rem_channel(channel_id))
+        return True
 
     async def show_channels(self):
-        channel_docs = await self.fsub_data.find().to_list(length=None)
-        channel_ids = [doc['_id'] for doc in channel_docs]
-        return channel_ids
+        snapshot = await self.get_fsub_snapshot()
+        return list(snapshot.ids)
+
 
-    
 # Get current mode of a channel
     async def get_channel_mode(self, channel_id: int):
-        data = await self.fsub_data.find_one({'_id': channel_id})
-        return data.get("mode", "off") if data else "off"
+        snapshot = await self.get_fsub_snapshot()
+        return snapshot.mode(channel_id)
 
-    # Set mode of a channel
+    # Set mode of a channel; returns True when the mode changed
     async def set_channel_mode(self, channel_id: int, mode: str):
-        await self.fsub_data.update_one(
-            {'_id': channel_id},
-            {'$set': {'mode': mode}},
-            upsert=True
-        )
+        snapshot = await self.get_fsub_snapshot()
+        if channel_id in snapshot and snapshot.mode(channel_id) == mode:
+            return False
+        self.fsub_snapshot = snapshot.with_channel(channel_id, mode=mode)
+        await self._write(lambda: self.store.set_channel_mode(channel_id, mode))
+        return True
 
     # REQUEST FORCE-SUB MANAGEMENT
 
-    # Add the user to the set of users for a   specific channel
+    # Add the user to the set of users for a   specific channel. True when
+    # added, False when already listed, None when the write was spilled
     async def req_user(self, channel_id: int, user_id: int):
-        try:
-            await self.rqst_fsub_Channel_data.update_one(
-                {'_id': int(channel_id)},
-                {'$addToSet': {'user_ids': int(user_id)}},
-                upsert=True
-            )
-        except Exception as e:
-            print(f"[DB ERROR] Failed to add user to request list: {e}")
+        added = await self._write(lambda: self.store.req_user(int(channel_id), int(user_id)))
+        return None if added is None else bool(added)
 
 
     # Method 2: Remove a user from the channel set
     async def del_req_user(self, channel_id: int, user_id: int):
-        # Remove the user from the set of users for the channel
-        await self.rqst_fsub_Channel_data.update_one(
-            {'_id': channel_id}, 
-            {'$pull': {'user_ids': user_id}}
-        )
+        return bool(await self._write(lambda: self.store.del_req_user(int(channel_id), int(user_id))))
 
     # Check if the user exists in the set of the channel's users
     async def req_user_exist(self, channel_id: int, user_id: int):
         try:
-            found = await self.rqst_fsub_Channel_data.find_one({
-                '_id': int(channel_id),
-                'user_ids': int(user_id)
-            })
-            return bool(found)
-        except Exception as e:
-            print(f"[DB ERROR] Failed to check request list: {e}")
-            return False  
-
-
-    # Method to check if a channel exists using show_channels
-    async def reqChannel_exist(self, channel_id: int):
-    # Get the list of all channel IDs from the database
-        channel_ids = await self.show_channels()
-        #print(f"All channel IDs in the database: {channel_ids}")
-
-    # Check if the given channel_id is in the list of channel IDs
-        if channel_id in channel_ids:
-            #print(f"Channel {channel_id} found in the database.")
-            return True
-        else:
-            #print(f"Channel {channel_id} NOT found in the database.")
+            return await self._call(lambda: self.store.req_user_exist(int(channel_id), int(user_id)))
+        except DatabaseUnavailable as e:
+            self.LOGGER.warning(f"Request list unavailable, treating as not requested: {e}")
             return False
 
+    # All users with a pending join request for the channel, or None
+    async def get_req_users(self, channel_id: int):
+        return await self._call(lambda: self.store.get_req_users(channel_id))
 
-db = Rohit(DB_URI, DB_NAME)
+
+    # Method to check if a channel exists using the force-sub snapshot
+    async def reqChannel_exist(self, channel_id: int):
+        snapshot = await self.get_fsub_snapshot()
+        return channel_id in snapshot
+
+
+    # FILES INDEX
+    async def add_files(self, docs):
+        # Posts sharing a file_unique_id are duplicates of the oldest one
+        # (lowest id). Backfill indexes history after live uploads, so an
+        # older post can take over as the original of an indexed one.
+        unique_ids = list({doc['file_unique_id'] for doc in docs if doc.get('file_unique_id')})
+        originals = {}
+        if unique_ids:
+            try:
+                originals = await self._call(lambda: self.store.find_unique_ids(unique_ids))
+            except DatabaseUnavailable:
+                pass
+        replaced = {}  # old original -> new original
+        for doc in sorted(docs, key=lambda doc: doc['_id']):
+            unique_id = doc.get('file_unique_id')
+            if not unique_id:
+                continue
+            original = originals.setdefault(unique_id, doc['_id'])
+            if doc['_id'] < original:
+                originals[unique_id] = replaced[original] = doc['_id']
+            elif original != doc['_id']:
+                doc['dup_of'] = original
+                self.duplicates[doc['_id']] = original
+        await self._write(lambda: self.store.add_files(docs))
+        for old, new in replaced.items():
+            await self._set_original(old, new)
+            self.duplicates[old] = new
+
+    async def drop_file(self, msg_id: int):
+        # The post is gone from the DB channel; the oldest of its duplicates
+        # becomes the original
+        duplicates = sorted(dup for dup, original in self.duplicates.items() if original == msg_id)
+        self.duplicates.pop(msg_id, None)
+        await self._write(lambda: self.store.del_file(msg_id))
+        if duplicates:
+            await self._set_original(msg_id, duplicates[0])
+
+    async def _set_original(self, old, new):
+        for dup, original in list(self.duplicates.items()):
+            if original == old:
+                self.duplicates[dup] = new
+        self.duplicates.pop(new, None)
+        await self._write(lambda: self.store.set_original(old, new))
+
+    async def find_stored(self, unique_id: str):
+        # Message id of the post already holding this file, or None
+        try:
+            found = await self._call(lambda: self.store.find_unique_ids([unique_id]))
+        except DatabaseUnavailable:
+            return None
+        return found.get(unique_id)
+
+    async def search_files(self, query: str, before: int = None, limit: int = 10):
+        return await self._call(lambda: self.store.search_files(query, before, limit))
+
+    def note_served(self, msg_ids):
+        for msg_id in msg_ids:
+            if DEDUP_MERGE_STATS:
+                msg_id = self.duplicates.get(msg_id, msg_id)
+            self.file_hits[msg_id] += 1
+
+
+    # BATCH MANIFESTS
+    # A manifest is never modified after it is written, so cached copies
+    # cannot go stale and only the LRU bound limits the cache.
+    BATCH_ID_CHARS = string.ascii_letters + string.digits
+    BATCH_ID_TRIES = 5
+
+    async def add_batch(self, msg_ids, title=None):
+        # Returns the short id carried in the batch link. The manifest must be
+        # stored before the link is handed out, so this is never spilled:
+        # DatabaseUnavailable reaches the caller instead.
+        doc = {'ids': list(msg_ids), 'title': title, 'created': int(time.time())}
+        for _ in range(self.BATCH_ID_TRIES):
+            batch_id = ''.join(secrets.choice(self.BATCH_ID_CHARS) for _ in range(10))
+            if await self._call(lambda: self.store.add_batch(batch_id, doc)):
+                self._cache_batch(batch_id, doc)
+                return batch_id
+        raise RuntimeError("no free batch id, try again")
+
+    async def get_batch(self, batch_id: str):
+        doc = self.batch_cache.get(batch_id)
+        if doc is not None:
+            self.batch_cache.move_to_end(batch_id)
+            self.batch_hits += 1
+            return doc
+        self.batch_misses += 1
+        doc = await self._call(lambda: self.store.get_batch(batch_id))
+        if doc is not None:
+            self._cache_batch(batch_id, doc)
+        return doc
+
+    def _cache_batch(self, batch_id, doc):
+        self.batch_cache[batch_id] = doc
+        if len(self.batch_cache) > BATCH_CACHE_SIZE:
+            self.batch_cache.popitem(last=False)
+
+
+    # BULK HELPERS
+    async def _insert_many_ids(self, write, cache, ids):
+        ids = [i for i in dict.fromkeys(ids) if i not in cache]
+        if not ids:
+            return []
+        cache.update(ids)
+        await self._write(lambda: write(ids))
+        return ids
+
+    async def _delete_many_ids(self, write, cache, ids=None):
+        if ids is None:
+            removed = len(cache)
+            cache.clear()
+            await self._write(lambda: write(None))
+            return removed
+        ids = [i for i in dict.fromkeys(ids) if i in cache]
+        if not ids:
+            return 0
+        cache.difference_update(ids)
+        await self._write(lambda: write(ids))
+        return len(ids)
+
+
+
+db = Rohit(make_storage())
@@ -0,0 +1,196 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import re
+from database.storage import Storage
+
+
+# Everything in process memory, nothing survives a restart. Meant for
+# benchmarks and local experiments where no database should be involved.
+class MemoryStorage(Storage):
+
+    def __init__(self):
+        self.users = set()
+        self.admins = set()
+        self.bans = set()
+        self.del_timer = None
+        self.checkpoints = {}
+        self.channels = {}
+        self.requests = {}
+        self.stats = {}
+        self.batches = {}
+        self.files = {}
+
+
+    # USER DATA
+    async def present_user(self, user_id: int):
+        return user_id in self.users
+
+    async def add_user(self, user_id: int):
+        if user_id in self.users:
+            return False
+        self.users.add(user_id)
+        return True
+
+    async def del_user(self, user_id: int):
+        if user_id not in self.users:
+            return False
+        self.users.discard(user_id)
+        return True
+
+    async def full_userbase(self):
+        return list(self.users)
+
+    async def count_users(self):
+        return len(self.users)
+
+    async def iter_user_ids(self, batch_size: int = 10000):
+        ids = sorted(self.users)
+        for i in range(0, len(ids), batch_size):
+            yield ids[i:i + batch_size]
+
+
+    # ADMIN / BAN DATA
+    async def get_admins(self):
+        return list(self.admins)
+
+    async def add_admins(self, admin_ids):
+        self.admins.update(admin_ids)
+
+    async def del_admins(self, admin_ids=None):
+        self._remove(self.admins, admin_ids)
+
+    async def get_bans(self):
+        return list(self.bans)
+
+    async def add_bans(self, user_ids):
+        self.bans.update(user_ids)
+
+    async def del_bans(self, user_ids=None):
+        self._remove(self.bans, user_ids)
+
+    def _remove(self, ids, remove=None):
+        if remove is None:
+            ids.clear()
+        else:
+            ids.difference_update(remove)
+
+
+    # AUTO DELETE TIMER SETTINGS
+    async def get_del_timer(self):
+        return self.del_timer
+
+    async def set_del_timer(self, value: int):
+        self.del_timer = value
+
+    async def get_checkpoint(self, name: str):
+        return self.checkpoints.get(name)
+
+    async def set_checkpoint(self, name: str, value: int):
+        self.checkpoints[name] = value
+
+
+    # CHANNEL MANAGEMENT
+    async def get_channels(self):
+        return [{'_id': cid, **doc} for cid, doc in self.channels.items()]
+
+    async def add_channel(self, channel_id: int):
+        self.channels.setdefault(channel_id, {})
+
+    async def rem_channel(self, channel_id: int):
+        self.channels.pop(channel_id, None)
+
+    async def set_channel_mode(self, channel_id: int, mode: str):
+        self.channels.setdefault(channel_id, {})['mode'] = mode
+
+
+    # REQUEST FORCE-SUB MANAGEMENT
+    async def req_user(self, channel_id: int, user_id: int):
+        users = self.requests.setdefault(channel_id, set())
+        if user_id in users:
+            return False
+        users.add(user_id)
+        return True
+
+    async def del_req_user(self, channel_id: int, user_id: int):
+        users = self.requests.get(channel_id)
+        if not users or user_id not in users:
+            return False
+        users.discard(user_id)
+        return True
+
+    async def req_user_exist(self, channel_id: int, user_id: int):
+        return user_id in self.requests.get(channel_id, ())
+
+    async def get_req_users(self, channel_id: int):
+        users = self.requests.get(channel_id)
+        return list(users) if users is not None else None
+
+
+    # FILES INDEX
+    async def add_files(self, docs: list):
+        for doc in docs:
+            old = self.files.get(doc['_id'], {})
+            self.files[doc['_id']] = dict(old, **doc)
+
+    async def find_unique_ids(self, unique_ids: list):
+        wanted = set(unique_ids)
+        return {
+            doc['file_unique_id']: doc['_id'] for doc in sorted(self.files.values(), key=lambda d: -d['_id'])
+            if doc.get('file_unique_id') in wanted and 'dup_of' not in doc
+        }
+
+    async def get_duplicates(self):
+        return {doc['_id']: doc['dup_of'] for doc in self.files.values() if 'dup_of' in doc}
+
+    async def del_file(self, msg_id: int):
+        self.files.pop(msg_id, None)
+
+    async def set_original(self, old: int, new: int):
+        for doc in self.files.values():
+            if doc['_id'] != new and (doc['_id'] == old or doc.get('dup_of') == old):
+                doc['dup_of'] = new
+        if new in self.files:
+            self.files[new].pop('dup_of', None)
+
+    async def search_files(self, query: str, before: int = None, limit: int = 10):
+        words = re.findall(r"\w+", query.lower())
+        found = []
+        for msg_id in sorted(self.files, reverse=True):
+            doc = self.files[msg_id]
+            if (before is not None and msg_id >= before) or 'dup_of' in doc:
+                continue
+            text = f"{doc.get('file_name') or ''} {doc.get('caption') or ''}".lower()
+            text_words = re.findall(r"\w+", text)
+            if words and all(any(w.startswith(word) for w in text_words) for word in words):
+                found.append(dict(doc))
+                if len(found) >= limit:
+                    break
+        return found
+
+    async def inc_file_hits(self, counts: dict):
+        for msg_id, n in counts.items():
+            doc = self.files.setdefault(msg_id, {'_id': msg_id})
+            doc['hits'] = doc.get('hits', 0) + n
+
+
+    # BATCH MANIFESTS
+    async def add_batch(self, batch_id: str, doc: dict):
+        if batch_id in self.batches:
+            return False
+        self.batches[batch_id] = dict(doc, ids=list(doc['ids']))
+        return True
+
+    async def get_batch(self, batch_id: str):
+        doc = self.batches.get(batch_id)
+        return dict(doc, ids=list(doc['ids'])) if doc else None
+
+
+    # STATS
+    async def inc_stats(self, key: str, deltas: dict):
+        counters = self.stats.setdefault(key, {})
+        for name, value in deltas.items():
+            counters[name] = counters.get(name, 0) + value
+
+    async def get_stats(self, keys: list):
+        return {key: dict(self.stats[key]) for key in keys if key in self.stats}
@@ -0,0 +1,310 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import re
+import motor.motor_asyncio
+from pymongo import UpdateOne
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, ExecutionTimeout, OperationFailure, WTimeoutError
+from config import *
+from database.storage import Storage
+
+
+# Indexes created at startup, per collection. create_index is a no-op when the
+# index already exists, so this is safe to run on every boot. Collections that
+# are only ever looked up by _id need nothing beyond the default index.
+INDEXES = {
+    'request_forcesub_channel': [
+        # (channel, user) membership is answered from the index instead of
+        # loading a channel document with a huge user_ids array
+        [('_id', 1), ('user_ids', 1)],
+    ],
+    'files': [
+        # Upload deduplication and the duplicate map loaded at startup
+        [('file_unique_id', 1)],
+        [('dup_of', 1)],
+        # /search and inline queries: anchored prefix regexes on the words array
+        [('words', 1), ('_id', -1)],
+    ],
+}
+# Replaced by the words index; $text matched any word and could not do prefixes
+OLD_INDEXES = {'files': ['file_name_text_caption_text', 'name_lc_1__id_-1']}
+
+
+def search_words(doc):
+    # Lowercased words of the file name and caption, split like MemoryStorage does
+    text = f"{doc.get('file_name') or ''} {doc.get('caption') or ''}".lower()
+    return sorted(set(re.findall(r"\w+", text)))
+
+
+class MongoStorage(Storage):
+
+    TRANSIENT_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+    def __init__(self, DB_URI, DB_NAME):
+        self.db_uri = DB_URI
+        self.db_name = DB_NAME
+        self.dbclient = None
+        self.database = None
+
+    async def connect(self):
+        # Called from Bot.start, so the client is bound to the running loop
+        options = dict(
+            maxPoolSize=DB_MAX_POOL_SIZE,
+            minPoolSize=DB_MIN_POOL_SIZE,
+            maxIdleTimeMS=DB_MAX_IDLE_MS,
+            connectTimeoutMS=DB_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=DB_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=DB_SOCKET_TIMEOUT_MS,
+            w=int(DB_WRITE_CONCERN) if DB_WRITE_CONCERN.isdigit() else DB_WRITE_CONCERN,
+            retryWrites=True,
+            appname="FileStore",
+        )
+        if DB_COMPRESSORS:
+            options['compressors'] = DB_COMPRESSORS
+        if DB_WRITE_JOURNAL:
+            options['journal'] = True
+        if DB_PROFILE:
+            from database.profiler import profiler
+            options['event_listeners'] = [profiler]
+        self.dbclient = motor.motor_asyncio.AsyncIOMotorClient(self.db_uri, **options)
+        self.database = self.dbclient[self.db_name]
+
+        self.admins_data = self.database['admins']
+        self.user_data = self.database['users']
+        self.banned_user_data = self.database['banned_user']
+        self.del_timer_data = self.database['del_timer']
+        self.checkpoint_data = self.database['checkpoints']
+        self.fsub_data = self.database['fsub']
+        self.rqst_fsub_Channel_data = self.database['request_forcesub_channel']
+        self.stats_data = self.database['stats']
+        self.batch_data = self.database['batches']
+        self.file_data = self.database['files']
+
+    def close(self):
+        if self.dbclient is not None:
+            self.dbclient.close()
+            self.dbclient = None
+            self.database = None
+
+    async def ensure_indexes(self):
+        await asyncio.gather(*[
+            self.database[name].create_index(keys)
+            for name, specs in INDEXES.items()
+            for keys in specs
+        ])
+        for name, indexes in OLD_INDEXES.items():
+            for index in indexes:
+                try:
+                    await self.database[name].drop_index(index)
+                except OperationFailure:
+                    pass  # already dropped
+        await self.add_search_words()
+
+    async def add_search_words(self, batch_size: int = 1000):
+        # Files indexed before the words field existed
+        ops = []
+        async for doc in self.file_data.find({'words': {'$exists': False}}, {'file_name': 1, 'caption': 1}):
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'words': search_words(doc)}}))
+            if len(ops) >= batch_size:
+                await self.file_data.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await self.file_data.bulk_write(ops, ordered=False)
+
+
+    # USER DATA
+    async def present_user(self, user_id: int):
+        return await self.user_data.count_documents({'_id': user_id}, limit=1) > 0
+
+    async def add_user(self, user_id: int):
+        result = await self.user_data.update_one(
+            {'_id': user_id}, {'$setOnInsert': {'_id': user_id}}, upsert=True
+        )
+        return result.upserted_id is not None
+
+    async def del_user(self, user_id: int):
+        result = await self.user_data.delete_one({'_id': user_id})
+        return result.deleted_count > 0
+
+    async def full_userbase(self):
+        user_docs = await self.user_data.find({}, {'_id': 1}).to_list(length=None)
+        return [doc['_id'] for doc in user_docs]
+
+    async def count_users(self):
+        # Collection metadata, no scan
+        return await self.user_data.estimated_document_count()
+
+    async def iter_user_ids(self, batch_size: int = 10000):
+        # Walks the _id index, so ids arrive sorted and nothing is sorted in memory
+        cursor = self.user_data.find({}, {'_id': 1}).sort('_id', 1).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc['_id'])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+    # ADMIN / BAN DATA
+    async def get_admins(self):
+        return await self.admins_data.distinct('_id')
+
+    async def add_admins(self, admin_ids):
+        await self._insert_many_ids(self.admins_data, admin_ids)
+
+    async def del_admins(self, admin_ids=None):
+        await self._delete_many_ids(self.admins_data, admin_ids)
+
+    async def get_bans(self):
+        return await self.banned_user_data.distinct('_id')
+
+    async def add_bans(self, user_ids):
+        await self._insert_many_ids(self.banned_user_data, user_ids)
+
+    async def del_bans(self, user_ids=None):
+        await self._delete_many_ids(self.banned_user_data, user_ids)
+
+    async def _insert_many_ids(self, collection, ids):
+        await collection.bulk_write(
+            [UpdateOne({'_id': i}, {'$setOnInsert': {'_id': i}}, upsert=True) for i in ids],
+            ordered=False
+        )
+
+    async def _delete_many_ids(self, collection, ids=None):
+        await collection.delete_many({} if ids is None else {'_id': {'$in': list(ids)}})
+
+
+    # AUTO DELETE TIMER SETTINGS
+    async def get_del_timer(self):
+        data = await self.del_timer_data.find_one({}, {'value': 1})
+        return data.get('value', 600) if data else None
+
+    async def set_del_timer(self, value: int):
+        await self.del_timer_data.update_one({}, {'$set': {'value': value}}, upsert=True)
+
+    async def get_checkpoint(self, name: str):
+        data = await self.checkpoint_data.find_one({'_id': name})
+        return data['value'] if data else None
+
+    async def set_checkpoint(self, name: str, value: int):
+        await self.checkpoint_data.update_one({'_id': name}, {'$set': {'value': value}}, upsert=True)
+
+
+    # CHANNEL MANAGEMENT
+    async def get_channels(self):
+        return await self.fsub_data.find().to_list(length=None)
+
+    async def add_channel(self, channel_id: int):
+        await self.fsub_data.update_one(
+            {'_id': channel_id}, {'$setOnInsert': {'_id': channel_id}}, upsert=True
+        )
+
+    async def rem_channel(self, channel_id: int):
+        await self.fsub_data.delete_one({'_id': channel_id})
+
+    async def set_channel_mode(self, channel_id: int, mode: str):
+        await self.fsub_data.update_one({'_id': channel_id}, {'$set': {'mode': mode}}, upsert=True)
+
+
+    # REQUEST FORCE-SUB MANAGEMENT
+    async def req_user(self, channel_id: int, user_id: int):
+        result = await self.rqst_fsub_Channel_data.update_one(
+            {'_id': channel_id}, {'$addToSet': {'user_ids': user_id}}, upsert=True
+        )
+        return bool(result.modified_count or result.upserted_id is not None)
+
+    async def del_req_user(self, channel_id: int, user_id: int):
+        result = await self.rqst_fsub_Channel_data.update_one(
+            {'_id': channel_id}, {'$pull': {'user_ids': user_id}}
+        )
+        return result.modified_count > 0
+
+    async def req_user_exist(self, channel_id: int, user_id: int):
+        count = await self.rqst_fsub_Channel_data.count_documents(
+            {'_id': channel_id, 'user_ids': user_id}, limit=1
+        )
+        return count > 0
+
+    async def get_req_users(self, channel_id: int):
+        data = await self.rqst_fsub_Channel_data.find_one({'_id': channel_id})
+        return data.get('user_ids', []) if data else None
+
+
+    # FILES INDEX
+    async def add_files(self, docs: list):
+        # $set instead of a replace so hit counters survive re-indexing
+        await self.file_data.bulk_write([
+            UpdateOne(
+                {'_id': doc['_id']},
+                {'$set': {**{k: v for k, v in doc.items() if k != '_id'}, 'words': search_words(doc)}},
+                upsert=True
+            )
+            for doc in docs
+        ], ordered=False)
+
+    async def find_unique_ids(self, unique_ids: list):
+        cursor = self.file_data.find(
+            {'file_unique_id': {'$in': list(unique_ids)}, 'dup_of': {'$exists': False}},
+            {'file_unique_id': 1}
+        ).sort('_id', -1)  # the lowest id is kept
+        return {doc['file_unique_id']: doc['_id'] async for doc in cursor}
+
+    async def del_file(self, msg_id: int):
+        await self.file_data.delete_one({'_id': msg_id})
+
+    async def set_original(self, old: int, new: int):
+        await self.file_data.update_many(
+            {'$or': [{'_id': old}, {'dup_of': old}], '_id': {'$ne': new}}, {'$set': {'dup_of': new}}
+        )
+        await self.file_data.update_one({'_id': new}, {'$unset': {'dup_of': ""}})
+
+    async def get_duplicates(self):
+        cursor = self.file_data.find({'dup_of': {'$exists': True}}, {'dup_of': 1})
+        return {doc['_id']: doc['dup_of'] async for doc in cursor}
+
+    async def search_files(self, query: str, before: int = None, limit: int = 10):
+        # Every query word must be a prefix of a stored word; anchored
+        # regexes are index range scans and _id keeps the paging order
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        spec = {
+            '$and': [{'words': {'$regex': '^' + re.escape(word)}} for word in words],
+            'dup_of': {'$exists': False},
+        }
+        if before is not None:
+            spec['_id'] = {'$lt': before}
+        cursor = self.file_data.find(
+            spec, {'file_name': 1, 'file_size': 1, 'mime_type': 1, 'caption': 1, 'media': 1}
+        ).sort('_id', -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def inc_file_hits(self, counts: dict):
+        await self.file_data.bulk_write(
+            [UpdateOne({'_id': msg_id}, {'$inc': {'hits': n}}, upsert=True) for msg_id, n in counts.items()],
+            ordered=False
+        )
+
+
+    # BATCH MANIFESTS
+    async def add_batch(self, batch_id: str, doc: dict):
+        try:
+            await self.batch_data.insert_one({'_id': batch_id, **doc})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def get_batch(self, batch_id: str):
+        return await self.batch_data.find_one({'_id': batch_id}, {'_id': 0})
+
+
+    # STATS
+    async def inc_stats(self, key: str, deltas: dict):
+        await self.stats_data.update_one({'_id': key}, {'$inc': deltas}, upsert=True)
+
+    async def get_stats(self, keys: list):
+        docs = await self.stats_data.find({'_id': {'$in': list(keys)}}).to_list(length=None)
+        return {doc.pop('_id'): doc for doc in docs}
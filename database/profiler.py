@@ -0,0 +1,178 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from pymongo import monitoring
+from config import *
+import metrics
+
+
+MONGO_SECONDS = metrics.Histogram(
+    'filestore_mongo_command_seconds', "MongoDB command latency by collection and command.", ['collection', 'command']
+)
+MONGO_DOCS = metrics.Counter(
+    'filestore_mongo_documents_returned_total', "Documents returned by MongoDB reads.", ['collection', 'command']
+)
+MONGO_FAILURES = metrics.Counter(
+    'filestore_mongo_command_failures_total', "MongoDB commands that failed.", ['collection', 'command']
+)
+MONGO_POOL_WAIT = metrics.Histogram(
+    'filestore_mongo_pool_wait_seconds', "Time spent waiting for a pooled connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+
+# Handshakes and session bookkeeping say nothing about our queries
+IGNORED = {'hello', 'ismaster', 'isMaster', 'ping', 'buildInfo', 'saslStart', 'saslContinue', 'endSessions', 'killCursors'}
+READS = {'find': 'firstBatch', 'aggregate': 'firstBatch', 'getMore': 'nextBatch'}
+
+
+def shape(value, depth=0):
+    """Query filter with the values replaced by their type, so equal queries group together."""
+    if depth > 4:
+        return "..."
+    if isinstance(value, dict):
+        return {key: shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [shape(value[0], depth + 1)] if value else []
+    return type(value).__name__
+
+
+def filter_of(name, command):
+    if name in ('find', 'count', 'distinct'):
+        return command.get('filter', command.get('query', {}))
+    if name == 'aggregate':
+        pipeline = command.get('pipeline') or [{}]
+        return pipeline[0].get('$match', pipeline[0])
+    if name in ('update', 'delete'):
+        ops = command.get(name + 's') or [{}]
+        return ops[0].get('q', {})
+    if name == 'findAndModify':
+        return command.get('query', {})
+    return {}
+
+
+# Aggregates MongoDB commands by collection, command and filter shape.
+#
+# pymongo calls the listener from the threads motor runs it in, so all state
+# is guarded by one lock and copied into the metrics registry when /metrics
+# is scraped.
+class QueryProfiler(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+
+    MAX_SHAPES = 500
+    MAX_INFLIGHT = 10000
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.inflight = {}  # (connection, request id) -> (collection, command, shape)
+        self.latency = {}   # (collection, command) -> [bucket counts, sum, count]
+        self.docs = {}
+        self.failures = {}
+        self.shapes = {}    # (collection, command, shape) -> [calls, seconds, max seconds, docs]
+        self.pool_wait = [[0] * (len(MONGO_POOL_WAIT.buckets) + 1), 0.0, 0]
+        self.started_at = time.time()
+        self.LOGGER = LOGGER(__name__)
+
+    # COMMANDS
+    def started(self, event):
+        name = event.command_name
+        if name in IGNORED:
+            return
+        command = event.command
+        collection = command.get(name) if isinstance(command.get(name), str) else command.get('collection', "")
+        key = (event.connection_id, event.request_id)
+        query = json.dumps(shape(filter_of(name, command)), sort_keys=True)
+        with self.lock:
+            if len(self.inflight) < self.MAX_INFLIGHT:
+                self.inflight[key] = (collection, name, query)
+
+    def succeeded(self, event):
+        with self.lock:
+            info = self.inflight.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return
+        seconds = event.duration_micros / 1e6
+        docs = 0
+        batch = READS.get(event.command_name)
+        if batch:
+            docs = len((event.reply.get('cursor') or {}).get(batch, ()))
+        elif event.command_name == 'count':
+            docs = event.reply.get('n', 0)
+        self._record(info, seconds, docs)
+
+    def failed(self, event):
+        with self.lock:
+            info = self.inflight.pop((event.connection_id, event.request_id), None)
+            if info is not None:
+                self.failures[info[:2]] = self.failures.get(info[:2], 0) + 1
+        if info is not None:
+            self._record(info, event.duration_micros / 1e6, 0)
+
+    def _record(self, info, seconds, docs):
+        collection, command, query = info
+        with self.lock:
+            series = self.latency.get((collection, command))
+            if series is None:
+                series = self.latency[(collection, command)] = [[0] * (len(MONGO_SECONDS.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(MONGO_SECONDS.buckets, seconds)] += 1
+            series[1] += seconds
+            series[2] += 1
+            if docs:
+                self.docs[(collection, command)] = self.docs.get((collection, command), 0) + docs
+
+            entry = self.shapes.get(info)
+            if entry is None and len(self.shapes) < self.MAX_SHAPES:
+                entry = self.shapes[info] = [0, 0.0, 0.0, 0]
+            if entry is not None:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+                entry[3] += docs
+
+        if seconds * 1000 >= self.slow_ms:
+            ms = round(seconds * 1000, 1)
+            self.LOGGER.warning(f"Slow query {collection}.{command}: {ms}ms", extra={'data': {
+                'collection': collection, 'command': command, 'ms': ms, 'filter': query, 'docs': docs
+            }})
+
+    # CONNECTION POOL
+    def connection_checked_out(self, event):
+        seconds = getattr(event, 'duration', None)  # pymongo 4.7+
+        if seconds is None:
+            return
+        with self.lock:
+            self.pool_wait[0][bisect_left(MONGO_POOL_WAIT.buckets, seconds)] += 1
+            self.pool_wait[1] += seconds
+            self.pool_wait[2] += 1
+
+    # Pool events this profiler does not need
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+    def top(self, limit: int = 10):
+        """Costliest query shapes since startup as (collection, command, shape, calls, seconds, max, docs)."""
+        with self.lock:
+            rows = [key + tuple(entry) for key, entry in self.shapes.items()]
+        return sorted(rows, key=lambda row: -row[4])[:limit]
+
+    def export(self):
+        with self.lock:
+            MONGO_SECONDS.values = {key: [list(s[0]), s[1], s[2]] for key, s in self.latency.items()}
+            MONGO_DOCS.values = dict(self.docs)
+            MONGO_FAILURES.values = dict(self.failures)
+            MONGO_POOL_WAIT.values = {(): [list(self.pool_wait[0]), self.pool_wait[1], self.pool_wait[2]]}
+
+
+profiler = QueryProfiler(DB_SLOW_QUERY_MS)
+metrics.collector(profiler.export)
@@ -0,0 +1,381 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import json
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from database.storage import Storage
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS admins (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS banned_users (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fsub_channels (id INTEGER PRIMARY KEY, mode TEXT NOT NULL DEFAULT 'off');
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    media TEXT,
+    file_unique_id TEXT,
+    file_name TEXT,
+    name_lc TEXT,
+    file_size INTEGER,
+    mime_type TEXT,
+    caption TEXT NOT NULL DEFAULT '',
+    date INTEGER NOT NULL DEFAULT 0,
+    dup_of INTEGER,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_unique_id ON files (file_unique_id);
+CREATE INDEX IF NOT EXISTS files_dup_of ON files (dup_of) WHERE dup_of IS NOT NULL;
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(file_name, caption, content='files', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts (rowid, file_name, caption) VALUES (new.id, new.file_name, new.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, file_name, caption) VALUES ('delete', old.id, old.file_name, old.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE OF file_name, caption ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, file_name, caption) VALUES ('delete', old.id, old.file_name, old.caption);
+    INSERT INTO files_fts (rowid, file_name, caption) VALUES (new.id, new.file_name, new.caption);
+END;
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    ids TEXT NOT NULL,
+    title TEXT,
+    created INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fsub_requests (
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fsub_request_channels (id INTEGER PRIMARY KEY);
+INSERT OR IGNORE INTO fsub_request_channels (id) SELECT DISTINCT channel_id FROM fsub_requests;
+"""
+
+
+class SQLiteBusy(Exception):
+    """The database is locked by another connection; worth retrying later."""
+
+
+def is_busy(error):
+    # SQLITE_BUSY / SQLITE_LOCKED, including their extended codes (3.11+ only
+    # has sqlite_errorcode, older versions only the message)
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (5, 6)
+    message = str(error)
+    return "is locked" in message or "is busy" in message
+
+
+# Embedded single-file storage for single-node bots. All statements are fixed
+# strings, so sqlite3's statement cache keeps them prepared; every call runs on
+# one dedicated thread that owns the connection, which keeps the event loop
+# free while SQLite syncs to disk.
+class SQLiteStorage(Storage):
+
+    # Only lock contention; other OperationalErrors (no such table, FTS5
+    # syntax, ...) are real errors and must not trip the breaker
+    TRANSIENT_ERRORS = (SQLiteBusy,)
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    async def _run(self, fn, *args):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except sqlite3.OperationalError as e:
+            if is_busy(e):
+                raise SQLiteBusy(str(e)) from e
+            raise
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        return conn
+
+    async def connect(self):
+        self.conn = await self._run(self._open)
+
+    def close(self):
+        if self.conn is not None:
+            self._executor.submit(self.conn.close).result()
+            self.conn = None
+
+    def _one(self, sql, args=()):
+        return self.conn.execute(sql, args).fetchone()
+
+    def _all(self, sql, args=()):
+        return self.conn.execute(sql, args).fetchall()
+
+    def _column(self, sql, args=()):
+        return [row[0] for row in self.conn.execute(sql, args)]
+
+    def _change(self, sql, args=()):
+        with self.conn:
+            return self.conn.execute(sql, args).rowcount
+
+    def _change_many(self, sql, rows):
+        with self.conn:
+            self.conn.executemany(sql, rows)
+
+
+    # USER DATA
+    async def present_user(self, user_id: int):
+        return await self._run(self._one, "SELECT 1 FROM users WHERE id = ?", (user_id,)) is not None
+
+    async def add_user(self, user_id: int):
+        return await self._run(self._change, "INSERT OR IGNORE INTO users (id) VALUES (?)", (user_id,)) > 0
+
+    async def del_user(self, user_id: int):
+        return await self._run(self._change, "DELETE FROM users WHERE id = ?", (user_id,)) > 0
+
+    async def full_userbase(self):
+        return await self._run(self._column, "SELECT id FROM users")
+
+    async def count_users(self):
+        row = await self._run(self._one, "SELECT count(*) FROM users")
+        return row[0]
+
+    async def iter_user_ids(self, batch_size: int = 10000):
+        last = None
+        while True:
+            if last is None:
+                batch = await self._run(self._column, "SELECT id FROM users ORDER BY id LIMIT ?", (batch_size,))
+            else:
+                batch = await self._run(
+                    self._column, "SELECT id FROM users WHERE id > ? ORDER BY id LIMIT ?", (last, batch_size)
+                )
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]
+
+
+    # ADMIN / BAN DATA
+    async def get_admins(self):
+        return await self._run(self._column, "SELECT id FROM admins")
+
+    async def add_admins(self, admin_ids):
+        await self._run(self._change_many, "INSERT OR IGNORE INTO admins (id) VALUES (?)", [(i,) for i in admin_ids])
+
+    async def del_admins(self, admin_ids=None):
+        if admin_ids is None:
+            await self._run(self._change, "DELETE FROM admins")
+        else:
+            await self._run(self._change_many, "DELETE FROM admins WHERE id = ?", [(i,) for i in admin_ids])
+
+    async def get_bans(self):
+        return await self._run(self._column, "SELECT id FROM banned_users")
+
+    async def add_bans(self, user_ids):
+        await self._run(self._change_many, "INSERT OR IGNORE INTO banned_users (id) VALUES (?)", [(i,) for i in user_ids])
+
+    async def del_bans(self, user_ids=None):
+        if user_ids is None:
+            await self._run(self._change, "DELETE FROM banned_users")
+        else:
+            await self._run(self._change_many, "DELETE FROM banned_users WHERE id = ?", [(i,) for i in user_ids])
+
+
+    # AUTO DELETE TIMER SETTINGS
+    async def get_del_timer(self):
+        row = await self._run(self._one, "SELECT value FROM settings WHERE key = 'del_timer'")
+        return row[0] if row else None
+
+    async def set_del_timer(self, value: int):
+        await self._run(
+            self._change,
+            "INSERT INTO settings (key, value) VALUES ('del_timer', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (value,)
+        )
+
+    async def get_checkpoint(self, name: str):
+        row = await self._run(self._one, "SELECT value FROM settings WHERE key = ?", (f"checkpoint:{name}",))
+        return row[0] if row else None
+
+    async def set_checkpoint(self, name: str, value: int):
+        await self._run(
+            self._change,
+            "INSERT INTO settings (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (f"checkpoint:{name}", value)
+        )
+
+
+    # CHANNEL MANAGEMENT
+    def _channels(self):
+        return [{'_id': cid, 'mode': mode} for cid, mode in self.conn.execute("SELECT id, mode FROM fsub_channels")]
+
+    async def get_channels(self):
+        return await self._run(self._channels)
+
+    async def add_channel(self, channel_id: int):
+        await self._run(self._change, "INSERT OR IGNORE INTO fsub_channels (id) VALUES (?)", (channel_id,))
+
+    async def rem_channel(self, channel_id: int):
+        await self._run(self._change, "DELETE FROM fsub_channels WHERE id = ?", (channel_id,))
+
+    async def set_channel_mode(self, channel_id: int, mode: str):
+        await self._run(
+            self._change,
+            "INSERT INTO fsub_channels (id, mode) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET mode = excluded.mode",
+            (channel_id, mode)
+        )
+
+
+    # REQUEST FORCE-SUB MANAGEMENT
+    # A channel keeps its fsub_request_channels row once a request was stored,
+    # so an emptied request list is [] and not an unknown channel
+    def _req_user(self, channel_id, user_id):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO fsub_request_channels (id) VALUES (?)", (channel_id,))
+            return self.conn.execute(
+                "INSERT OR IGNORE INTO fsub_requests (channel_id, user_id) VALUES (?, ?)", (channel_id, user_id)
+            ).rowcount
+
+    def _req_users(self, channel_id):
+        if self._one("SELECT 1 FROM fsub_request_channels WHERE id = ?", (channel_id,)) is None:
+            return None
+        return self._column("SELECT user_id FROM fsub_requests WHERE channel_id = ?", (channel_id,))
+
+    async def req_user(self, channel_id: int, user_id: int):
+        return await self._run(self._req_user, channel_id, user_id) > 0
+
+    async def del_req_user(self, channel_id: int, user_id: int):
+        return await self._run(
+            self._change,
+            "DELETE FROM fsub_requests WHERE channel_id = ? AND user_id = ?",
+            (channel_id, user_id)
+        ) > 0
+
+    async def req_user_exist(self, channel_id: int, user_id: int):
+        row = await self._run(
+            self._one,
+            "SELECT 1 FROM fsub_requests WHERE channel_id = ? AND user_id = ?",
+            (channel_id, user_id)
+        )
+        return row is not None
+
+    async def get_req_users(self, channel_id: int):
+        return await self._run(self._req_users, channel_id)
+
+
+    # FILES INDEX
+    FILE_COLUMNS = ('_id', 'media', 'file_unique_id', 'file_name', 'name_lc', 'file_size', 'mime_type', 'caption', 'date', 'dup_of')
+
+    async def add_files(self, docs: list):
+        await self._run(
+            self._change_many,
+            "INSERT INTO files (id, media, file_unique_id, file_name, name_lc, file_size, mime_type, caption, date, dup_of) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET media = excluded.media, file_unique_id = excluded.file_unique_id, "
+            "file_name = excluded.file_name, name_lc = excluded.name_lc, file_size = excluded.file_size, "
+            "mime_type = excluded.mime_type, "
+            "caption = excluded.caption, date = excluded.date, dup_of = COALESCE(excluded.dup_of, files.dup_of)",
+            [tuple(doc.get(col) for col in self.FILE_COLUMNS) for doc in docs]
+        )
+
+    def _unique_ids(self, unique_ids):
+        marks = ",".join("?" * len(unique_ids))
+        rows = self.conn.execute(
+            f"SELECT file_unique_id, id FROM files WHERE file_unique_id IN ({marks}) AND dup_of IS NULL "
+            "ORDER BY id DESC",  # the lowest id is kept
+            unique_ids
+        )
+        return dict(rows.fetchall())
+
+    def _set_original(self, old, new):
+        with self.conn:
+            self.conn.execute("UPDATE files SET dup_of = ? WHERE (id = ? OR dup_of = ?) AND id != ?", (new, old, old, new))
+            self.conn.execute("UPDATE files SET dup_of = NULL WHERE id = ?", (new,))
+
+    async def find_unique_ids(self, unique_ids: list):
+        return await self._run(self._unique_ids, list(unique_ids))
+
+    async def get_duplicates(self):
+        rows = await self._run(self._all, "SELECT id, dup_of FROM files WHERE dup_of IS NOT NULL")
+        return dict(rows)
+
+    async def del_file(self, msg_id: int):
+        await self._run(self._change, "DELETE FROM files WHERE id = ?", (msg_id,))
+
+    async def set_original(self, old: int, new: int):
+        await self._run(self._set_original, old, new)
+
+    def _search(self, match, before, limit):
+        rows = self.conn.execute(
+            "SELECT f.id, f.file_name, f.file_size, f.mime_type, f.caption, f.media "
+            "FROM files_fts JOIN files f ON f.id = files_fts.rowid "
+            "WHERE files_fts MATCH ? AND f.dup_of IS NULL AND f.id < ? ORDER BY f.id DESC LIMIT ?",
+            (match, before, limit)
+        )
+        keys = ('_id', 'file_name', 'file_size', 'mime_type', 'caption', 'media')
+        return [dict(zip(keys, row)) for row in rows]
+
+    async def search_files(self, query: str, before: int = None, limit: int = 10):
+        # Every word as a quoted FTS5 prefix term, so user input is never parsed as syntax
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        match = " ".join(f'"{word}"*' for word in words)
+        return await self._run(self._search, match, before if before is not None else 2**62, limit)
+
+    async def inc_file_hits(self, counts: dict):
+        await self._run(
+            self._change_many,
+            "INSERT INTO files (id, hits) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET hits = hits + excluded.hits",
+            list(counts.items())
+        )
+
+
+    # BATCH MANIFESTS
+    async def add_batch(self, batch_id: str, doc: dict):
+        return await self._run(
+            self._change,
+            "INSERT OR IGNORE INTO batches (id, ids, title, created) VALUES (?, ?, ?, ?)",
+            (batch_id, json.dumps(doc['ids']), doc.get('title'), doc['created'])
+        ) > 0
+
+    async def get_batch(self, batch_id: str):
+        row = await self._run(self._one, "SELECT ids, title, created FROM batches WHERE id = ?", (batch_id,))
+        if row is None:
+            return None
+        return {'ids': json.loads(row[0]), 'title': row[1], 'created': row[2]}
+
+
+    # STATS
+    async def inc_stats(self, key: str, deltas: dict):
+        await self._run(
+            self._change_many,
+            "INSERT INTO stats (key, name, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(key, name) DO UPDATE SET value = value + excluded.value",
+            [(key, name, value) for name, value in deltas.items()]
+        )
+
+    def _stats(self, keys):
+        marks = ",".join("?" * len(keys))
+        docs = {}
+        for key, name, value in self.conn.execute(f"SELECT key, name, value FROM stats WHERE key IN ({marks})", keys):
+            docs.setdefault(key, {})[name] = value
+        return docs
+
+    async def get_stats(self, keys: list):
+        return await self._run(self._stats, list(keys))
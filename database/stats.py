@@ -0,0 +1,58 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+
+def day_key(when=None):
+    return (when or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+# In-memory activity counters. Every increment lands in the all-time totals,
+# in today's rollup and in a pending delta that Rohit.flush_stats persists with
+# one $inc per key, so /stats never scans a collection.
+class Stats:
+
+    FIELDS = ('new_users', 'bans', 'deliveries', 'files_served', 'broadcasts', 'join_requests')
+
+    def __init__(self, keep_days: int = 7):
+        self.keep_days = keep_days
+        self.totals = Counter()
+        self.days = {}
+        self.pending = {}
+
+    def recent_keys(self):
+        today = datetime.now(timezone.utc)
+        return [day_key(today - timedelta(days=i)) for i in range(self.keep_days)]
+
+    def load(self, docs):
+        # docs: {'total': {...}, 'YYYY-MM-DD': {...}} as stored by the backend
+        self.totals = Counter(docs.get('total', {})) + self.totals
+        for key in self.recent_keys():
+            if key in docs:
+                self.days[key] = Counter(docs[key]) + self.days.get(key, Counter())
+
+    def incr(self, name: str, amount: int = 1):
+        if not amount:
+            return
+        key = day_key()
+        if key not in self.days:
+            self.days[key] = Counter()
+            for old in sorted(self.days)[:-self.keep_days]:
+                del self.days[old]
+        self.totals[name] += amount
+        self.days[key][name] += amount
+        for bucket in ('total', key):
+            self.pending.setdefault(bucket, Counter())[name] += amount
+
+    def take_pending(self):
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def today(self):
+        return self.days.get(day_key(), Counter())
+
+    def trend(self, name: str):
+        # Oldest first, one value per kept day
+        return [self.days.get(key, Counter())[name] for key in reversed(self.recent_keys())]
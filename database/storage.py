@@ -0,0 +1,161 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+
+# Raw storage operations used by database.Rohit. Rohit owns caching, the
+# circuit breaker and the write spill buffer; a backend only has to answer
+# these calls. Every method is a coroutine, ids are Telegram integer ids.
+class Storage:
+
+    # Exceptions meaning "storage is not answering right now". They trip the
+    # circuit breaker; anything else is treated as a real error.
+    TRANSIENT_ERRORS = ()
+
+    async def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def ensure_indexes(self):
+        pass
+
+    # USERS
+    async def present_user(self, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def add_user(self, user_id: int) -> bool:
+        # True when the user was not stored before
+        raise NotImplementedError
+
+    async def del_user(self, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def full_userbase(self) -> list:
+        raise NotImplementedError
+
+    async def count_users(self) -> int:
+        raise NotImplementedError
+
+    async def iter_user_ids(self, batch_size: int = 10000):
+        # Async generator of id lists in ascending order, for streaming loads
+        raise NotImplementedError
+        yield
+
+    # ADMINS
+    async def get_admins(self) -> list:
+        raise NotImplementedError
+
+    async def add_admins(self, admin_ids: list):
+        raise NotImplementedError
+
+    async def del_admins(self, admin_ids: list = None):
+        # Remove the given ids, or every admin when admin_ids is None
+        raise NotImplementedError
+
+    # BANS
+    async def get_bans(self) -> list:
+        raise NotImplementedError
+
+    async def add_bans(self, user_ids: list):
+        raise NotImplementedError
+
+    async def del_bans(self, user_ids: list = None):
+        raise NotImplementedError
+
+    # SETTINGS
+    async def get_del_timer(self):
+        # Stored value, or None when it was never set
+        raise NotImplementedError
+
+    async def set_del_timer(self, value: int):
+        raise NotImplementedError
+
+    async def get_checkpoint(self, name: str):
+        # Progress saved by a background job, or None when it never ran
+        raise NotImplementedError
+
+    async def set_checkpoint(self, name: str, value: int):
+        raise NotImplementedError
+
+    # FORCE-SUB CHANNELS
+    async def get_channels(self) -> list:
+        # One dict per channel: {'_id': channel_id, 'mode': 'on' | 'off', ...}
+        raise NotImplementedError
+
+    async def add_channel(self, channel_id: int):
+        raise NotImplementedError
+
+    async def rem_channel(self, channel_id: int):
+        raise NotImplementedError
+
+    async def set_channel_mode(self, channel_id: int, mode: str):
+        raise NotImplementedError
+
+    # JOIN REQUESTS
+    async def req_user(self, channel_id: int, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def del_req_user(self, channel_id: int, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def req_user_exist(self, channel_id: int, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def get_req_users(self, channel_id: int):
+        # List of user ids, or None when nothing was ever stored for the channel
+        raise NotImplementedError
+
+    # FILES INDEX
+    async def add_files(self, docs: list):
+        # Upsert file metadata keyed by DB channel message id ('_id'), see
+        # ingest.file_meta; a 'dup_of' key marks a re-upload of another post.
+        # Existing hit counts are kept.
+        raise NotImplementedError
+
+    async def find_unique_ids(self, unique_ids: list) -> dict:
+        # {file_unique_id: message id} of the original (non-duplicate) posts,
+        # the lowest id when there are several
+        raise NotImplementedError
+
+    async def del_file(self, msg_id: int):
+        # Forget a post that is gone from the DB channel
+        raise NotImplementedError
+
+    async def set_original(self, old: int, new: int):
+        # Make `new` the original: `old` and the posts marked as duplicates of
+        # it become duplicates of `new`, and `new` is no longer a duplicate
+        raise NotImplementedError
+
+    async def get_duplicates(self) -> dict:
+        # {message id: original message id} for every post marked as a duplicate
+        raise NotImplementedError
+
+    async def inc_file_hits(self, counts: dict):
+        # Add delivery counts, {message id: n}
+        raise NotImplementedError
+
+    async def search_files(self, query: str, before: int = None, limit: int = 10) -> list:
+        # Original posts whose file name or caption match every word of the
+        # query (words may be prefixes), newest first and with ids below
+        # `before`, so the last id of a page is the cursor of the next one
+        raise NotImplementedError
+
+    # BATCH MANIFESTS
+    async def add_batch(self, batch_id: str, doc: dict) -> bool:
+        # doc: {'ids': [message ids in delivery order], 'title': str | None, 'created': unix time}
+        # False when batch_id is already taken; an existing manifest is never replaced
+        raise NotImplementedError
+
+    async def get_batch(self, batch_id: str):
+        # The stored doc, or None for an unknown id
+        raise NotImplementedError
+
+    # STATS
+    async def inc_stats(self, key: str, deltas: dict):
+        # Add deltas to the counters stored under key ('total' or a YYYY-MM-DD day)
+        raise NotImplementedError
+
+    async def get_stats(self, keys: list) -> dict:
+        # {key: {counter: value}} for the keys that exist
+        raise NotImplementedError
@@ -0,0 +1,126 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+from array import array
+from bisect import bisect_left
+
+
+# Exact membership set for every known user id, 8 bytes per id.
+#
+# The bulk of the ids sits in a sorted array('q') searched with bisect. New ids
+# go to a small `pending` set and deletions to a `removed` set; once either
+# grows past MERGE_AT they are folded into the array with slice copies, which
+# is a handful of memcpy calls instead of rebuilding millions of ints.
+class KnownUsers:
+
+    MERGE_AT = 10000
+
+    def __init__(self):
+        self.ids = array('q')
+        self.pending = set()
+        self.removed = set()
+        self.ready = False
+
+    def __len__(self):
+        return len(self.ids) - len(self.removed) + len(self.pending)
+
+    def __contains__(self, user_id: int):
+        if user_id in self.pending:
+            return True
+        if user_id in self.removed:
+            return False
+        return self._in_array(user_id)
+
+    def _in_array(self, user_id: int):
+        i = bisect_left(self.ids, user_id)
+        return i < len(self.ids) and self.ids[i] == user_id
+
+    def add(self, user_id: int):
+        if user_id in self.removed:
+            self.removed.discard(user_id)
+            if self.ready:
+                return  # still in the array, just no longer hidden
+        if user_id in self.pending or self._in_array(user_id):
+            return
+        self.pending.add(user_id)
+        if self.ready and len(self.pending) >= self.MERGE_AT:
+            self.merge()
+
+    def discard(self, user_id: int):
+        self.pending.discard(user_id)
+        # While loading, the id may still arrive from the stream
+        if not self.ready or self._in_array(user_id):
+            self.removed.add(user_id)
+            if self.ready and len(self.removed) >= self.MERGE_AT:
+                self.merge()
+
+    def merge(self):
+        ids = self.ids
+        events = sorted(
+            [(bisect_left(ids, uid), 0, uid) for uid in self.pending] +
+            [(bisect_left(ids, uid), 1, uid) for uid in self.removed]
+        )
+        merged = array('q')
+        prev = 0
+        for pos, kind, uid in events:
+            merged.extend(ids[prev:pos])
+            prev = pos
+            if kind == 0:
+                merged.append(uid)
+            else:
+                prev = pos + 1
+        merged.extend(ids[prev:])
+        self.ids = merged
+        self.pending = set()
+        self.removed = set()
+
+    async def load(self, batches):
+        # `batches` yields lists of ids in ascending order (index order in the
+        # backends), so they can be appended without sorting millions of ints
+        ids = array('q')
+        ordered = True
+        async for batch in batches:
+            if ordered and batch and ids and batch[0] <= ids[-1]:
+                ordered = False
+            ids.extend(batch)
+        if not ordered:
+            ids = array('q', sorted(set(ids)))
+        self.ids = ids
+        self.ready = True
+        self.pending = {uid for uid in self.pending if not self._in_array(uid)}
+        self.removed = {uid for uid in self.removed if self._in_array(uid)}
+
+    def memory_bytes(self):
+        # Array payload plus a rough 64 bytes per buffered set entry
+        return self.ids.itemsize * len(self.ids) + 64 * (len(self.pending) + len(self.removed))
+
+
+if __name__ == "__main__":
+    # Memory and lookup benchmark: python -m database.userindex [count]
+    import asyncio, random, sys, time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    ids = sorted(random.sample(range(10**9, 8 * 10**9), count))
+
+    async def stream():
+        for i in range(0, count, 10000):
+            yield ids[i:i + 10000]
+
+    index = KnownUsers()
+    started = time.perf_counter()
+    asyncio.run(index.load(stream()))
+    print(f"load      {count:,} ids in {time.perf_counter() - started:.2f}s, "
+          f"{index.memory_bytes() / 2**20:.1f} MiB")
+
+    probes = [random.choice(ids) for _ in range(100000)] + random.sample(range(1, 10**9), 100000)
+    started = time.perf_counter()
+    hits = sum(1 for uid in probes if uid in index)
+    elapsed = time.perf_counter() - started
+    print(f"lookup    {elapsed / len(probes) * 1e6:.2f} us/op ({hits:,} hits of {len(probes):,})")
+
+    new_ids = random.sample(range(1, 10**9), KnownUsers.MERGE_AT)
+    for uid in new_ids[:-1]:
+        index.add(uid)
+    started = time.perf_counter()
+    index.add(new_ids[-1])  # this one triggers the merge
+    print(f"merge     {KnownUsers.MERGE_AT:,} new ids folded in {time.perf_counter() - started:.3f}s")
@@ -0,0 +1,186 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from config import *
+from metrics import LOOP_LAG, current_trace
+
+
+# Background work is started through tasks.spawn(coro, name) so that every
+# kind of task can be counted, aged and have its failures kept, instead of
+# vanishing into bare create_task calls. Tasks never inherit the trace of the
+# handler that spawned them: their stages and API calls belong to the task
+# name, not to a request that finished long ago.
+class TaskGroup:
+
+    __slots__ = ('running', 'started', 'finished', 'failed', 'cancelled', 'last_error')
+
+    def __init__(self):
+        self.running = {}  # task -> start time
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.last_error = None  # (unix time, repr of the exception)
+
+
+class TaskRegistry:
+
+    def __init__(self):
+        self.groups = {}
+        self.LOGGER = LOGGER(__name__)
+
+    def spawn(self, coro, name: str):
+        context = contextvars.copy_context()
+        context.run(current_trace.set, None)
+        # create_task copies the current context (no context= before 3.11)
+        task = context.run(asyncio.create_task, coro, name=name)
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = TaskGroup()
+        group.running[task] = time.monotonic()
+        group.started += 1
+        task.add_done_callback(functools.partial(self._done, group, name))
+        return task
+
+    def _done(self, group, name, task):
+        group.running.pop(task, None)
+        if task.cancelled():
+            group.cancelled += 1
+            return
+        error = task.exception()
+        if error is None:
+            group.finished += 1
+            return
+        group.failed += 1
+        group.last_error = (time.time(), repr(error))
+        self.LOGGER.warning(f"Background task {name} failed", exc_info=(type(error), error, error.__traceback__))
+
+    def snapshot(self):
+        now = time.monotonic()
+        rows = []
+        for name, group in self.groups.items():
+            oldest = min(group.running.values(), default=None)
+            rows.append({
+                'name': name,
+                'running': len(group.running),
+                'oldest_s': round(now - oldest, 1) if oldest is not None else None,
+                'started': group.started,
+                'finished': group.finished,
+                'failed': group.failed,
+                'cancelled': group.cancelled,
+                'last_error': group.last_error,
+            })
+        return sorted(rows, key=lambda row: (-row['running'], row['name']))
+
+
+# Measures how late the event loop runs a periodic heartbeat, and names what
+# blocked it. A watchdog thread notices when the heartbeat is overdue by more
+# than stall_ms and samples the loop thread's stack at that moment, so the
+# code holding the loop is identified without asyncio debug mode.
+class LoopMonitor:
+
+    ROOT = os.path.dirname(os.path.abspath(__file__))
+    MAX_SITES = 200
+
+    def __init__(self, interval: float, stall_ms: float):
+        self.interval = interval
+        self.stall_ms = stall_ms
+        self.beat = time.monotonic()
+        self.recent = deque(maxlen=max(1, int(60 / interval)))  # (unix time, lag) over the last minute
+        self.stall = None     # stall being watched, set by the watchdog
+        self.stalls = deque(maxlen=20)
+        self.sites = Counter()
+        self.loop_thread = None
+        self.task = None
+        self.stopped = threading.Event()
+        self.LOGGER = LOGGER(__name__)
+
+    def start(self):
+        if self.task is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.beat = time.monotonic()
+        self.stopped.clear()
+        self.task = tasks.spawn(self._heartbeat(), "loop_monitor")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.beat = time.monotonic()
+            LOOP_LAG.observe(lag)
+            self.recent.append((time.time(), lag))
+            stall, self.stall = self.stall, None
+            if stall is not None:
+                stall['ms'] = round(lag * 1000)
+                self.LOGGER.warning(f"Event loop blocked for {stall['ms']}ms at {stall['site']}", extra={'data': {
+                    'stall_ms': stall['ms'], 'site': stall['site'], 'stack': stall['stack']
+                }})
+
+    def _blame(self, stack):
+        # Innermost frame in the bot's own code, else the innermost frame
+        for frame in reversed(stack):
+            if frame.filename.startswith(self.ROOT) and not frame.filename.endswith("health.py"):
+                return f"{os.path.relpath(frame.filename, self.ROOT)}:{frame.lineno} {frame.name}"
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval / 4):
+            overdue = time.monotonic() - self.beat - self.interval
+            if self.stall is not None or overdue * 1000 < self.stall_ms:
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            site = self._blame(stack)
+            self.stall = {
+                'at': time.time(),
+                'site': site,
+                'ms': round(overdue * 1000),  # updated once the loop runs again
+                'stack': [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in stack[-6:]],
+            }
+            self.stalls.append(self.stall)
+            if site in self.sites or len(self.sites) < self.MAX_SITES:
+                self.sites[site] += 1
+
+    def lag_summary(self):
+        lags = [lag for _, lag in self.recent]
+        if not lags:
+            return {'last_ms': 0.0, 'avg_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'last_ms': round(lags[-1] * 1000, 1),
+            'avg_ms': round(sum(lags) / len(lags) * 1000, 1),
+            'max_ms': round(max(lags) * 1000, 1),
+        }
+
+    def report(self):
+        return {
+            'lag': self.lag_summary(),
+            'stalls': list(self.stalls),
+            'slow_sites': self.sites.most_common(10),
+            'tasks': tasks.snapshot(),
+        }
+
+
+tasks = TaskRegistry()
+loop_monitor = LoopMonitor(LOOP_MONITOR_INTERVAL, LOOP_STALL_MS)
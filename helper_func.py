@@ -4,13 +4,20 @@
 import base64
 import re
 import asyncio
+import hashlib
+import hmac
+import secrets
 import time
+from collections import OrderedDict
+from html import escape
 from pyrogram import filters
 from pyrogram.enums import ChatMemberStatus
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import *
 from pyrogram.errors.exceptions.bad_request_400 import UserNotParticipant
 from pyrogram.errors import FloodWait
 from database.database import *
+from metrics import span, traced
 
 
 
@@ -20,32 +27,33 @@ async def check_admin(filter, client, update):
         user_id = update.from_user.id       
         return any([user_id == OWNER_ID, await db.admin_exist(user_id)])
     except Exception as e:
-        print(f"! Exception in check_admin: {e}")
+        LOGGER(__name__).warning(f"Exception in check_admin: {e}")
         return False
 
+@traced('is_subscribed')
 async def is_subscribed(client, user_id):
-    channel_ids = await db.show_channels()
+    snapshot = await db.get_fsub_snapshot()
 
-    if not channel_ids:
+    if not snapshot.ids:
         return True
 
     if user_id == OWNER_ID:
         return True
 
-    for cid in channel_ids:
-        if not await is_sub(client, user_id, cid):
+    for cid in snapshot.ids:
+        mode = snapshot.mode(cid)
+        if not await is_sub(client, user_id, cid, mode):
             # Retry once if join request might be processing
-            mode = await db.get_channel_mode(cid)
             if mode == "on":
                 await asyncio.sleep(2)  # give time for @on_chat_join_request to process
-                if await is_sub(client, user_id, cid):
+                if await is_sub(client, user_id, cid, mode):
                     continue
             return False
 
     return True
 
 
-async def is_sub(client, user_id, channel_id):
+async def is_sub(client, user_id, channel_id, mode=None):
     try:
         member = await client.get_chat_member(channel_id, user_id)
         status = member.status
@@ -57,7 +65,8 @@ async def is_sub(client, user_id, channel_id):
         }
 
     except UserNotParticipant:
-        mode = await db.get_channel_mode(channel_id)
+        if mode is None:
+            mode = (await db.get_fsub_snapshot()).mode(channel_id)
         if mode == "on":
             exists = await db.req_user_exist(channel_id, user_id)
             #print(f"[REQ] User {user_id} join request for {channel_id}: {exists}")
@@ -66,7 +75,7 @@ async def is_sub(client, user_id, channel_id):
         return False
 
     except Exception as e:
-        print(f"[!] Error in is_sub(): {e}")
+        LOGGER(__name__).warning(f"Error in is_sub(): {e}")
         return False
 
 
@@ -83,6 +92,7 @@ async def decode(base64_string):
     string = string_bytes.decode("ascii")
     return string
 
+@traced('get_messages')
 async def get_messages(client, message_ids):
     messages = []
     total_messages = 0
@@ -161,6 +171,192 @@ def get_exp_time(seconds):
             result += f'{int(period_value)} {period_name}'
     return result
 
+def clip_text(text: str, limit: int = 4000) -> str:
+    # Keep command reports under Telegram's 4096 character message limit
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit - 40)
+    cut = cut if cut > 0 else limit - 40
+    hidden = text.count("\n", cut + 1)
+    return text[:cut] + f"\n<i>… and {hidden} more lines</i>"
+
+
+# Display names for user lists (/banlist, /admins): LRU of id -> (first_name | None, fetched_at)
+USER_NAME_CACHE = OrderedDict()
+USER_NAME_CACHE_SIZE = 5000
+USER_NAME_TTL = 24 * 3600
+USERS_PER_LOOKUP = 200
+USERS_PER_PAGE = 25
+
+def _cache_name(user_id, name, now):
+    USER_NAME_CACHE[user_id] = (name, now)
+    USER_NAME_CACHE.move_to_end(user_id)
+    if len(USER_NAME_CACHE) > USER_NAME_CACHE_SIZE:
+        USER_NAME_CACHE.popitem(last=False)
+
+async def _fetch_users(client, user_ids):
+    try:
+        return await client.get_users(user_ids)
+    except FloodWait as e:
+        await asyncio.sleep(e.value)
+        return await client.get_users(user_ids)
+
+async def _lookup_chunk(client, user_ids, now):
+    try:
+        users = await _fetch_users(client, user_ids)
+    except Exception:
+        # One unresolvable id fails the whole call, split to isolate it
+        if len(user_ids) == 1:
+            _cache_name(user_ids[0], None, now)
+            return
+        half = len(user_ids) // 2
+        await _lookup_chunk(client, user_ids[:half], now)
+        await _lookup_chunk(client, user_ids[half:], now)
+        return
+
+    if not isinstance(users, list):
+        users = [users]
+    names = {user.id: user.first_name for user in users}
+    for uid in user_ids:
+        _cache_name(uid, names.get(uid), now)
+
+async def resolve_user_names(client, user_ids):
+    """Return {user_id: first_name or None}, fetching missing names in bulk."""
+    now = time.time()
+    names, missing = {}, []
+    for uid in user_ids:
+        cached = USER_NAME_CACHE.get(uid)
+        if cached is None or now - cached[1] > USER_NAME_TTL:
+            missing.append(uid)
+        else:
+            USER_NAME_CACHE.move_to_end(uid)
+            names[uid] = cached[0]
+    for i in range(0, len(missing), USERS_PER_LOOKUP):
+        await _lookup_chunk(client, missing[i:i + USERS_PER_LOOKUP], now)
+        for uid in missing[i:i + USERS_PER_LOOKUP]:
+            names[uid] = USER_NAME_CACHE.get(uid, (None,))[0]
+    return names
+
+async def user_list_page(client, user_ids, page, title, prefix):
+    """Render one page of a user list; only the visible ids are resolved."""
+    pages = max(1, -(-len(user_ids) // USERS_PER_PAGE))
+    page = min(max(page, 0), pages - 1)
+    visible = user_ids[page * USERS_PER_PAGE:(page + 1) * USERS_PER_PAGE]
+    names = await resolve_user_names(client, visible)
+
+    text = f"{title} <i>({len(user_ids)})</i>\n\n"
+    for uid in visible:
+        name = names.get(uid)
+        if name:
+            text += f'• <a href="tg://user?id={uid}">{escape(name)}</a> — <code>{uid}</code>\n'
+        else:
+            text += f"• <code>{uid}</code> — <i>Could not fetch name</i>\n"
+
+    buttons = []
+    if pages > 1:
+        nav = []
+        if page > 0:
+            nav.append(InlineKeyboardButton("‹ ᴘʀᴇᴠ", callback_data=f"{prefix}_{page - 1}"))
+        nav.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"{prefix}_{page}"))
+        if page < pages - 1:
+            nav.append(InlineKeyboardButton("ɴᴇxᴛ ›", callback_data=f"{prefix}_{page + 1}"))
+        buttons.append(nav)
+    buttons.append([InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")])
+    return text, InlineKeyboardMarkup(buttons)
+
+
+# Paged deliveries: token -> (user_id, remaining ids, reload_url, created_at).
+# Ids are usually a range, so a cursor costs a few dozen bytes whatever the batch size.
+DELIVERY_CURSORS = {}
+DELIVERY_CURSOR_TTL = 24 * 3600
+
+def save_cursor(user_id, ids, reload_url):
+    now = time.time()
+    # Insertion order is creation order, expired cursors sit at the front
+    for token, cursor in list(DELIVERY_CURSORS.items()):
+        if now - cursor[3] <= DELIVERY_CURSOR_TTL:
+            break
+        del DELIVERY_CURSORS[token]
+    token = secrets.token_urlsafe(8)
+    DELIVERY_CURSORS[token] = (user_id, ids, reload_url, now)
+    return token
+
+def take_cursor(token, user_id):
+    """Pop the cursor so a double tap cannot send the same page twice."""
+    cursor = DELIVERY_CURSORS.get(token)
+    if not cursor or cursor[0] != user_id or time.time() - cursor[3] > DELIVERY_CURSOR_TTL:
+        return None
+    del DELIVERY_CURSORS[token]
+    return cursor[1], cursor[2]
+
+
+def humanbytes(size) -> str:
+    if not size:
+        return ""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+async def file_link(client, msg_id: int) -> str:
+    return f"https://t.me/{client.username}?start={await encode(f'get-{msg_id * abs(client.db_channel.id)}')}"
+
+# Direct download links: /file/<link code>?exp=<unix time>&sig=<hmac>, so the
+# web server can check a link without a database lookup
+def stream_sig(code: str, exp: int) -> str:
+    return hmac.new(STREAM_SECRET.encode(), f"{code}:{exp}".encode(), hashlib.sha256).hexdigest()[:32]
+
+async def stream_link(client, msg_id: int) -> str:
+    code = await encode(f"get-{msg_id * abs(client.db_channel.id)}")
+    exp = int(time.time()) + STREAM_LINK_TTL
+    return f"{STREAM_URL}/file/{code}?exp={exp}&sig={stream_sig(code, exp)}"
+
+def check_stream_sig(code: str, exp: str, sig: str) -> bool:
+    if not exp.isdigit() or int(exp) < time.time():
+        return False
+    return hmac.compare_digest(stream_sig(code, int(exp)), sig)
+
+def file_title(doc) -> str:
+    caption = (doc.get('caption') or "").strip().split("\n")[0]
+    return doc.get('file_name') or caption[:64] or f"Post #{doc['_id']}"
+
+
+# /search pages keep the query server side; callback data only carries a key
+# and the keyset cursor (id of the last result shown)
+SEARCH_QUERIES = {}
+SEARCH_QUERIES_MAX = 1000
+SEARCH_PAGE_SIZE = 10
+
+def search_key(query: str) -> str:
+    key = hashlib.blake2s(query.encode(), digest_size=6).hexdigest()
+    SEARCH_QUERIES.pop(key, None)
+    SEARCH_QUERIES[key] = query
+    while len(SEARCH_QUERIES) > SEARCH_QUERIES_MAX:
+        SEARCH_QUERIES.pop(next(iter(SEARCH_QUERIES)))
+    return key
+
+async def search_page(client, query: str, before=None):
+    """Render one page of /search results, answered from the files index only."""
+    docs = await db.search_files(query, before, SEARCH_PAGE_SIZE + 1)
+    more = len(docs) > SEARCH_PAGE_SIZE
+    docs = docs[:SEARCH_PAGE_SIZE]
+
+    text = f"<b>🔎 Rᴇsᴜʟᴛs ғᴏʀ</b> <code>{escape(query)}</code>\n\n"
+    if not docs:
+        text += "<i>Nothing found.</i>" if before is None else "<i>No more results.</i>"
+    for doc in docs:
+        size = humanbytes(doc.get('file_size'))
+        text += f'• <a href="{await file_link(client, doc["_id"])}">{escape(file_title(doc))}</a>'
+        text += f" — <code>{size}</code>\n" if size else "\n"
+
+    buttons = []
+    if more:
+        buttons.append([InlineKeyboardButton("ɴᴇxᴛ ›", callback_data=f"srch_{search_key(query)}_{docs[-1]['_id']}")])
+    buttons.append([InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")])
+    return text, InlineKeyboardMarkup(buttons)
+
+
 subscribed = filters.create(is_subscribed)
 admin = filters.create(check_admin)
 
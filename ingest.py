@@ -0,0 +1,214 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import time
+from collections import deque
+from config import *
+from database.database import db
+from outbound import outbound, INTERACTIVE, MAINTENANCE
+from health import tasks
+
+
+def file_meta(post):
+    """Metadata of a stored DB channel post, as kept in the files index."""
+    kind = post.media.value if post.media else None
+    media = getattr(post, kind, None) if kind else None
+    caption = post.caption or post.text or ""
+    return {
+        '_id': post.id,
+        'media': kind,
+        'file_unique_id': getattr(media, 'file_unique_id', None),
+        'file_name': getattr(media, 'file_name', None),
+        'name_lc': (getattr(media, 'file_name', None) or "").lower(),  # prefix search key
+        'file_size': getattr(media, 'file_size', None),
+        'mime_type': getattr(media, 'mime_type', None),
+        'caption': str(caption),
+        'date': int(post.date.timestamp()) if post.date else int(time.time()),
+    }
+
+
+def content_key(message):
+    # Same for a message and its forwarded or copied post
+    meta = file_meta(message)
+    return meta['file_unique_id'], meta['caption']
+
+
+# Admin uploads on their way into the DB channel.
+#
+# submit() queues a message and returns a future for the stored post. One
+# worker drains the queue in order: uploads that arrive together from the same
+# chat are stored with a single forward_messages(drop_author=True) call, which
+# looks exactly like a copy, and every call goes through the outbound
+# scheduler so FloodWait is retried instead of losing a file. Metadata of the
+# stored posts is written to the files index in one bulk write per batch.
+class Ingestor:
+
+    MAX_BATCH = 100  # forward_messages limit
+    WINDOW = 60      # seconds of history behind rate()
+
+    def __init__(self, batch_size: int, linger: float):
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH))
+        self.linger = linger
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.stored = 0
+        self.failed = 0
+        self.batches = 0
+        self.recent = deque()  # (finished_at, files) per batch
+        self.LOGGER = LOGGER(__name__)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = tasks.spawn(self._run(), "ingest")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def submit(self, client, message):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((client, message, future))
+        self.wakeup.set()
+        return future
+
+    def rate(self):
+        # Files stored per second over the last WINDOW seconds
+        cutoff = time.monotonic() - self.WINDOW
+        while self.recent and self.recent[0][0] < cutoff:
+            self.recent.popleft()
+        return sum(n for _, n in self.recent) / self.WINDOW
+
+    async def _run(self):
+        while True:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            if len(self.queue) < self.batch_size and self.linger:
+                await asyncio.sleep(self.linger)  # let a burst of uploads gather
+            batch = self._take()
+            try:
+                await self._store(batch)
+            except Exception as e:
+                self.LOGGER.warning(f"Ingest batch failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _take(self):
+        client, first, _ = self.queue[0]
+        batch = []
+        while self.queue and len(batch) < self.batch_size:
+            item = self.queue[0]
+            if item[0] is not client or item[1].chat.id != first.chat.id:
+                break
+            batch.append(self.queue.popleft())
+        return batch
+
+    def _match(self, batch, posts):
+        # forward_messages skips messages it cannot forward (deleted ones, for
+        # example) and returns the rest in order, so the posts are matched
+        # back to the batch by content. None marks a message with no post.
+        if len(posts) == len(batch):
+            return posts
+        matched = [None] * len(batch)
+        i = 0
+        for post in posts:
+            key = content_key(post)
+            while i < len(batch) and content_key(batch[i][1]) != key:
+                i += 1
+            if i == len(batch):
+                self.LOGGER.warning(f"Stored post {post.id} matches no queued upload, check the DB channel")
+                break
+            matched[i] = post
+            i += 1
+        return matched
+
+    async def _store(self, batch):
+        client = batch[0][0]
+        from_chat = batch[0][1].chat.id
+        channel_id = client.db_channel.id
+        ids = [message.id for _, message, _ in batch]
+
+        try:
+            forwarded = await outbound.call(INTERACTIVE, channel_id, lambda: client.forward_messages(
+                channel_id, from_chat, ids, disable_notification=True, drop_author=True
+            ))
+        except Exception as e:
+            # One unsupported message fails the whole call, copy one by one so only it is lost
+            self.LOGGER.info(f"Batch forward of {len(ids)} messages failed ({e}), copying one by one")
+            forwarded = []
+        posts = self._match(batch, forwarded if isinstance(forwarded, list) else [forwarded])
+
+        missing = [i for i, post in enumerate(posts) if post is None]
+        if missing and len(missing) < len(batch):
+            self.LOGGER.info(f"Batch forward stored {len(batch) - len(missing)} of {len(batch)} messages, copying the rest")
+        for i in missing:
+            message = batch[i][1]
+            try:
+                posts[i] = await outbound.call(INTERACTIVE, channel_id, lambda: message.copy(
+                    channel_id, disable_notification=True
+                ))
+            except Exception as copy_error:
+                posts[i] = copy_error
+
+        stored = []
+        for (_, _, future), post in zip(batch, posts):
+            if isinstance(post, Exception):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(post)
+                continue
+            stored.append(post)
+            if not future.done():
+                future.set_result(post)
+
+        self.batches += 1
+        self.stored += len(stored)
+        self.recent.append((time.monotonic(), len(stored)))
+        if stored:
+            try:
+                await db.add_files([file_meta(post) for post in stored])
+            except Exception as e:
+                self.LOGGER.warning(f"Could not index {len(stored)} stored files: {e}")
+
+
+async def find_duplicate(client, message):
+    """Id of the DB channel post that already holds this message's file, if any."""
+    if not DEDUP_UPLOADS or not message.media:
+        return None
+    unique_id = file_meta(message)['file_unique_id']
+    if not unique_id:
+        return None
+    channel_id = client.db_channel.id
+    for _ in range(3):
+        original_id = await db.find_stored(unique_id)
+        if not original_id:
+            return None
+        # Admins delete DB channel posts and nothing tells the files index,
+        # so the post is checked before its link is handed out again
+        try:
+            post = await outbound.call(INTERACTIVE, channel_id, lambda: client.get_messages(channel_id, original_id))
+        except Exception as e:
+            LOGGER(__name__).warning(f"Could not check stored post {original_id}, storing the upload again: {e}")
+            return None
+        if not post.empty and file_meta(post)['file_unique_id'] == unique_id:
+            return original_id
+        LOGGER(__name__).info(f"Post {original_id} is gone from the DB channel, dropping it from the files index")
+        await db.drop_file(original_id)
+    return None
+
+
+async def set_channel_button(post, reply_markup):
+    # Cosmetic, so it runs at maintenance priority after the link is handed out
+    try:
+        await outbound.call(MAINTENANCE, post.chat.id, lambda: post.edit_reply_markup(reply_markup))
+    except Exception as e:
+        LOGGER(__name__).warning(f"Could not add the share button to post {post.id}: {e}")
+
+
+ingestor = Ingestor(INGEST_BATCH_SIZE, INGEST_LINGER)
@@ -0,0 +1,133 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import atexit
+import json
+import logging
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+# Logging that never writes from the event loop.
+#
+# Records are put on a bounded queue and a listener thread formats and writes
+# them to the rotating file and the console. When the queue is full records
+# are dropped and counted rather than blocking the caller. A call site that
+# keeps logging (the same file and line, e.g. one failing copy per user of a
+# broadcast) is limited to `burst` records per `window` seconds; the first
+# record let through afterwards says how many were suppressed.
+#
+# Structured fields go in extra={'data': {...}} and become keys of the JSON
+# line, or a JSON suffix in the text format.
+
+TEXT_FORMAT = "[%(asctime)s - %(levelname)s] - %(name)s - %(message)s"
+TEXT_DATEFMT = '%d-%b-%y %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        line = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data:
+            line.update(data)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line['suppressed'] = suppressed
+        if record.exc_text:
+            line['exc'] = record.exc_text
+        return json.dumps(line, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record):
+        text = super().format(record)
+        data = getattr(record, 'data', None)
+        if data:
+            text += " " + json.dumps(data, default=str, ensure_ascii=False)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class RateLimit(logging.Filter):
+
+    MAX_SITES = 5000
+
+    def __init__(self, burst: int, window: float):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sites = {}  # (path, line, level) -> [window start, records, suppressed]
+
+    def filter(self, record):
+        if self.burst <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno, record.levelno)
+        site = self.sites.get(key)
+        if site is None or now - site[0] >= self.window:
+            if site is None and len(self.sites) >= self.MAX_SITES:
+                self.sites = {k: s for k, s in self.sites.items() if now - s[0] < self.window}
+            suppressed = site[2] if site else 0
+            self.sites[key] = [now, 1, 0]
+            record.suppressed = suppressed
+            return True
+        if site[1] < self.burst:
+            site[1] += 1
+            return True
+        site[2] += 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback here, where the arguments are
+        # still valid, but leave the layout to the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(file_name: str, json_format: bool = False, level=logging.INFO,
+                  burst: int = 20, window: float = 60, queue_size: int = 10000):
+    formatter = JsonFormatter() if json_format else TextFormatter(TEXT_FORMAT, TEXT_DATEFMT)
+    file_handler = RotatingFileHandler(file_name, maxBytes=50000000, backupCount=10)
+    console = logging.StreamHandler()
+    for handler in (file_handler, console):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RateLimit(burst, window))
+    listener = QueueListener(log_queue, file_handler, console)
+    listener.start()
+    atexit.register(listener.stop)  # flush what is queued on exit
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    return handler
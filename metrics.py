@@ -0,0 +1,271 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from bisect import bisect_left
+from config import *
+
+
+# In-memory metrics in the Prometheus text format.
+#
+# Hot paths only bump numbers in dicts; values that already live elsewhere
+# (queue depths, cache sizes, persisted stats) are read by collectors when
+# /metrics is scraped, so an idle bot pays nothing for them.
+REGISTRY = []
+COLLECTORS = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Metric:
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        lines = self.header()
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, name: str, help: str, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self.values.get(key)
+        if series is None:
+            # per-bucket counts (not cumulative), sum, count
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = self.header()
+        for key, (counts, total, count) in self.values.items():
+            running = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                running += n
+                labels = _labels(self.label_names + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def collector(func):
+    """Register func() to refresh gauges right before each scrape."""
+    COLLECTORS.append(func)
+    return func
+
+
+def render() -> str:
+    for func in COLLECTORS:
+        try:
+            func()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Metrics collector {func.__name__} failed: {e}")
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HANDLER_SECONDS = Histogram('filestore_handler_seconds', "Time spent in each bot update handler.", ['handler'])
+DB_SECONDS = Histogram('filestore_db_call_seconds', "Latency of storage calls made through the database facade.", ['result'])
+LOOP_LAG = Histogram(
+    'filestore_event_loop_lag_seconds', "How late the event loop woke a periodic timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+AUTO_DELETE_PENDING = Gauge('filestore_auto_delete_pending_messages', "Delivered messages waiting for auto-delete.")
+BROADCAST_PENDING = Gauge('filestore_broadcast_pending_users', "Users not yet reached by running broadcasts.")
+BROADCAST_USERS = Counter('filestore_broadcast_users_total', "Broadcast recipients by outcome.", ['result'])
+STAGE_SECONDS = Histogram('filestore_stage_seconds', "Time spent in each stage of an update handler.", ['handler', 'stage'])
+API_CALLS = Counter('filestore_api_calls_total', "Telegram API calls by method, calling plugin and outcome.", ['method', 'source', 'result'])
+API_SECONDS = Histogram('filestore_api_call_seconds', "Latency of Telegram API calls by method.", ['method'])
+API_FLOOD_SECONDS = Counter(
+    'filestore_api_flood_wait_seconds_total', "FloodWait seconds by the method and plugin that triggered them.",
+    ['method', 'source']
+)
+
+
+# A trace follows one update through its handler. Stages that run while it is
+# the current trace (including nested ones) are added to its breakdown and to
+# STAGE_SECONDS; outside of a handler span() costs one context lookup.
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+
+    def __init__(self, handler: str, plugin: str = ""):
+        self.handler = handler
+        self.plugin = plugin
+        self.start = time.perf_counter()
+        self.stages = {}  # stage -> [calls, seconds]
+
+    def add(self, stage, seconds):
+        entry = self.stages.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        STAGE_SECONDS.observe(seconds, handler=self.handler, stage=stage)
+
+
+@contextmanager
+def span(stage: str):
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(stage, time.perf_counter() - start)
+
+
+def traced(stage: str):
+    """Decorator for coroutine functions that form one stage of a handler."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def call_source():
+    # Plugin of the handler being served, or the name of a background task
+    trace = current_trace.get()
+    if trace is not None:
+        return trace.plugin
+    task = asyncio.current_task()
+    name = task.get_name() if task else ""
+    return "other" if not name or name.startswith("Task-") else name
+
+
+def record_api_call(method, source, seconds, result="ok", flood=0):
+    API_CALLS.inc(method=method, source=source, result=result)
+    API_SECONDS.observe(seconds, method=method)
+    if flood:
+        API_FLOOD_SECONDS.inc(flood, method=method, source=source)
+
+
+def api_summary(limit: int = 5):
+    """Busiest methods as (method, calls, avg seconds, errors) and FloodWait seconds per source."""
+    errors = {}
+    for (method, _, result), n in API_CALLS.values.items():
+        if result != "ok":
+            errors[method] = errors.get(method, 0) + n
+    busiest = sorted(
+        ((method, count, total / count, errors.get(method, 0)) for (method,), (_, total, count) in API_SECONDS.values.items()),
+        key=lambda row: -row[1]
+    )[:limit]
+    flood = {}
+    for (_, source), seconds in API_FLOOD_SECONDS.values.items():
+        flood[source] = flood.get(source, 0) + seconds
+    return busiest, sorted(flood.items(), key=lambda item: -item[1])[:limit]
+
+
+def log_slow(trace, seconds, update):
+    user = getattr(getattr(update, 'from_user', None), 'id', None)
+    ms = round(seconds * 1000, 1)
+    LOGGER('slow_requests').warning(f"Slow {trace.handler}: {ms}ms", extra={'data': {
+        'handler': trace.handler,
+        'user': user,
+        'ms': ms,
+        'stages': {
+            stage: {'calls': calls, 'ms': round(total * 1000, 1)}
+            for stage, (calls, total) in sorted(trace.stages.items(), key=lambda item: -item[1][1])
+        },
+    }})
+
+
+def timed(callback):
+    """Wrap an update handler so its running time lands in HANDLER_SECONDS."""
+    if getattr(callback, 'timed', False):
+        return callback
+    name = getattr(callback, '__name__', 'handler')
+    plugin = getattr(callback, '__module__', "").rpartition(".")[2]
+
+    @functools.wraps(callback)
+    async def wrapper(client, *args):
+        trace = Trace(name, plugin)
+        token = current_trace.set(trace)
+        try:
+            return await callback(client, *args)
+        finally:
+            current_trace.reset(token)
+            seconds = time.perf_counter() - trace.start
+            HANDLER_SECONDS.observe(seconds, handler=name)
+            if seconds >= SLOW_HANDLER_SECONDS:
+                log_slow(trace, seconds, args[0] if args else None)
+
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument(dispatcher):
+    # Plugins are registered by Client.start, so this runs right after it
+    for group in dispatcher.groups.values():
+        for handler in group:
+            if asyncio.iscoroutinefunction(handler.callback):
+                handler.callback = timed(handler.callback)
+
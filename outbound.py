@@ -0,0 +1,271 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from pyrogram.errors import FloodWait
+from config import *
+from metrics import span
+from health import tasks
+
+
+# Priority lanes, highest first
+INTERACTIVE, DELETES, BROADCAST, MAINTENANCE = range(4)
+LANES = ('interactive', 'deletes', 'broadcast', 'maintenance')
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now):
+        # Seconds until one token is available
+        self._refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+# Deficit round robin over per-chat queues. Each visit credits a chat with
+# QUANTUM and serves its head request once the credit covers its cost, so a
+# chat with a thousand queued copies gets the same turn as a chat with one.
+class FairQueue:
+
+    QUANTUM = 1
+    SCAN = 64  # chats inspected per pick
+
+    def __init__(self):
+        self.queues = OrderedDict()  # chat_id -> deque of (cost, future)
+        self.deficit = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, key, cost, future):
+        if key not in self.queues:
+            self.queues[key] = deque()
+            self.deficit[key] = 0
+        self.queues[key].append((cost, future))
+        self.size += 1
+
+    def _drop(self, key):
+        del self.queues[key]
+        del self.deficit[key]
+
+    def pick(self, ready):
+        """Pop the next (key, future) by DRR order, or (None, None, retry_in).
+
+        ready(key) returns 0 when the chat may send now, seconds to wait, or
+        None when it is blocked until one of its calls finishes.
+        """
+        retry_in = None
+        for _ in range(min(len(self.queues), self.SCAN)):
+            key, queue = next(iter(self.queues.items()))
+            while queue and queue[0][1].done():  # caller was cancelled
+                queue.popleft()
+                self.size -= 1
+            if not queue:
+                self._drop(key)
+                continue
+
+            wait = ready(key)
+            if wait is None or wait > 0:
+                if wait is not None:
+                    retry_in = wait if retry_in is None else min(retry_in, wait)
+                self.queues.move_to_end(key)
+                continue
+
+            cost, future = queue[0]
+            if self.deficit[key] < cost:
+                self.deficit[key] += self.QUANTUM
+                if self.deficit[key] < cost:
+                    retry_in = 0
+                    self.queues.move_to_end(key)
+                    continue
+
+            queue.popleft()
+            self.size -= 1
+            self.deficit[key] -= cost
+            if not queue:
+                self._drop(key)
+            elif self.deficit[key] < queue[0][0]:
+                self.queues.move_to_end(key)  # turn used up, next chat
+            return key, future, None
+        return None, None, retry_in
+
+
+# Every outbound Bot API call from the plugins goes through one scheduler.
+#
+# A caller waits in the queue of its lane until the dispatcher hands it a
+# token from the global bucket and, when it targets a chat, from that chat's
+# bucket. Lanes are served in strict priority order and fairly across chats
+# inside a lane (FairQueue); a chat that is throttled, or already holds
+# chat_inflight running calls, is skipped so it does not block the rest of
+# its lane. A FloodWait raised by any call pauses every lane for the
+# requested time and the call is retried.
+class Outbound:
+
+    MAX_CHAT_BUCKETS = 50000
+
+    def __init__(self, rate, burst, chat_rate, chat_burst, retries, max_inflight, chat_inflight):
+        self.bucket = TokenBucket(rate, burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.retries = retries
+        self.max_inflight = max_inflight
+        self.chat_inflight = chat_inflight
+        self.inflight = 0
+        self.inflight_by_chat = {}
+        self.chats = {}
+        self.lanes = [FairQueue() for _ in LANES]
+        self.sent = [0] * len(LANES)
+        self.wakeup = asyncio.Event()
+        self.resume_at = 0.0
+        self.flood_waits = 0
+        self.flood_seconds = 0
+        self.task = None
+        self.LOGGER = LOGGER(__name__)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = tasks.spawn(self._dispatch(), "outbound")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def call(self, lane: int, chat_id, factory, cost: int = 1):
+        """Run factory() (a coroutine function) once the scheduler allows it.
+
+        chat_id is the chat the call writes to, or None for calls that only
+        count against the global limit.
+        """
+        attempt = 0
+        while True:
+            with span('outbound_wait'):
+                await self._acquire(lane, chat_id, cost)
+            try:
+                with span('telegram'):
+                    return await factory()
+            except FloodWait as e:
+                self.backoff(e.value)
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+            finally:
+                self._release(chat_id)
+
+    def backoff(self, seconds):
+        self.flood_waits += 1
+        self.flood_seconds += seconds
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+        self.LOGGER.warning(f"FloodWait of {seconds}s, pausing outbound calls")
+
+    async def _acquire(self, lane, chat_id, cost):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.lanes[lane].push(chat_id, cost, future)
+        self.wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(chat_id)  # granted just before the caller went away
+            raise
+        self.sent[lane] += 1
+
+    def _release(self, chat_id):
+        self.inflight -= 1
+        if chat_id is not None:
+            left = self.inflight_by_chat[chat_id] - 1
+            if left:
+                self.inflight_by_chat[chat_id] = left
+            else:
+                del self.inflight_by_chat[chat_id]
+        self.wakeup.set()
+
+    def _chat(self, chat_id):
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            if len(self.chats) >= self.MAX_CHAT_BUCKETS:
+                now = time.monotonic()
+                self.chats = {cid: b for cid, b in self.chats.items() if not b.full(now)}
+            bucket = self.chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _ready(self, chat_id, now):
+        if chat_id is None:
+            return 0
+        if self.inflight_by_chat.get(chat_id, 0) >= self.chat_inflight:
+            return None
+        return self._chat(chat_id).wait_time(now)
+
+    def _pick(self, now):
+        retry_in = None
+        if self.inflight >= self.max_inflight:
+            return None, None, None  # woken by _release
+        for queue in self.lanes:
+            if not queue:
+                continue
+            chat_id, future, wait = queue.pick(lambda cid: self._ready(cid, now))
+            if future is not None:
+                return chat_id, future, None
+            if wait is not None:
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+        return None, None, retry_in
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            if now < self.resume_at:
+                await asyncio.sleep(self.resume_at - now)
+                continue
+            delay = self.bucket.wait_time(now)
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+
+            chat_id, future, retry_in = self._pick(now)
+            if future is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), retry_in)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.bucket.take(now)
+            self.inflight += 1
+            if chat_id is not None:
+                self.chats[chat_id].take(now)
+                self.inflight_by_chat[chat_id] = self.inflight_by_chat.get(chat_id, 0) + 1
+            future.set_result(None)
+
+    def depths(self):
+        return {name: len(queue) for name, queue in zip(LANES, self.lanes)}
+
+    def paused_for(self):
+        return max(0.0, self.resume_at - time.monotonic())
+
+
+outbound = Outbound(
+    OUTBOUND_RATE, OUTBOUND_BURST, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST, OUTBOUND_FLOOD_RETRIES,
+    OUTBOUND_MAX_INFLIGHT, OUTBOUND_CHAT_INFLIGHT
+)
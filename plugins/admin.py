@@ -11,32 +11,33 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE
 
 
 
 # Commands for adding admins by owner
 @Bot.on_message(filters.command('add_admin') & filters.private & filters.user(OWNER_ID))
 async def add_admins(client: Client, message: Message):
-    pro = await message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True))
     check = 0
-    admin_ids = await db.get_all_admins()
+    admin_ids = set(await db.get_all_admins())
     admins = message.text.split()[1:]
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data="close")]])
 
     if not admins:
-        return await pro.edit(
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(
             "<b>You need to provide user ID(s) to add as admin.</b>\n\n"
             "<b>Usage:</b>\n"
             "<code>/add_admin [user_id]</code> — Add one or more user IDs\n\n"
             "<b>Example:</b>\n"
             "<code>/add_admin 1234567890 9876543210</code>",
             reply_markup=reply_markup
-        )
+        ))
 
     admin_list = ""
     valid_ids = []
-    for id in admins:
+    for id in dict.fromkeys(admins):
         try:
             id_int = int(id)
         except:
@@ -52,46 +53,45 @@ async def add_admins(client: Client, message: Message):
         check += 1
 
     if check == len(valid_ids):
-        for id in valid_ids:
-            await db.add_admin(id)
-        await pro.edit(f"<b>✅ Admin(s) added successfully:</b>\n\n{admin_list}", reply_markup=reply_markup)
+        await db.add_admins(valid_ids)
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>✅ Admin(s) added successfully:</b>\n\n{admin_list}"), reply_markup=reply_markup))
     else:
-        await pro.edit(
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(
             f"<b>⚠️ Some IDs were not added:</b>\n\n{admin_list.strip()}\n\n"
             "<b><i>Check input and try again.</i></b>",
             reply_markup=reply_markup
-        )
+        ))
 
 
 @Bot.on_message(filters.command('deladmin') & filters.private & filters.user(OWNER_ID))
 async def delete_admins(client: Client, message: Message):
-    pro = await message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True))
     admin_ids = await db.get_all_admins()
     admins = message.text.split()[1:]
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data="close")]])
 
     if not admins:
-        return await pro.edit(
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(
             "<b>Please provide valid admin ID(s) to remove.</b>\n\n"
             "<b>Usage:</b>\n"
             "<code>/deladmin [user_id]</code> — Remove specific IDs\n"
             "<code>/deladmin all</code> — Remove all admins",
             reply_markup=reply_markup
-        )
+        ))
 
     if len(admins) == 1 and admins[0].lower() == "all":
         if admin_ids:
-            for id in admin_ids:
-                await db.del_admin(id)
+            await db.del_admins()
             ids = "\n".join(f"<blockquote><code>{admin}</code> ✅</blockquote>" for admin in admin_ids)
-            return await pro.edit(f"<b>⛔️ All admin IDs have been removed:</b>\n{ids}", reply_markup=reply_markup)
+            return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>⛔️ All admin IDs have been removed:</b>\n{ids}"), reply_markup=reply_markup))
         else:
-            return await pro.edit("<b><blockquote>No admin IDs to remove.</blockquote></b>", reply_markup=reply_markup)
+            return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit("<b><blockquote>No admin IDs to remove.</blockquote></b>", reply_markup=reply_markup))
 
     if admin_ids:
-        passed = ''
-        for admin_id in admins:
+        admin_ids = set(admin_ids)
+        passed, to_remove = '', []
+        for admin_id in dict.fromkeys(admins):
             try:
                 id = int(admin_id)
             except:
@@ -99,25 +99,25 @@ async def delete_admins(client: Client, message: Message):
                 continue
 
             if id in admin_ids:
-                await db.del_admin(id)
+                to_remove.append(id)
                 passed += f"<blockquote><code>{id}</code> ✅ Removed</blockquote>\n"
             else:
                 passed += f"<blockquote><b>ID <code>{id}</code> not found in admin list.</b></blockquote>\n"
 
-        await pro.edit(f"<b>⛔️ Admin removal result:</b>\n\n{passed}", reply_markup=reply_markup)
+        await db.del_admins(to_remove)
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>⛔️ Admin removal result:</b>\n\n{passed}"), reply_markup=reply_markup))
     else:
-        await pro.edit("<b><blockquote>No admin IDs available to delete.</blockquote></b>", reply_markup=reply_markup)
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit("<b><blockquote>No admin IDs available to delete.</blockquote></b>", reply_markup=reply_markup))
 
 
 @Bot.on_message(filters.command('admins') & filters.private & admin)
 async def get_admins(client: Client, message: Message):
-    pro = await message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ..</i></b>", quote=True))
     admin_ids = await db.get_all_admins()
 
     if not admin_ids:
-        admin_list = "<b><blockquote>❌ No admins found.</blockquote></b>"
-    else:
-        admin_list = "\n".join(f"<b><blockquote>ID: <code>{id}</code></blockquote></b>" for id in admin_ids)
+        reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data="close")]])
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(f"{ADMINS_TITLE}\n\n<b><blockquote>❌ No admins found.</blockquote></b>", reply_markup=reply_markup))
 
-    reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("ᴄʟᴏsᴇ", callback_data="close")]])
-    await pro.edit(f"<b>⚡ Current Admin List:</b>\n\n{admin_list}", reply_markup=reply_markup)
+    text, reply_markup = await user_list_page(client, admin_ids, 0, ADMINS_TITLE, "admins")
+    await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(text, disable_web_page_preview=True, reply_markup=reply_markup))
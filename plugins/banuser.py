@@ -25,35 +25,38 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE
 
 
 
 #BAN-USER-SYSTEM
 @Bot.on_message(filters.private & filters.command('ban') & admin)
 async def add_banuser(client: Client, message: Message):        
-    pro = await message.reply("⏳ <i>Pʀᴏᴄᴇssɪɴɢ ʀᴇǫᴜᴇsᴛ...</i>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("⏳ <i>Pʀᴏᴄᴇssɪɴɢ ʀᴇǫᴜᴇsᴛ...</i>", quote=True))
     banuser_ids = await db.get_ban_users()
     banusers = message.text.split()[1:]
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")]])
 
     if not banusers:
-        return await pro.edit(
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(
             "<b>❗ Yᴏᴜ ᴍᴜsᴛ ᴘʀᴏᴠɪᴅᴇ ᴜsᴇʀ IDs ᴛᴏ ʙᴀɴ.</b>\n\n"
             "<b>📌 Usᴀɢᴇ:</b>\n"
             "<code>/ban [user_id]</code> — Ban one or more users by ID.",
             reply_markup=reply_markup
-        )
+        ))
 
-    report, success_count = "", 0
-    for uid in banusers:
+    admin_ids = set(await db.get_all_admins())
+    banuser_ids = set(banuser_ids)
+    report, to_ban = "", []
+    for uid in dict.fromkeys(banusers):
         try:
             uid_int = int(uid)
         except:
             report += f"⚠️ Iɴᴠᴀʟɪᴅ ID: <code>{uid}</code>\n"
             continue
 
-        if uid_int in await db.get_all_admins() or uid_int == OWNER_ID:
+        if uid_int in admin_ids or uid_int == OWNER_ID:
             report += f"⛔ Sᴋɪᴘᴘᴇᴅ ᴀᴅᴍɪɴ/ᴏᴡɴᴇʀ ID: <code>{uid_int}</code>\n"
             continue
 
@@ -62,44 +65,49 @@ async def add_banuser(client: Client, message: Message):
             continue
 
         if len(str(uid_int)) == 10:
-            await db.add_ban_user(uid_int)
-            report += f"✅ Bᴀɴɴᴇᴅ: <code>{uid_int}</code>\n"
-            success_count += 1
+            to_ban.append(uid_int)
         else:
             report += f"⚠️ Invalid Telegram ID length: <code>{uid_int}</code>\n"
 
-    if success_count:
-        await pro.edit(f"<b>✅ Bᴀɴɴᴇᴅ Usᴇʀs Uᴘᴅᴀᴛᴇᴅ:</b>\n\n{report}", reply_markup=reply_markup)
+    banned = set(await db.ban_many(to_ban))
+    for uid_int in to_ban:
+        if uid_int in banned:
+            report += f"✅ Bᴀɴɴᴇᴅ: <code>{uid_int}</code>\n"
+        else:
+            report += f"⚠️ Aʟʀᴇᴀᴅʏ : <code>{uid_int}</code>\n"
+
+    if banned:
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>✅ Bᴀɴɴᴇᴅ Usᴇʀs Uᴘᴅᴀᴛᴇᴅ:</b>\n\n{report}"), reply_markup=reply_markup))
     else:
-        await pro.edit(f"<b>❌ Nᴏ ᴜsᴇʀs ᴡᴇʀᴇ ʙᴀɴɴᴇᴅ.</b>\n\n{report}", reply_markup=reply_markup)
+        await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>❌ Nᴏ ᴜsᴇʀs ᴡᴇʀᴇ ʙᴀɴɴᴇᴅ.</b>\n\n{report}"), reply_markup=reply_markup))
 
 @Bot.on_message(filters.private & filters.command('unban') & admin)
 async def delete_banuser(client: Client, message: Message):        
-    pro = await message.reply("⏳ <i>Pʀᴏᴄᴇssɪɴɢ ʀᴇǫᴜᴇsᴛ...</i>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("⏳ <i>Pʀᴏᴄᴇssɪɴɢ ʀᴇǫᴜᴇsᴛ...</i>", quote=True))
     banuser_ids = await db.get_ban_users()
     banusers = message.text.split()[1:]
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")]])
 
     if not banusers:
-        return await pro.edit(
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(
             "<b>❗ Pʟᴇᴀsᴇ ᴘʀᴏᴠɪᴅᴇ ᴜsᴇʀ IDs ᴛᴏ ᴜɴʙᴀɴ.</b>\n\n"
             "<b>📌 Usage:</b>\n"
             "<code>/unban [user_id]</code> — Unban specific user(s)\n"
             "<code>/unban all</code> — Remove all banned users",
             reply_markup=reply_markup
-        )
+        ))
 
     if banusers[0].lower() == "all":
         if not banuser_ids:
-            return await pro.edit("<b>✅ NO ᴜsᴇʀs ɪɴ ᴛʜᴇ ʙᴀɴ ʟɪsᴛ.</b>", reply_markup=reply_markup)
-        for uid in banuser_ids:
-            await db.del_ban_user(uid)
-        listed = "\n".join([f"✅ Uɴʙᴀɴɴᴇᴅ: <code>{uid}</code>" for uid in banuser_ids])
-        return await pro.edit(f"<b>🚫 Cʟᴇᴀʀᴇᴅ Bᴀɴ Lɪsᴛ:</b>\n\n{listed}", reply_markup=reply_markup)
-
-    report = ""
-    for uid in banusers:
+            return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit("<b>✅ NO ᴜsᴇʀs ɪɴ ᴛʜᴇ ʙᴀɴ ʟɪsᴛ.</b>", reply_markup=reply_markup))
+        cleared = await db.unban_all()
+        listed = "\n".join([f"✅ Uɴʙᴀɴɴᴇᴅ: <code>{uid}</code>" for uid in cleared])
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>🚫 Cʟᴇᴀʀᴇᴅ Bᴀɴ Lɪsᴛ ({len(cleared)}):</b>\n\n{listed}"), reply_markup=reply_markup))
+
+    banuser_ids = set(banuser_ids)
+    report, to_unban = "", []
+    for uid in dict.fromkeys(banusers):
         try:
             uid_int = int(uid)
         except:
@@ -107,29 +115,22 @@ async def delete_banuser(client: Client, message: Message):
             continue
 
         if uid_int in banuser_ids:
-            await db.del_ban_user(uid_int)
+            to_unban.append(uid_int)
             report += f"✅ Uɴʙᴀɴɴᴇᴅ: <code>{uid_int}</code>\n"
         else:
             report += f"⚠️ Nᴏᴛ ɪɴ ʙᴀɴ ʟɪsᴛ: <code>{uid_int}</code>\n"
 
-    await pro.edit(f"<b>🚫 Uɴʙᴀɴ Rᴇᴘᴏʀᴛ:</b>\n\n{report}", reply_markup=reply_markup)
+    await db.unban_many(to_unban)
+    await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(clip_text(f"<b>🚫 Uɴʙᴀɴ Rᴇᴘᴏʀᴛ:</b>\n\n{report}"), reply_markup=reply_markup))
 
 @Bot.on_message(filters.private & filters.command('banlist') & admin)
 async def get_banuser_list(client: Client, message: Message):        
-    pro = await message.reply("⏳ <i>Fᴇᴛᴄʜɪɴɢ Bᴀɴ Lɪsᴛ...</i>", quote=True)
+    pro = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("⏳ <i>Fᴇᴛᴄʜɪɴɢ Bᴀɴ Lɪsᴛ...</i>", quote=True))
     banuser_ids = await db.get_ban_users()
 
     if not banuser_ids:
-        return await pro.edit("<b>✅ NO ᴜsᴇʀs ɪɴ ᴛʜᴇ ʙᴀɴ Lɪsᴛ.</b>", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")]]))
-
-    result = "<b>🚫 Bᴀɴɴᴇᴅ Usᴇʀs:</b>\n\n"
-    for uid in banuser_ids:
-        await message.reply_chat_action(ChatAction.TYPING)
-        try:
-            user = await client.get_users(uid)
-            user_link = f'<a href="tg://user?id={uid}">{user.first_name}</a>'
-            result += f"• {user_link} — <code>{uid}</code>\n"
-        except:
-            result += f"• <code>{uid}</code> — <i>Could not fetch name</i>\n"
+        return await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit("<b>✅ NO ᴜsᴇʀs ɪɴ ᴛʜᴇ ʙᴀɴ Lɪsᴛ.</b>", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")]])))
 
-    await pro.edit(result, disable_web_page_preview=True, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cʟᴏsᴇ", callback_data="close")]]))
+    await message.reply_chat_action(ChatAction.TYPING)
+    text, reply_markup = await user_list_page(client, banuser_ids, 0, BANLIST_TITLE, "banlist")
+    await outbound.call(INTERACTIVE, pro.chat.id, lambda: pro.edit(text, disable_web_page_preview=True, reply_markup=reply_markup))
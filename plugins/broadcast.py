@@ -25,6 +25,9 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE, DELETES, BROADCAST
+from metrics import BROADCAST_PENDING, BROADCAST_USERS
+from health import tasks
 
 
 #=====================================================================================##
@@ -45,17 +48,16 @@ async def send_pin_text(client: Bot, message: Message):
         deleted = 0
         unsuccessful = 0
 
-        pls_wait = await message.reply("<i>ʙʀᴏᴀᴅᴄᴀꜱᴛ ᴘʀᴏᴄᴇꜱꜱɪɴɢ....</i>")
+        db.stats.incr('broadcasts')
+        pls_wait = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<i>ʙʀᴏᴀᴅᴄᴀꜱᴛ ᴘʀᴏᴄᴇꜱꜱɪɴɢ....</i>"))
+        BROADCAST_PENDING.inc(len(query))
         for chat_id in query:
             try:
-                # Send and pin the message
-                sent_msg = await broadcast_msg.copy(chat_id)
-                await client.pin_chat_message(chat_id=chat_id, message_id=sent_msg.id, both_sides=True)
-                successful += 1
-            except FloodWait as e:
-                await asyncio.sleep(e.x)
-                sent_msg = await broadcast_msg.copy(chat_id)
-                await client.pin_chat_message(chat_id=chat_id, message_id=sent_msg.id, both_sides=True)
+                # Send and pin the message; FloodWait is handled by the scheduler
+                sent_msg = await outbound.call(BROADCAST, chat_id, lambda: broadcast_msg.copy(chat_id))
+                await outbound.call(BROADCAST, chat_id, lambda: client.pin_chat_message(
+                    chat_id=chat_id, message_id=sent_msg.id, both_sides=True
+                ))
                 successful += 1
             except UserIsBlocked:
                 await db.del_user(chat_id)
@@ -64,10 +66,12 @@ async def send_pin_text(client: Bot, message: Message):
                 await db.del_user(chat_id)
                 deleted += 1
             except Exception as e:
-                print(f"Failed to send or pin message to {chat_id}: {e}")
+                LOGGER(__name__).warning(f"Failed to send or pin message to {chat_id}: {e}")
                 unsuccessful += 1
             total += 1
+            BROADCAST_PENDING.dec()
 
+        count_outcomes(successful, blocked, deleted, unsuccessful)
         status = f"""<b><u>ʙʀᴏᴀᴅᴄᴀꜱᴛ ᴄᴏᴍᴘʟᴇᴛᴇᴅ</u></b>
 
 Total Users: <code>{total}</code>
@@ -76,12 +80,12 @@ Blocked Users: <code>{blocked}</code>
 Deleted Accounts: <code>{deleted}</code>
 Unsuccessful: <code>{unsuccessful}</code>"""
 
-        return await pls_wait.edit(status)
+        return await outbound.call(INTERACTIVE, pls_wait.chat.id, lambda: pls_wait.edit(status))
 
     else:
-        msg = await message.reply("Reply to a message to broadcast and pin it.")
+        msg = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("Reply to a message to broadcast and pin it."))
         await asyncio.sleep(8)
-        await msg.delete()
+        await outbound.call(DELETES, msg.chat.id, lambda: msg.delete())
 
 #=====================================================================================##
 
@@ -97,14 +101,12 @@ async def send_text(client: Bot, message: Message):
         deleted = 0
         unsuccessful = 0
 
-        pls_wait = await message.reply("<i>ʙʀᴏᴀᴅᴄᴀꜱᴛ ᴘʀᴏᴄᴇꜱꜱɪɴɢ....</i>")
+        db.stats.incr('broadcasts')
+        pls_wait = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<i>ʙʀᴏᴀᴅᴄᴀꜱᴛ ᴘʀᴏᴄᴇꜱꜱɪɴɢ....</i>"))
+        BROADCAST_PENDING.inc(len(query))
         for chat_id in query:
             try:
-                await broadcast_msg.copy(chat_id)
-                successful += 1
-            except FloodWait as e:
-                await asyncio.sleep(e.x)
-                await broadcast_msg.copy(chat_id)
+                await outbound.call(BROADCAST, chat_id, lambda: broadcast_msg.copy(chat_id))
                 successful += 1
             except UserIsBlocked:
                 await db.del_user(chat_id)
@@ -116,7 +118,9 @@ async def send_text(client: Bot, message: Message):
                 unsuccessful += 1
                 pass
             total += 1
+            BROADCAST_PENDING.dec()
 
+        count_outcomes(successful, blocked, deleted, unsuccessful)
         status = f"""<b><u>ʙʀᴏᴀᴅᴄᴀꜱᴛ...</u>
 
 Total Users: <code>{total}</code>
@@ -125,12 +129,12 @@ Blocked Users: <code>{blocked}</code>
 Deleted Accounts: <code>{deleted}</code>
 Unsuccessful: <code>{unsuccessful}</code></b>"""
 
-        return await pls_wait.edit(status)
+        return await outbound.call(INTERACTIVE, pls_wait.chat.id, lambda: pls_wait.edit(status))
 
     else:
-        msg = await message.reply(REPLY_ERROR)
+        msg = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(REPLY_ERROR))
         await asyncio.sleep(8)
-        await msg.delete()
+        await outbound.call(DELETES, msg.chat.id, lambda: msg.delete())
 
 #=====================================================================================##
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
@@ -147,13 +151,24 @@ Unsuccessful: <code>{unsuccessful}</code></b>"""
 
 # broadcast with auto-del
 
+def count_outcomes(successful, blocked, deleted, unsuccessful):
+    for result, users in (('sent', successful), ('blocked', blocked), ('deleted', deleted), ('failed', unsuccessful)):
+        BROADCAST_USERS.inc(users, result=result)
+
+async def delete_later(msg, duration):
+    await asyncio.sleep(duration)
+    try:
+        await outbound.call(DELETES, msg.chat.id, msg.delete)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error deleting broadcast message {msg.id}: {e}")
+
 @Bot.on_message(filters.private & filters.command('dbroadcast') & admin)
 async def delete_broadcast(client: Bot, message: Message):
     if message.reply_to_message:
         try:
             duration = int(message.command[1])  # Get the duration in seconds
         except (IndexError, ValueError):
-            await message.reply("<b>Pʟᴇᴀsᴇ ᴜsᴇ ᴀ ᴠᴀʟɪᴅ ᴅᴜʀᴀᴛɪᴏɴ ɪɴ sᴇᴄᴏɴᴅs.</b> Usᴀɢᴇ: /dbroadcast {duration}")
+            await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Pʟᴇᴀsᴇ ᴜsᴇ ᴀ ᴠᴀʟɪᴅ ᴅᴜʀᴀᴛɪᴏɴ ɪɴ sᴇᴄᴏɴᴅs.</b> Usᴀɢᴇ: /dbroadcast {duration}"))
             return
 
         query = await db.full_userbase()
@@ -164,18 +179,14 @@ async def delete_broadcast(client: Bot, message: Message):
         deleted = 0
         unsuccessful = 0
 
-        pls_wait = await message.reply("<i>Broadcast with auto-delete processing....</i>")
+        db.stats.incr('broadcasts')
+        pls_wait = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<i>Broadcast with auto-delete processing....</i>"))
+        BROADCAST_PENDING.inc(len(query))
         for chat_id in query:
             try:
-                sent_msg = await broadcast_msg.copy(chat_id)
-                await asyncio.sleep(duration)  # Wait for the specified duration
-                await sent_msg.delete()  # Delete the message after the duration
-                successful += 1
-            except FloodWait as e:
-                await asyncio.sleep(e.x)
-                sent_msg = await broadcast_msg.copy(chat_id)
-                await asyncio.sleep(duration)
-                await sent_msg.delete()
+                sent_msg = await outbound.call(BROADCAST, chat_id, lambda: broadcast_msg.copy(chat_id))
+                # Delete after the duration without holding up the next user
+                tasks.spawn(delete_later(sent_msg, duration), "broadcast_delete")
                 successful += 1
             except UserIsBlocked:
                 await db.del_user(chat_id)
@@ -187,7 +198,9 @@ async def delete_broadcast(client: Bot, message: Message):
                 unsuccessful += 1
                 pass
             total += 1
+            BROADCAST_PENDING.dec()
 
+        count_outcomes(successful, blocked, deleted, unsuccessful)
         status = f"""<b><u>Bʀᴏᴀᴅᴄᴀsᴛɪɴɢ ᴡɪᴛʜ Aᴜᴛᴏ-Dᴇʟᴇᴛᴇ...</u>
 
 Total Users: <code>{total}</code>
@@ -196,12 +209,12 @@ Blocked Users: <code>{blocked}</code>
 Deleted Accounts: <code>{deleted}</code>
 Unsuccessful: <code>{unsuccessful}</code></b>"""
 
-        return await pls_wait.edit(status)
+        return await outbound.call(INTERACTIVE, pls_wait.chat.id, lambda: pls_wait.edit(status))
 
     else:
-        msg = await message.reply("Pʟᴇᴀsᴇ ʀᴇᴘʟʏ ᴛᴏ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ʙʀᴏᴀᴅᴄᴀsᴛ ɪᴛ ᴡɪᴛʜ Aᴜᴛᴏ-Dᴇʟᴇᴛᴇ.")
+        msg = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("Pʟᴇᴀsᴇ ʀᴇᴘʟʏ ᴛᴏ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ʙʀᴏᴀᴅᴄᴀsᴛ ɪᴛ ᴡɪᴛʜ Aᴜᴛᴏ-Dᴇʟᴇᴛᴇ."))
         await asyncio.sleep(8)
-        await msg.delete()
+        await outbound.call(DELETES, msg.chat.id, lambda: msg.delete())
 
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
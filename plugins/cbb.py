@@ -11,49 +11,100 @@ from pyrogram import Client
 from bot import Bot
 from config import *
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from helper_func import check_admin, is_subscribed, user_list_page, take_cursor, search_page, SEARCH_QUERIES
 from database.database import *
+from plugins.start import deliver_files
+from outbound import outbound, INTERACTIVE, DELETES
 
 @Bot.on_callback_query()
 async def cb_handler(client: Bot, query: CallbackQuery):
     data = query.data
 
     if data == "help":
-        await query.message.edit_text(
+        await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
             text=HELP_TXT.format(first=query.from_user.first_name),
             disable_web_page_preview=True,
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
                  InlineKeyboardButton("ᴄʟᴏꜱᴇ", callback_data='close')]
             ])
-        )
+        ))
 
     elif data == "about":
-        await query.message.edit_text(
+        await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
             text=ABOUT_TXT.format(first=query.from_user.first_name),
             disable_web_page_preview=True,
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton('ʜᴏᴍᴇ', callback_data='start'),
                  InlineKeyboardButton('ᴄʟᴏꜱᴇ', callback_data='close')]
             ])
-        )
+        ))
 
     elif data == "start":
-        await query.message.edit_text(
+        await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
             text=START_MSG.format(first=query.from_user.first_name),
             disable_web_page_preview=True,
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("ʜᴇʟᴘ", callback_data='help'),
                  InlineKeyboardButton("ᴀʙᴏᴜᴛ", callback_data='about')]
             ])
-        )
+        ))
 
     elif data == "close":
-        await query.message.delete()
+        await outbound.call(DELETES, query.message.chat.id, lambda: query.message.delete())
         try:
-            await query.message.reply_to_message.delete()
+            await outbound.call(DELETES, query.message.reply_to_message.chat.id, lambda: query.message.reply_to_message.delete())
         except:
             pass
 
+    elif data.startswith("more_"):
+        user_id = query.from_user.id
+        if await db.ban_user_exist(user_id):
+            return await query.answer("You are banned from using this bot.", show_alert=True)
+        # Same force-sub check as /start, before the cursor is used up so
+        # the button works again once the user has joined
+        if not await is_subscribed(client, user_id):
+            return await query.answer("Join the update channels first, then tap this button again.", show_alert=True)
+        cursor = take_cursor(data[len("more_"):], user_id)
+        if cursor is None:
+            return await query.answer("This link has expired, open it again.", show_alert=True)
+        await query.answer()
+        try:
+            await outbound.call(DELETES, query.message.chat.id, lambda: query.message.delete())
+        except Exception:
+            pass
+        ids, reload_url = cursor
+        await deliver_files(client, user_id, ids, reload_url)
+
+    elif data.startswith("banlist_") or data.startswith("admins_"):
+        if not await check_admin(None, client, query):
+            return await query.answer("Admins only.", show_alert=True)
+        prefix, page = data.rsplit("_", 1)
+        if prefix == "banlist":
+            user_ids, title = await db.get_ban_users(), BANLIST_TITLE
+        else:
+            user_ids, title = await db.get_all_admins(), ADMINS_TITLE
+        text, reply_markup = await user_list_page(client, user_ids, int(page), title, prefix)
+        try:
+            await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(text, disable_web_page_preview=True, reply_markup=reply_markup))
+        except Exception:
+            pass
+        await query.answer()
+
+    elif data.startswith("srch_"):
+        if not await check_admin(None, client, query):
+            return await query.answer("Admins only.", show_alert=True)
+        _, key, before = data.split("_", 2)
+        search = SEARCH_QUERIES.get(key)
+        if search is None:
+            return await query.answer("This search has expired, run /search again.", show_alert=True)
+        try:
+            text, reply_markup = await search_page(client, search, int(before))
+            await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(text, disable_web_page_preview=True, reply_markup=reply_markup))
+        except Exception:
+            return await query.answer("Search is unavailable right now.", show_alert=True)
+        await query.answer()
+
     elif data.startswith("rfs_ch_"):
         cid = int(data.split("_")[2])
         try:
@@ -65,10 +116,10 @@ async def cb_handler(client: Bot, query: CallbackQuery):
                 [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfs_toggle_{cid}_{new_mode}")],
                 [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="fsub_back")]
             ]
-            await query.message.edit_text(
+            await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
                 f"Channel: {chat.title}\nCurrent Force-Sub Mode: {status}",
                 reply_markup=InlineKeyboardMarkup(buttons)
-            )
+            ))
         except Exception:
             await query.answer("Failed to fetch channel info", show_alert=True)
 
@@ -88,24 +139,24 @@ async def cb_handler(client: Bot, query: CallbackQuery):
             [InlineKeyboardButton(f"ʀᴇǫ ᴍᴏᴅᴇ {'OFF' if mode == 'on' else 'ON'}", callback_data=f"rfs_toggle_{cid}_{new_mode}")],
             [InlineKeyboardButton("‹ ʙᴀᴄᴋ", callback_data="fsub_back")]
         ]
-        await query.message.edit_text(
+        await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
             f"Channel: {chat.title}\nCurrent Force-Sub Mode: {status}",
             reply_markup=InlineKeyboardMarkup(buttons)
-        )
+        ))
 
     elif data == "fsub_back":
-        channels = await db.show_channels()
+        snapshot = await db.get_fsub_snapshot()
         buttons = []
-        for cid in channels:
+        for cid in snapshot.ids:
             try:
                 chat = await client.get_chat(cid)
-                mode = await db.get_channel_mode(cid)
+                mode = snapshot.mode(cid)
                 status = "🟢" if mode == "on" else "🔴"
                 buttons.append([InlineKeyboardButton(f"{status} {chat.title}", callback_data=f"rfs_ch_{cid}")])
             except:
                 continue
 
-        await query.message.edit_text(
+        await outbound.call(INTERACTIVE, query.message.chat.id, lambda: query.message.edit_text(
             "sᴇʟᴇᴄᴛ ᴀ ᴄʜᴀɴɴᴇʟ ᴛᴏ ᴛᴏɢɢʟᴇ ɪᴛs ғᴏʀᴄᴇ-sᴜʙ ᴍᴏᴅᴇ:",
             reply_markup=InlineKeyboardMarkup(buttons)
-        )
+        ))
@@ -8,18 +8,29 @@ from pyrogram.errors import FloodWait
 from bot import Bot
 from config import *
 from helper_func import encode, admin
+from ingest import ingestor, find_duplicate, set_channel_button
+from health import tasks
+from outbound import outbound, INTERACTIVE
 
-@Bot.on_message(filters.private & admin & ~filters.command(['start', 'commands','users','broadcast','batch', 'custom_batch', 'genlink','stats', 'dlt_time', 'check_dlt_time', 'dbroadcast', 'ban', 'unban', 'banlist', 'addchnl', 'delchnl', 'listchnl', 'fsub_mode', 'pbroadcast', 'add_admin', 'deladmin', 'admins', 'delreq']))
+@Bot.on_message(filters.private & admin & ~filters.command(['start', 'commands','users','broadcast','batch', 'custom_batch', 'genlink','stats', 'dlt_time', 'check_dlt_time', 'dbroadcast', 'ban', 'unban', 'banlist', 'addchnl', 'delchnl', 'listchnl', 'fsub_mode', 'pbroadcast', 'add_admin', 'deladmin', 'admins', 'delreq', 'queues', 'search', 'backfill', 'dbtop', 'health']))
 async def channel_post(client: Client, message: Message):
-    reply_text = await message.reply_text("Please Wait...!", quote = True)
+    reply_text = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_text("Please Wait...!", quote = True))
+
+    # Same file already in the DB channel: hand out its link instead of storing it again
+    original_id = await find_duplicate(client, message)
+    if original_id:
+        base64_string = await encode(f"get-{original_id * abs(client.db_channel.id)}")
+        link = f"https://t.me/{client.username}?start={base64_string}"
+        reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
+        await outbound.call(INTERACTIVE, reply_text.chat.id, lambda: reply_text.edit(f"<b>Already stored, here is the existing link</b>\n\n{link}", reply_markup=reply_markup, disable_web_page_preview = True))
+        return
+
     try:
-        post_message = await message.copy(chat_id = client.db_channel.id, disable_notification=True)
-    except FloodWait as e:
-        await asyncio.sleep(e.x)
-        post_message = await message.copy(chat_id = client.db_channel.id, disable_notification=True)
+        # Batched with other uploads arriving at the same time, FloodWait is retried
+        post_message = await ingestor.submit(client, message)
     except Exception as e:
-        print(e)
-        await reply_text.edit_text("Something went Wrong..!")
+        LOGGER(__name__).error(f"Failed to store post: {e}")
+        await outbound.call(INTERACTIVE, reply_text.chat.id, lambda: reply_text.edit_text("Something went Wrong..!"))
         return
     converted_id = post_message.id * abs(client.db_channel.id)
     string = f"get-{converted_id}"
@@ -28,7 +39,7 @@ async def channel_post(client: Client, message: Message):
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
 
-    await reply_text.edit(f"<b>Here is your link</b>\n\n{link}", reply_markup=reply_markup, disable_web_page_preview = True)
+    await outbound.call(INTERACTIVE, reply_text.chat.id, lambda: reply_text.edit(f"<b>Here is your link</b>\n\n{link}", reply_markup=reply_markup, disable_web_page_preview = True))
 
     if not DISABLE_CHANNEL_BUTTON:
-        await post_message.edit_reply_markup(reply_markup)
+        tasks.spawn(set_channel_button(post_message, reply_markup), "channel_button")
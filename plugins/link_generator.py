@@ -1,11 +1,16 @@
 #(©)Codexbotz
 
+import asyncio
+import time
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from bot import Bot
 from pyrogram.types import ReplyKeyboardMarkup, ReplyKeyboardRemove
 from asyncio import TimeoutError
 from helper_func import encode, get_message_id, admin
+from database.database import db
+from ingest import ingestor, find_duplicate
+from outbound import outbound, INTERACTIVE
 
 @Bot.on_message(filters.private & admin & filters.command('batch'))
 async def batch(client: Client, message: Message):
@@ -18,7 +23,7 @@ async def batch(client: Client, message: Message):
         if f_msg_id:
             break
         else:
-            await first_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is taken from DB Channel", quote = True)
+            await outbound.call(INTERACTIVE, first_message.chat.id, lambda: first_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is taken from DB Channel", quote = True))
             continue
 
     while True:
@@ -30,7 +35,7 @@ async def batch(client: Client, message: Message):
         if s_msg_id:
             break
         else:
-            await second_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is taken from DB Channel", quote = True)
+            await outbound.call(INTERACTIVE, second_message.chat.id, lambda: second_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is taken from DB Channel", quote = True))
             continue
 
 
@@ -38,7 +43,7 @@ async def batch(client: Client, message: Message):
     base64_string = await encode(string)
     link = f"https://t.me/{client.username}?start={base64_string}"
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
-    await second_message.reply_text(f"<b>Here is your link</b>\n\n{link}", quote=True, reply_markup=reply_markup)
+    await outbound.call(INTERACTIVE, second_message.chat.id, lambda: second_message.reply_text(f"<b>Here is your link</b>\n\n{link}", quote=True, reply_markup=reply_markup))
 
 
 @Bot.on_message(filters.private & admin & filters.command('genlink'))
@@ -52,21 +57,28 @@ async def link_generator(client: Client, message: Message):
         if msg_id:
             break
         else:
-            await channel_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is not taken from DB Channel", quote = True)
+            await outbound.call(INTERACTIVE, channel_message.chat.id, lambda: channel_message.reply("❌ Error\n\nthis Forwarded Post is not from my DB Channel or this Link is not taken from DB Channel", quote = True))
             continue
 
     base64_string = await encode(f"get-{msg_id * abs(client.db_channel.id)}")
     link = f"https://t.me/{client.username}?start={base64_string}"
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
-    await channel_message.reply_text(f"<b>Here is your link</b>\n\n{link}", quote=True, reply_markup=reply_markup)
+    await outbound.call(INTERACTIVE, channel_message.chat.id, lambda: channel_message.reply_text(f"<b>Here is your link</b>\n\n{link}", quote=True, reply_markup=reply_markup))
 
 
 @Bot.on_message(filters.private & admin & filters.command("custom_batch"))
 async def custom_batch(client: Client, message: Message):
+    # /custom_batch [sorted] [title]: files are delivered in the order they
+    # were sent unless "sorted" asks for channel order
+    args = message.command[1:]
+    ordered = bool(args) and args[0].lower() == "sorted"
+    title = " ".join(args[1:] if ordered else args) or None
     collected = []
+    pending = []
+    started = None
     STOP_KEYBOARD = ReplyKeyboardMarkup([["STOP"]], resize_keyboard=True)
 
-    await message.reply("Send all messages you want to include in batch.\n\nPress STOP when you're done.", reply_markup=STOP_KEYBOARD)
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("Send all messages you want to include in batch.\n\nPress STOP when you're done.", reply_markup=STOP_KEYBOARD))
 
     while True:
         try:
@@ -81,24 +93,48 @@ async def custom_batch(client: Client, message: Message):
         if user_msg.text and user_msg.text.strip().upper() == "STOP":
             break
 
+        # Files already in the DB channel are reused, the rest are stored in
+        # the background while the admin keeps sending: (post id, None) for
+        # a reused post, (None, future of the stored post) for a new one
+        original_id = await find_duplicate(client, user_msg)
+        if original_id:
+            pending.append((original_id, None))
+        else:
+            pending.append((None, ingestor.submit(client, user_msg)))
+        if started is None:
+            started = time.monotonic()
+
+    for original_id, future in pending:
+        if future is None:
+            collected.append(original_id)
+            continue
         try:
-            sent = await user_msg.copy(client.db_channel.id, disable_notification=True)
-            collected.append(sent.id)
+            post = await future
         except Exception as e:
-            await message.reply(f"❌ Failed to store a message:\n<code>{e}</code>")
+            await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(f"❌ Failed to store a message:\n<code>{e}</code>"))
             continue
+        collected.append(post.id)
 
-    await message.reply("✅ Batch collection complete.", reply_markup=ReplyKeyboardRemove())
+    report = "✅ Batch collection complete."
+    if collected:
+        elapsed = time.monotonic() - started
+        report += f"\n\n<i>Stored {len(collected)} files in {elapsed:.1f}s ({len(collected) / max(elapsed, 0.001):.1f} files/s)</i>"
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(report, reply_markup=ReplyKeyboardRemove()))
 
     if not collected:
-        await message.reply("❌ No messages were added to batch.")
+        await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("❌ No messages were added to batch."))
         return
 
-    start_id = collected[0] * abs(client.db_channel.id)
-    end_id = collected[-1] * abs(client.db_channel.id)
-    string = f"get-{start_id}-{end_id}"
-    base64_string = await encode(string)
+    # The link carries a short manifest id, so only these exact posts are
+    # delivered even if other posts land in the DB channel between them
+    if ordered:
+        collected.sort()
+    try:
+        batch_id = await db.add_batch(collected, title)
+    except Exception as e:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(f"❌ Could not save the batch, no link was created:\n<code>{e}</code>"))
+    base64_string = await encode(f"batch-{batch_id}")
     link = f"https://t.me/{client.username}?start={base64_string}"
 
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔁 Share URL", url=f'https://telegram.me/share/url?url={link}')]])
-    await message.reply(f"<b>Here is your custom batch link:</b>\n\n{link}", reply_markup=reply_markup)
\ No newline at end of file
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(f"<b>Here is your custom batch link:</b>\n\n{link}", reply_markup=reply_markup))
\ No newline at end of file
@@ -22,6 +22,7 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE, MAINTENANCE
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
 # Ask Doubt on telegram @CodeflixSupport
@@ -38,17 +39,17 @@ from database.database import *
 #Request force sub mode commad,,,,,,
 @Bot.on_message(filters.command('fsub_mode') & filters.private & admin)
 async def change_force_sub_mode(client: Client, message: Message):
-    temp = await message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True)
-    channels = await db.show_channels()
+    temp = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True))
+    snapshot = await db.get_fsub_snapshot()
 
-    if not channels:
-        return await temp.edit("<b>❌ No force-sub channels found.</b>")
+    if not snapshot.ids:
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>❌ No force-sub channels found.</b>"))
 
     buttons = []
-    for ch_id in channels:
+    for ch_id in snapshot.ids:
         try:
             chat = await client.get_chat(ch_id)
-            mode = await db.get_channel_mode(ch_id)
+            mode = snapshot.mode(ch_id)
             status = "🟢" if mode == "on" else "🔴"
             title = f"{status} {chat.title}"
             buttons.append([InlineKeyboardButton(title, callback_data=f"rfs_ch_{ch_id}")])
@@ -57,11 +58,11 @@ async def change_force_sub_mode(client: Client, message: Message):
 
     buttons.append([InlineKeyboardButton("Close ✖️", callback_data="close")])
 
-    await temp.edit(
+    await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(
         "<b>⚡ Select a channel to toggle Force-Sub Mode:</b>",
         reply_markup=InlineKeyboardMarkup(buttons),
         disable_web_page_preview=True
-    )
+    ))
 
 # This handler captures membership updates (like when a user leaves, banned)
 @Bot.on_chat_member_updated()
@@ -77,8 +78,7 @@ async def handle_Chatmembers(client, chat_member_updated: ChatMemberUpdated):
         if old_member.status == ChatMemberStatus.MEMBER:
             user_id = old_member.user.id
 
-            if await db.req_user_exist(chat_id, user_id):
-                await db.del_req_user(chat_id, user_id)
+            await db.del_req_user(chat_id, user_id)
 
 
 # This handler will capture any join request to the channel/group where the bot is an admin
@@ -94,9 +94,10 @@ async def handle_join_request(client, chat_join_request):
     #print(f"Channel {chat_id} exists in the database: {channel_exists}")
 
     if channel_exists:
-        if not await db.req_user_exist(chat_id, user_id):
-            await db.req_user(chat_id, user_id)
-            #print(f"Added user {user_id} to request list for {chat_id}")
+        # A user who cancels and requests again is already listed and not counted twice
+        if await db.req_user(chat_id, user_id) is not False:
+            db.stats.incr('join_requests')
+        #print(f"Added user {user_id} to request list for {chat_id}")
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
 # Ask Doubt on telegram @CodeflixSupport
@@ -113,31 +114,30 @@ async def handle_join_request(client, chat_join_request):
 # Add channel
 @Bot.on_message(filters.command('addchnl') & filters.private & admin)
 async def add_force_sub(client: Client, message: Message):
-    temp = await message.reply("Wait a sec...", quote=True)
+    temp = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("Wait a sec...", quote=True))
     args = message.text.split(maxsplit=1)
 
     if len(args) != 2:
-        return await temp.edit(
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(
             "Usage:\n<code>/addchnl -100xxxxxxxxxx</code>"
-        )
+        ))
 
     try:
         chat_id = int(args[1])
     except ValueError:
-        return await temp.edit("❌ Invalid chat ID!")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("❌ Invalid chat ID!"))
 
-    all_chats = await db.show_channels()
-    if chat_id in [c if isinstance(c, int) else c[0] for c in all_chats]:
-        return await temp.edit(f"Already exists:\n<code>{chat_id}</code>")
+    if await db.channel_exist(chat_id):
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(f"Already exists:\n<code>{chat_id}</code>"))
 
     try:
         chat = await client.get_chat(chat_id)
         if chat.type not in [ChatType.CHANNEL, ChatType.SUPERGROUP]:
-            return await temp.edit("❌ Only channels/supergroups allowed.")
+            return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("❌ Only channels/supergroups allowed."))
 
         bot_member = await client.get_chat_member(chat.id, "me")
         if bot_member.status not in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
-            return await temp.edit("❌ Bot must be admin in that chat.")
+            return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("❌ Bot must be admin in that chat."))
 
         # Try to get invite link
         try:
@@ -146,15 +146,15 @@ async def add_force_sub(client: Client, message: Message):
             link = f"https://t.me/{chat.username}" if chat.username else f"https://t.me/c/{str(chat.id)[4:]}"
 
         await db.add_channel(chat_id)
-        return await temp.edit(
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(
             f"✅ Added Successfully!\n\n"
             f"<b>Name:</b> <a href='{link}'>{chat.title}</a>\n"
             f"<b>ID:</b> <code>{chat_id}</code>",
             disable_web_page_preview=True
-        )
+        ))
 
     except Exception as e:
-        return await temp.edit(f"❌ Failed to add chat:\n<code>{chat_id}</code>\n\n<i>{e}</i>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(f"❌ Failed to add chat:\n<code>{chat_id}</code>\n\n<i>{e}</i>"))
 
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
@@ -172,39 +172,39 @@ async def add_force_sub(client: Client, message: Message):
 # Delete channel
 @Bot.on_message(filters.command('delchnl') & filters.private & admin)
 async def del_force_sub(client: Client, message: Message):
-    temp = await message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True)
+    temp = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True))
     args = message.text.split(maxsplit=1)
     all_channels = await db.show_channels()
 
     if len(args) != 2:
-        return await temp.edit("<b>Usage:</b> <code>/delchnl <channel_id | all></code>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>Usage:</b> <code>/delchnl <channel_id | all></code>"))
 
     if args[1].lower() == "all":
         if not all_channels:
-            return await temp.edit("<b>❌ No force-sub channels found.</b>")
+            return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>❌ No force-sub channels found.</b>"))
         for ch_id in all_channels:
-            await db.del_channel(ch_id)
-        return await temp.edit("<b>✅ All force-sub channels have been removed.</b>")
+            await db.rem_channel(ch_id)
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>✅ All force-sub channels have been removed.</b>"))
 
     try:
         ch_id = int(args[1])
     except ValueError:
-        return await temp.edit("<b>❌ Invalid Channel ID</b>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>❌ Invalid Channel ID</b>"))
 
     if ch_id in all_channels:
         await db.rem_channel(ch_id)
-        return await temp.edit(f"<b>✅ Channel removed:</b> <code>{ch_id}</code>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(f"<b>✅ Channel removed:</b> <code>{ch_id}</code>"))
     else:
-        return await temp.edit(f"<b>❌ Channel not found in force-sub list:</b> <code>{ch_id}</code>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(f"<b>❌ Channel not found in force-sub list:</b> <code>{ch_id}</code>"))
 
 # View all channels
 @Bot.on_message(filters.command('listchnl') & filters.private & admin)
 async def list_force_sub_channels(client: Client, message: Message):
-    temp = await message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True)
+    temp = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>", quote=True))
     channels = await db.show_channels()
 
     if not channels:
-        return await temp.edit("<b>❌ No force-sub channels found.</b>")
+        return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit("<b>❌ No force-sub channels found.</b>"))
 
     result = "<b>⚡ Force-sub Channels:</b>\n\n"
     for ch_id in channels:
@@ -215,7 +215,7 @@ async def list_force_sub_channels(client: Client, message: Message):
         except Exception:
             result += f"<b>•</b> <code>{ch_id}</code> — <i>Unavailable</i>\n"
 
-    await temp.edit(result, disable_web_page_preview=True, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Close ✖️", callback_data="close")]]))
+    await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(result, disable_web_page_preview=True, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Close ✖️", callback_data="close")]])))
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
 # Ask Doubt on telegram @CodeflixSupport
@@ -232,21 +232,20 @@ async def list_force_sub_channels(client: Client, message: Message):
 @Bot.on_message(filters.command('delreq') & filters.private & admin)
 async def delete_requested_users(client, message: Message):
     if len(message.command) < 2:
-        return await message.reply("⚠️ Usᴀɢᴇ: `/delreq <channel_id>`", quote=True)
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("⚠️ Usᴀɢᴇ: `/delreq <channel_id>`", quote=True))
 
     try:
         channel_id = int(message.command[1])
     except ValueError:
-        return await message.reply("❌ Iɴᴠᴀʟɪᴅ ᴄʜᴀɴɴᴇʟ ID.", quote=True)
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("❌ Iɴᴠᴀʟɪᴅ ᴄʜᴀɴɴᴇʟ ID.", quote=True))
 
     # Get channel request data
-    channel_data = await db.rqst_fsub_Channel_data.find_one({'_id': channel_id})
-    if not channel_data:
-        return await message.reply("ℹ️ Nᴏ ʀᴇǫᴜᴇsᴛ ᴄʜᴀɴɴᴇʟ ғᴏᴜɴᴅ ғᴏʀ ᴛʜɪs ᴄʜᴀɴɴᴇʟ.", quote=True)
+    user_ids = await db.get_req_users(channel_id)
+    if user_ids is None:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("ℹ️ Nᴏ ʀᴇǫᴜᴇsᴛ ᴄʜᴀɴɴᴇʟ ғᴏᴜɴᴅ ғᴏʀ ᴛʜɪs ᴄʜᴀɴɴᴇʟ.", quote=True))
 
-    user_ids = channel_data.get("user_ids", [])
     if not user_ids:
-        return await message.reply("✅ Nᴏ ᴜsᴇʀs ᴛᴏ ᴘʀᴏᴄᴇss.", quote=True)
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("✅ Nᴏ ᴜsᴇʀs ᴛᴏ ᴘʀᴏᴄᴇss.", quote=True))
 
     removed = 0
     skipped = 0
@@ -254,7 +253,7 @@ async def delete_requested_users(client, message: Message):
 
     for user_id in user_ids:
         try:
-            member = await client.get_chat_member(channel_id, user_id)
+            member = await outbound.call(MAINTENANCE, None, lambda: client.get_chat_member(channel_id, user_id))
             if member.status in (
                 ChatMemberStatus.MEMBER,
                 ChatMemberStatus.ADMINISTRATOR,
@@ -269,7 +268,7 @@ async def delete_requested_users(client, message: Message):
             await db.del_req_user(channel_id, user_id)
             left_users += 1
         except Exception as e:
-            print(f"[!] Error checking user {user_id}: {e}")
+            LOGGER(__name__).warning(f"Error checking user {user_id}: {e}")
             skipped += 1
 
     for user_id in user_ids:
@@ -277,13 +276,13 @@ async def delete_requested_users(client, message: Message):
             await db.del_req_user(channel_id, user_id)
             removed += 1
 
-    return await message.reply(
+    return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(
         f"✅ Cʟᴇᴀɴᴜᴘ ᴄᴏᴍᴘʟᴇᴛᴇᴅ ғᴏʀ ᴄʜᴀɴɴᴇʟ `{channel_id}`\n\n"
         f"👤 Rᴇᴍᴏᴠᴇᴅ ᴜsᴇʀs ɴᴏᴛ ɪɴ ᴄʜᴀɴɴᴇʟ: `{left_users}`\n"
         f"🗑️ Rᴇᴍᴏᴠᴇᴅ ʟᴇғᴛᴏᴠᴇʀ ɴᴏɴ-ʀᴇǫᴜᴇsᴛ ᴜsᴇʀs: `{removed}`\n"
         f"✅ Sᴛɪʟʟ ᴍᴇᴍʙᴇʀs: `{skipped}`",
         quote=True
-    )
+    ))
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
 # Ask Doubt on telegram @CodeflixSupport
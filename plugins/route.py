@@ -1,7 +1,236 @@
+import asyncio
+import hmac
+import time
+from collections import OrderedDict
+from urllib.parse import quote
 from aiohttp import web
+from config import *
+from helper_func import decode, check_stream_sig
+from outbound import outbound, INTERACTIVE, LANES
+from chunk_cache import chunk_cache
+from ingest import ingestor
+from database.database import db
+from database.stats import Stats
+from health import loop_monitor
+import metrics
 
 routes = web.RouteTableDef()
 
 @routes.get("/", allow_head=True)
 async def root_route_handler(request):
     return web.json_response("Codeflix FileStore")
+
+
+#=====================================================================================##
+
+EVENTS = metrics.Counter('filestore_events_total', "Bot activity counted by /stats since the first start.", ['event'])
+FLOOD_WAITS = metrics.Counter('filestore_flood_waits_total', "FloodWait errors raised by outbound calls.")
+FLOOD_SECONDS = metrics.Counter('filestore_flood_wait_seconds_total', "Seconds of FloodWait requested by Telegram.")
+OUTBOUND_QUEUED = metrics.Gauge('filestore_outbound_queued_calls', "Bot API calls waiting in each outbound lane.", ['lane'])
+OUTBOUND_SENT = metrics.Counter('filestore_outbound_calls_total', "Bot API calls let through by each outbound lane.", ['lane'])
+OUTBOUND_INFLIGHT = metrics.Gauge('filestore_outbound_inflight_calls', "Bot API calls running right now.")
+INGESTED = metrics.Counter('filestore_ingested_files_total', "Admin uploads stored in the DB channel.", ['result'])
+CACHE_LOOKUPS = metrics.Counter('filestore_cache_lookups_total', "Cache lookups by cache and outcome.", ['cache', 'result'])
+CACHE_BYTES = metrics.Gauge('filestore_chunk_cache_bytes', "Size of the streamed file parts kept on disk.")
+DB_BREAKER_OPEN = metrics.Gauge('filestore_db_circuit_open', "1 while the database circuit breaker is open.")
+DB_SPILLED = metrics.Gauge('filestore_db_spilled_writes', "Writes buffered while the database is unreachable.")
+STREAMS = metrics.Gauge('filestore_http_streams', "File downloads being served over HTTP.")
+
+
+@metrics.collector
+def collect():
+    for event in Stats.FIELDS:
+        EVENTS.values[(event,)] = db.stats.totals[event]
+    FLOOD_WAITS.values[()] = outbound.flood_waits
+    FLOOD_SECONDS.values[()] = outbound.flood_seconds
+    depths = outbound.depths()
+    for i, lane in enumerate(LANES):
+        OUTBOUND_QUEUED.set(depths[lane], lane=lane)
+        OUTBOUND_SENT.values[(lane,)] = outbound.sent[i]
+    OUTBOUND_INFLIGHT.set(outbound.inflight)
+    INGESTED.values[('stored',)] = ingestor.stored
+    INGESTED.values[('failed',)] = ingestor.failed
+    for cache, hits, misses in (
+        ('batch', db.batch_hits, db.batch_misses),
+        ('chunk', chunk_cache.hits, chunk_cache.misses + chunk_cache.coalesced),
+    ):
+        CACHE_LOOKUPS.values[(cache, 'hit')] = hits
+        CACHE_LOOKUPS.values[(cache, 'miss')] = misses
+    CACHE_BYTES.set(chunk_cache.size)
+    DB_BREAKER_OPEN.set(int(db.breaker.state != "closed"))
+    DB_SPILLED.set(len(db.spill))
+    STREAMS.set(active_streams)
+
+
+def check_token(request):
+    if METRICS_TOKEN:
+        given = request.headers.get('Authorization', "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(given, METRICS_TOKEN):
+            raise web.HTTPUnauthorized()
+
+
+@routes.get("/metrics")
+async def metrics_handler(request):
+    check_token(request)
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                        headers={'Cache-Control': "no-store"})
+
+
+@routes.get("/health")
+async def health_handler(request):
+    check_token(request)
+    return web.json_response(loop_monitor.report(), headers={'Cache-Control': "no-store"})
+
+
+#=====================================================================================##
+
+# Direct downloads of stored files. The file is read from Telegram one part at
+# a time and each part is written to the client before the next is requested,
+# so a slow reader slows the download instead of filling memory. With the chunk
+# cache enabled the parts are read through it instead.
+CHUNK = 1024 * 1024  # stream_media part size
+MEDIA_TTL = 600
+MEDIA_CACHE_SIZE = 256
+
+media_cache = OrderedDict()  # post id -> (expires, message), spares a lookup per seek
+active_streams = 0
+active_by_ip = {}
+
+
+async def stored_media(bot, msg_id):
+    cached = media_cache.get(msg_id)
+    if cached and cached[0] > time.monotonic():
+        media_cache.move_to_end(msg_id)
+        return cached[1]
+    message = await outbound.call(INTERACTIVE, None, lambda: bot.get_messages(bot.db_channel.id, msg_id))
+    if message.empty or not message.media or not getattr(getattr(message, message.media.value, None), 'file_size', None):
+        message = None
+    media_cache[msg_id] = (time.monotonic() + MEDIA_TTL, message)
+    media_cache.move_to_end(msg_id)
+    while len(media_cache) > MEDIA_CACHE_SIZE:
+        media_cache.popitem(last=False)
+    return message
+
+
+def byte_range(request, size):
+    # (start, stop, partial) of the bytes to send, stop exclusive. A missing,
+    # malformed or multi-part Range header gets the whole file with a 200
+    try:
+        requested = request.http_range
+    except ValueError:
+        return 0, size, False
+    start, stop = requested.start, requested.stop
+    if start is None:
+        return 0, size, False
+    if start < 0:  # bytes=-N, the last N bytes
+        start, stop = max(0, size + start), size
+    stop = size if stop is None else min(stop, size)
+    return (start, stop, True) if start < stop else None
+
+
+@routes.get("/file/{code}", allow_head=True)
+async def stream_file(request):
+    global active_streams
+    code = request.match_info['code']
+    if not check_stream_sig(code, request.query.get('exp', ''), request.query.get('sig', '')):
+        raise web.HTTPForbidden(text="This link is invalid or has expired.")
+
+    bot = request.app['bot']
+    try:
+        argument = (await decode(code)).split("-")
+        msg_id = int(int(argument[1]) / abs(bot.db_channel.id))
+    except Exception:
+        raise web.HTTPNotFound()
+    try:
+        message = await stored_media(bot, msg_id)
+    except Exception as e:
+        bot.LOGGER(__name__).warning(f"Could not load post {msg_id} for streaming: {e}")
+        raise web.HTTPServiceUnavailable(headers={'Retry-After': '30'})
+    if message is None:
+        raise web.HTTPNotFound()
+
+    media = getattr(message, message.media.value)
+    size = media.file_size
+    span = byte_range(request, size)
+    if span is None:
+        raise web.HTTPRequestRangeNotSatisfiable(headers={'Content-Range': f"bytes */{size}"})
+    start, stop, partial = span
+
+    ip = request.remote
+    if active_streams >= STREAM_MAX_CONCURRENT or active_by_ip.get(ip, 0) >= STREAM_PER_IP:
+        raise web.HTTPServiceUnavailable(text="Too many downloads right now, try again shortly.", headers={'Retry-After': '10'})
+    active_streams += 1
+    active_by_ip[ip] = active_by_ip.get(ip, 0) + 1
+    try:
+        name = getattr(media, 'file_name', None) or f"{message.media.value}_{msg_id}"
+        response = web.StreamResponse(status=206 if partial else 200, headers={
+            'Content-Type': getattr(media, 'mime_type', None) or "application/octet-stream",
+            'Content-Disposition': f"attachment; filename*=UTF-8''{quote(name)}",
+            'Accept-Ranges': "bytes",
+        })
+        response.content_length = stop - start
+        if partial:
+            response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+        await response.prepare(request)
+        if request.method == "HEAD":
+            return response
+
+        try:
+            if chunk_cache.enabled:
+                await send_cached(request, bot, message, media.file_unique_id, start, stop)
+            else:
+                await send_streamed(response, bot, message, start, stop)
+        except (ConnectionResetError, ConnectionError):
+            pass  # the client went away
+        except Exception as e:
+            # The headers are already out, so the client can only learn of the
+            # failure from the connection closing short of Content-Length
+            bot.LOGGER(__name__).warning(f"Streaming post {msg_id} failed: {e}")
+            if request.transport is not None:
+                request.transport.close()
+        return response
+    finally:
+        active_streams -= 1
+        left = active_by_ip[ip] - 1
+        if left:
+            active_by_ip[ip] = left
+        else:
+            del active_by_ip[ip]
+
+
+async def send_streamed(response, bot, message, start, stop):
+    first = start // CHUNK
+    skip = start - first * CHUNK
+    remaining = stop - start
+    stream = bot.stream_media(message, limit=(stop - 1) // CHUNK - first + 1, offset=first)
+    try:
+        async for chunk in stream:
+            if skip:
+                chunk, skip = chunk[skip:], 0
+            chunk = chunk[:remaining]
+            await response.write(chunk)  # waits while the client is behind
+            remaining -= len(chunk)
+            if remaining <= 0:
+                break
+    finally:
+        await stream.aclose()
+
+
+async def send_cached(request, bot, message, unique_id, start, stop):
+    # Each part comes from the chunk cache and goes to the socket with
+    # sendfile, while the next part is already being fetched
+    loop = asyncio.get_running_loop()
+    index = start // CHUNK
+    while start < stop:
+        part = await chunk_cache.open(bot, message, unique_id, index)
+        if (index + 1) * CHUNK < stop:
+            chunk_cache.prefetch(bot, message, unique_id, index + 1)
+        count = min(stop, (index + 1) * CHUNK) - start
+        try:
+            if request.transport is None:
+                raise ConnectionResetError("Connection lost")
+            await loop.sendfile(request.transport, part, start - index * CHUNK, count)
+        finally:
+            part.close()
+        start += count
+        index += 1
@@ -0,0 +1,56 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+from pyrogram import filters
+from pyrogram.types import Message, InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from bot import Bot
+from config import *
+from helper_func import *
+from database.database import *
+from outbound import outbound, INTERACTIVE
+
+
+# Look up stored files by name or caption, answered from the files index
+# without touching Telegram
+@Bot.on_message(filters.command('search') & filters.private & admin)
+async def search_files(client: Bot, message: Message):
+    query = message.text.split(maxsplit=1)[1].strip() if len(message.command) > 1 else ""
+    if not query:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Usage:</b> <code>/search file name or caption words</code>", quote=True))
+    try:
+        text, reply_markup = await search_page(client, query)
+    except DatabaseUnavailable:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Sᴇᴀʀᴄʜ ɪs ᴜɴᴀᴠᴀɪʟᴀʙʟᴇ ʀɪɢʜᴛ ɴᴏᴡ, ᴛʀʏ ᴀɢᴀɪɴ sʜᴏʀᴛʟʏ.</b>", quote=True))
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(text, reply_markup=reply_markup, disable_web_page_preview=True, quote=True))
+
+
+# @botusername <words> from any chat; offset carries the keyset cursor
+@Bot.on_inline_query()
+async def inline_search(client: Bot, inline_query: InlineQuery):
+    query = inline_query.query.strip()
+    if not query or not await check_admin(None, client, inline_query):
+        return await inline_query.answer([], cache_time=5, is_personal=True)
+
+    before = int(inline_query.offset) if inline_query.offset.isdigit() else None
+    try:
+        docs = await db.search_files(query, before, 50)
+    except DatabaseUnavailable:
+        return await inline_query.answer([], cache_time=5, is_personal=True)
+
+    results = []
+    for doc in docs:
+        link = await file_link(client, doc['_id'])
+        details = " · ".join(x for x in (humanbytes(doc.get('file_size')), doc.get('mime_type')) if x)
+        results.append(InlineQueryResultArticle(
+            title=file_title(doc),
+            description=details or (doc.get('caption') or "")[:100],
+            input_message_content=InputTextMessageContent(link, disable_web_page_preview=True),
+            id=str(doc['_id']),
+        ))
+
+    await inline_query.answer(
+        results,
+        cache_time=30,
+        is_personal=True,
+        next_offset=str(docs[-1]['_id']) if len(docs) == 50 else "",
+    )
@@ -12,6 +12,7 @@
 
 import asyncio
 import os
+from html import escape
 import random
 import sys
 import time
@@ -25,6 +26,9 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE, DELETES
+from metrics import AUTO_DELETE_PENDING, span
+from health import tasks
 
 BAN_SUPPORT = f"{BAN_SUPPORT}"
 
@@ -32,31 +36,26 @@ BAN_SUPPORT = f"{BAN_SUPPORT}"
 async def start_command(client: Client, message: Message):
     user_id = message.from_user.id
 
-    # Add user if not already present
-    if not await db.present_user(user_id):
-        try:
-            await db.add_user(user_id)
-        except:
-            pass
+    # Add user if not already present (single upsert)
+    try:
+        await db.add_user(user_id)
+    except:
+        pass
 
     # Check if user is banned
-    banned_users = await db.get_ban_users()
-    if user_id in banned_users:
-        return await message.reply_text(
+    if await db.ban_user_exist(user_id):
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_text(
             "<b>⛔️ You are Bᴀɴɴᴇᴅ from using this bot.</b>\n\n"
             "<i>Contact support if you think this is a mistake.</i>",
             reply_markup=InlineKeyboardMarkup(
                 [[InlineKeyboardButton("Contact Support", url=BAN_SUPPORT)]]
             )
-        )
+        ))
     # ✅ Check Force Subscription
     if not await is_subscribed(client, user_id):
         #await temp.delete()
         return await not_joined(client, message)
 
-    # File auto-delete time in seconds (Set your desired time in seconds here)
-    FILE_AUTO_DELETE = await db.get_del_timer()  # Example: 3600 seconds (1 hour)
-
     # Handle normal message flow
     text = message.text
     if len(text) > 7:
@@ -69,63 +68,41 @@ async def start_command(client: Client, message: Message):
         argument = string.split("-")
 
         ids = []
-        if len(argument) == 3:
+        title = None
+        if argument[0] == "batch" and len(argument) == 2:
+            try:
+                manifest = await db.get_batch(argument[1])
+            except DatabaseUnavailable:
+                return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_text("<b>Sᴇʀᴠɪᴄᴇ ɪs ʙᴜsʏ, ᴘʟᴇᴀsᴇ ᴛʀʏ ᴀɢᴀɪɴ ɪɴ ᴀ ғᴇᴡ sᴇᴄᴏɴᴅs.</b>"))
+            if not manifest:
+                return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_text("<b>This batch link is invalid or was removed.</b>"))
+            ids, title = manifest['ids'], manifest.get('title')
+
+        elif len(argument) == 3:
             try:
                 start = int(int(argument[1]) / abs(client.db_channel.id))
                 end = int(int(argument[2]) / abs(client.db_channel.id))
-                ids = range(start, end + 1) if start <= end else list(range(start, end - 1, -1))
+                ids = range(start, end + 1) if start <= end else range(start, end - 1, -1)
             except Exception as e:
-                print(f"Error decoding IDs: {e}")
+                LOGGER(__name__).warning(f"Error decoding IDs: {e}")
                 return
 
         elif len(argument) == 2:
             try:
                 ids = [int(int(argument[1]) / abs(client.db_channel.id))]
             except Exception as e:
-                print(f"Error decoding ID: {e}")
+                LOGGER(__name__).warning(f"Error decoding ID: {e}")
                 return
 
-        temp_msg = await message.reply("<b>Please wait...</b>")
-        try:
-            messages = await get_messages(client, ids)
-        except Exception as e:
-            await message.reply_text("Something went wrong!")
-            print(f"Error getting messages: {e}")
-            return
-        finally:
-            await temp_msg.delete()
- 
-        codeflix_msgs = []
-        for msg in messages:
-            caption = (CUSTOM_CAPTION.format(previouscaption="" if not msg.caption else msg.caption.html, 
-                                             filename=msg.document.file_name) if bool(CUSTOM_CAPTION) and bool(msg.document)
-                       else ("" if not msg.caption else msg.caption.html))
-            reply_markup = msg.reply_markup if DISABLE_CHANNEL_BUTTON else None
-            try:
-                copied_msg = await msg.copy(
-                    chat_id=message.from_user.id,
-                    caption=caption,
-                    parse_mode=ParseMode.HTML,
-                    reply_markup=reply_markup,
-                    protect_content=PROTECT_CONTENT
-                )
-                await asyncio.sleep(0.1)
-                codeflix_msgs.append(copied_msg)
-            except Exception as e:
-                print(f"Failed to send message: {e}")
-
-        if FILE_AUTO_DELETE > 0:
-            notification_msg = await message.reply(
-                f"<b>Tʜɪs Fɪʟᴇ ᴡɪʟʟ ʙᴇ Dᴇʟᴇᴛᴇᴅ ɪɴ  {get_exp_time(FILE_AUTO_DELETE)}. Pʟᴇᴀsᴇ sᴀᴠᴇ ᴏʀ ғᴏʀᴡᴀʀᴅ ɪᴛ ᴛᴏ ʏᴏᴜʀ sᴀᴠᴇᴅ ᴍᴇssᴀɢᴇs ʙᴇғᴏʀᴇ ɪᴛ ɢᴇᴛs Dᴇʟᴇᴛᴇᴅ.</b>"
-            )
-            reload_url = (
-                f"https://t.me/{client.username}?start={message.command[1]}"
-                if message.command and len(message.command) > 1
-                else None
-            )
-            asyncio.create_task(
-                schedule_auto_delete(client, codeflix_msgs, notification_msg, FILE_AUTO_DELETE, reload_url)
-            )
+        reload_url = (
+            f"https://t.me/{client.username}?start={message.command[1]}"
+            if message.command and len(message.command) > 1
+            else None
+        )
+        db.stats.incr('deliveries')
+        if title:
+            await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_text(f"<b>📦 {escape(title)}</b> — <code>{len(ids)}</code> ғɪʟᴇs"))
+        await deliver_files(client, user_id, ids, reload_url)
     else:
         reply_markup = InlineKeyboardMarkup(
             [
@@ -138,7 +115,7 @@ async def start_command(client: Client, message: Message):
     ]
             ]
         )
-        await message.reply_photo(
+        await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_photo(
             photo=START_PIC,
             caption=START_MSG.format(
                 first=message.from_user.first_name,
@@ -148,7 +125,7 @@ async def start_command(client: Client, message: Message):
                 id=message.from_user.id
             ),
             reply_markup=reply_markup,
-            message_effect_id=5104841245755180586)  # 🔥
+            message_effect_id=5104841245755180586))  # 🔥
         
         return
 
@@ -164,20 +141,20 @@ async def start_command(client: Client, message: Message):
 chat_data_cache = {}
 
 async def not_joined(client: Client, message: Message):
-    temp = await message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>")
+    temp = await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b><i>ᴡᴀɪᴛ ᴀ sᴇᴄ..</i></b>"))
 
     user_id = message.from_user.id
     buttons = []
     count = 0
 
     try:
-        all_channels = await db.show_channels()  # Should return list of (chat_id, mode) tuples
-        for total, chat_id in enumerate(all_channels, start=1):
-            mode = await db.get_channel_mode(chat_id)  # fetch mode 
+        snapshot = await db.get_fsub_snapshot()  # ids and modes from one cached query
+        for total, chat_id in enumerate(snapshot.ids, start=1):
+            mode = snapshot.mode(chat_id)
 
             await message.reply_chat_action(ChatAction.TYPING)
 
-            if not await is_sub(client, user_id, chat_id):
+            if not await is_sub(client, user_id, chat_id, mode):
                 try:
                     # Cache chat info
                     if chat_id in chat_data_cache:
@@ -190,32 +167,32 @@ async def not_joined(client: Client, message: Message):
 
                     # Generate proper invite link based on the mode
                     if mode == "on" and not data.username:
-                        invite = await client.create_chat_invite_link(
+                        invite = await outbound.call(INTERACTIVE, None, lambda: client.create_chat_invite_link(
                             chat_id=chat_id,
                             creates_join_request=True,
                             expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None
-                            )
+                            ))
                         link = invite.invite_link
 
                     else:
                         if data.username:
                             link = f"https://t.me/{data.username}"
                         else:
-                            invite = await client.create_chat_invite_link(
+                            invite = await outbound.call(INTERACTIVE, None, lambda: client.create_chat_invite_link(
                                 chat_id=chat_id,
-                                expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None)
+                                expire_date=datetime.utcnow() + timedelta(seconds=FSUB_LINK_EXPIRY) if FSUB_LINK_EXPIRY else None))
                             link = invite.invite_link
 
                     buttons.append([InlineKeyboardButton(text=name, url=link)])
                     count += 1
-                    await temp.edit(f"<b>{'! ' * count}</b>")
+                    await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(f"<b>{'! ' * count}</b>"))
 
                 except Exception as e:
-                    print(f"Error with chat {chat_id}: {e}")
-                    return await temp.edit(
+                    LOGGER(__name__).warning(f"Error with chat {chat_id}: {e}")
+                    return await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(
                         f"<b><i>! Eʀʀᴏʀ, Cᴏɴᴛᴀᴄᴛ ᴅᴇᴠᴇʟᴏᴘᴇʀ ᴛᴏ sᴏʟᴠᴇ ᴛʜᴇ ɪssᴜᴇs @rohit_1888</i></b>\n"
                         f"<blockquote expandable><b>Rᴇᴀsᴏɴ:</b> {e}</blockquote>"
-                    )
+                    ))
 
         # Retry Button
         try:
@@ -228,7 +205,7 @@ async def not_joined(client: Client, message: Message):
         except IndexError:
             pass
 
-        await message.reply_photo(
+        await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply_photo(
             photo=FORCE_PIC,
             caption=FORCE_MSG.format(
                 first=message.from_user.first_name,
@@ -238,39 +215,111 @@ async def not_joined(client: Client, message: Message):
                 id=message.from_user.id
             ),
             reply_markup=InlineKeyboardMarkup(buttons),
-        )
+        ))
 
     except Exception as e:
-        print(f"Final Error: {e}")
-        await temp.edit(
+        LOGGER(__name__).error(f"Final Error: {e}")
+        await outbound.call(INTERACTIVE, temp.chat.id, lambda: temp.edit(
             f"<b><i>! Eʀʀᴏʀ, Cᴏɴᴛᴀᴄᴛ ᴅᴇᴠᴇʟᴏᴘᴇʀ ᴛᴏ sᴏʟᴠᴇ ᴛʜᴇ ɪssᴜᴇs @XenohContactbot</i></b>\n"
             f"<blockquote expandable><b>Rᴇᴀsᴏɴ:</b> {e}</blockquote>"
-        )
+        ))
 
 #=====================================================================================##
 
 @Bot.on_message(filters.command('commands') & filters.private & admin)
 async def bcmd(bot: Bot, message: Message):        
     reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("• ᴄʟᴏsᴇ •", callback_data = "close")]])
-    await message.reply(text=CMD_TXT, reply_markup = reply_markup, quote= True)
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(text=CMD_TXT, reply_markup = reply_markup, quote= True))
+
+async def deliver_files(client, user_id, ids, reload_url):
+    """Copy the next page of `ids` to the user; the rest waits behind a Next button."""
+    page = ids[:DELIVERY_PAGE_SIZE] if DELIVERY_PAGE_SIZE else ids
+    rest = ids[len(page):]
+
+    temp_msg = await outbound.call(INTERACTIVE, user_id, lambda: client.send_message(user_id, "<b>Please wait...</b>"))
+    try:
+        messages = await get_messages(client, page)
+    except Exception as e:
+        await outbound.call(INTERACTIVE, user_id, lambda: client.send_message(user_id, "Something went wrong!"))
+        LOGGER(__name__).error(f"Error getting messages: {e}")
+        return
+    finally:
+        await outbound.call(DELETES, temp_msg.chat.id, lambda: temp_msg.delete())
+
+    codeflix_msgs = []
+    served = []
+    with span('copy_loop'):
+        for msg in messages:
+            caption = (CUSTOM_CAPTION.format(previouscaption="" if not msg.caption else msg.caption.html, 
+                                             filename=msg.document.file_name) if bool(CUSTOM_CAPTION) and bool(msg.document)
+                       else ("" if not msg.caption else msg.caption.html))
+            reply_markup = msg.reply_markup if DISABLE_CHANNEL_BUTTON else None
+            if STREAM_URL and not PROTECT_CONTENT and msg.media:
+                rows = list(reply_markup.inline_keyboard) if reply_markup else []
+                rows.append([InlineKeyboardButton("ᴅᴏᴡɴʟᴏᴀᴅ ʟɪɴᴋ", url=await stream_link(client, msg.id))])
+                reply_markup = InlineKeyboardMarkup(rows)
+            try:
+                # Paced by the outbound scheduler instead of a fixed sleep
+                copied_msg = await outbound.call(INTERACTIVE, user_id, lambda: msg.copy(
+                    chat_id=user_id,
+                    caption=caption,
+                    parse_mode=ParseMode.HTML,
+                    reply_markup=reply_markup,
+                    protect_content=PROTECT_CONTENT
+                ))
+                codeflix_msgs.append(copied_msg)
+                served.append(msg.id)
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to send message: {e}")
+
+    db.stats.incr('files_served', len(codeflix_msgs))
+    db.note_served(served)
+
+    # File auto-delete time in seconds, every page gets its own timer
+    FILE_AUTO_DELETE = await db.get_del_timer()
+    if FILE_AUTO_DELETE > 0:
+        notification_msg = await outbound.call(INTERACTIVE, user_id, lambda: client.send_message(
+            user_id,
+            f"<b>Tʜɪs Fɪʟᴇ ᴡɪʟʟ ʙᴇ Dᴇʟᴇᴛᴇᴅ ɪɴ  {get_exp_time(FILE_AUTO_DELETE)}. Pʟᴇᴀsᴇ sᴀᴠᴇ ᴏʀ ғᴏʀᴡᴀʀᴅ ɪᴛ ᴛᴏ ʏᴏᴜʀ sᴀᴠᴇᴅ ᴍᴇssᴀɢᴇs ʙᴇғᴏʀᴇ ɪᴛ ɢᴇᴛs Dᴇʟᴇᴛᴇᴅ.</b>"
+        ))
+        tasks.spawn(
+            schedule_auto_delete(client, codeflix_msgs, notification_msg, FILE_AUTO_DELETE, reload_url), "auto_delete"
+        )
+
+    if rest:
+        token = save_cursor(user_id, rest, reload_url)
+        await outbound.call(INTERACTIVE, user_id, lambda: client.send_message(
+            user_id,
+            f"<b>{len(rest)} ᴍᴏʀᴇ ғɪʟᴇs ɪɴ ᴛʜɪs ʟɪɴᴋ.</b>",
+            reply_markup=InlineKeyboardMarkup(
+                [[InlineKeyboardButton(f"ɴᴇxᴛ {min(len(rest), DELIVERY_PAGE_SIZE)} »", callback_data=f"more_{token}")]]
+            )
+        ))
 
 async def schedule_auto_delete(client, codeflix_msgs, notification_msg, file_auto_delete, reload_url):
-    await asyncio.sleep(file_auto_delete)
-    for snt_msg in codeflix_msgs:
-        if snt_msg:
+    chat_id = notification_msg.chat.id
+    msg_ids = [snt_msg.id for snt_msg in codeflix_msgs if snt_msg]
+    AUTO_DELETE_PENDING.inc(len(msg_ids))
+    try:
+        await asyncio.sleep(file_auto_delete)
+        # One delete_messages call per 100 ids instead of one call per file
+        for i in range(0, len(msg_ids), 100):
+            chunk = msg_ids[i:i + 100]
             try:
-                await snt_msg.delete()
+                await outbound.call(DELETES, chat_id, lambda: client.delete_messages(chat_id, chunk))
             except Exception as e:
-                print(f"Error deleting message {snt_msg.id}: {e}")
+                LOGGER(__name__).warning(f"Error deleting messages {chunk}: {e}")
+    finally:
+        AUTO_DELETE_PENDING.dec(len(msg_ids))
 
     try:
         keyboard = InlineKeyboardMarkup(
             [[InlineKeyboardButton("ɢᴇᴛ ғɪʟᴇ ᴀɢᴀɪɴ!", url=reload_url)]]
         ) if reload_url else None
 
-        await notification_msg.edit(
+        await outbound.call(DELETES, chat_id, lambda: notification_msg.edit(
             "<b>ʏᴏᴜʀ ᴠɪᴅᴇᴏ / ꜰɪʟᴇ ɪꜱ ꜱᴜᴄᴄᴇꜱꜱꜰᴜʟʟʏ ᴅᴇʟᴇᴛᴇᴅ !!\n\nᴄʟɪᴄᴋ ʙᴇʟᴏᴡ ʙᴜᴛᴛᴏɴ ᴛᴏ ɢᴇᴛ ʏᴏᴜʀ ᴅᴇʟᴇᴛᴇᴅ ᴠɪᴅᴇᴏ / ꜰɪʟᴇ 👇</b>",
             reply_markup=keyboard
-        )
+        ))
     except Exception as e:
-        print(f"Error updating notification with 'Get File Again' button: {e}")
+        LOGGER(__name__).warning(f"Error updating notification with 'Get File Again' button: {e}")
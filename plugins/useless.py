@@ -16,6 +16,7 @@ import random
 import sys
 import time
 from datetime import datetime, timedelta
+from html import escape
 from pyrogram import Client, filters, __version__
 from pyrogram.enums import ParseMode, ChatAction
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, ReplyKeyboardMarkup, ChatInviteLink, ChatPrivileges
@@ -25,6 +26,11 @@ from bot import Bot
 from config import *
 from helper_func import *
 from database.database import *
+from outbound import outbound, INTERACTIVE, LANES
+from ingest import ingestor
+from backfill import backfill
+from metrics import api_summary
+from health import loop_monitor
 
 #=====================================================================================##
 
@@ -32,8 +38,111 @@ from database.database import *
 async def stats(bot: Bot, message: Message):
     now = datetime.now()
     delta = now - bot.uptime
-    time = get_readable_time(delta.seconds)
-    await message.reply(BOT_STATS_TEXT.format(uptime=time))
+    time = get_readable_time(int(delta.total_seconds()))
+    counters = BOT_COUNTERS_TEXT.format(
+        users=await db.count_users(),
+        banned=len(db.ban_cache),
+        today=db.stats.today(),
+        total=db.stats.totals,
+        days=db.stats.keep_days,
+        trend=" ".join(str(n) for n in db.stats.trend('files_served'))
+    )
+    busiest, flood = api_summary()
+    api = "\n\n<b>ᴛᴇʟᴇɢʀᴀᴍ ᴀᴘɪ</b> (ᴄᴀʟʟs · ᴀᴠɢ · ᴇʀʀᴏʀs)\n"
+    api += "\n".join(f"<code>{m}</code>: {n} · {avg * 1000:.0f}ms · {err}" for m, n, avg, err in busiest) or "ɴᴏ ᴄᴀʟʟs ʏᴇᴛ"
+    if flood:
+        api += "\n<b>ғʟᴏᴏᴅᴡᴀɪᴛ ʙʏ sᴏᴜʀᴄᴇ</b>\n" + "\n".join(f"<code>{src}</code>: {sec}s" for src, sec in flood)
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(BOT_STATS_TEXT.format(uptime=time) + "\n" + counters + api))
+
+
+@Bot.on_message(filters.command('queues') & filters.private & admin)
+async def queue_depths(bot: Bot, message: Message):
+    depths = outbound.depths()
+    text = "<b>ᴏᴜᴛʙᴏᴜɴᴅ ǫᴜᴇᴜᴇs</b>\n\n"
+    for i, lane in enumerate(LANES):
+        text += f"{lane}: <code>{depths[lane]}</code> waiting, <code>{outbound.sent[i]}</code> sent\n"
+    text += f"\nɪɴ ғʟɪɢʜᴛ: <code>{outbound.inflight}</code> ᴀᴄʀᴏss <code>{len(outbound.inflight_by_chat)}</code> ᴄʜᴀᴛs"
+    text += f"\nғʟᴏᴏᴅ ᴡᴀɪᴛs: <code>{outbound.flood_waits}</code>"
+    text += (
+        f"\n\n<b>ɪɴɢᴇsᴛ</b>\nǫᴜᴇᴜᴇᴅ: <code>{len(ingestor.queue)}</code>  sᴛᴏʀᴇᴅ: <code>{ingestor.stored}</code>"
+        f"  ғᴀɪʟᴇᴅ: <code>{ingestor.failed}</code>\nʀᴀᴛᴇ: <code>{ingestor.rate():.1f}</code> ғɪʟᴇs/s"
+        f" ɪɴ <code>{ingestor.batches}</code> ʙᴀᴛᴄʜᴇs"
+    )
+    paused = outbound.paused_for()
+    if paused:
+        text += f"\nᴘᴀᴜsᴇᴅ ғᴏʀ: <code>{paused:.0f}s</code>"
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(text))
+
+
+# /backfill shows progress, /backfill start resumes a stopped run and
+# /backfill reset indexes the whole channel again
+@Bot.on_message(filters.command('backfill') & filters.private & admin)
+async def backfill_status(client: Bot, message: Message):
+    action = message.command[1].lower() if len(message.command) > 1 else ""
+    try:
+        if action == "reset":
+            await backfill.reset()
+        if action in ("start", "reset"):
+            backfill.start(client, client.db_channel_tip)
+            await asyncio.sleep(1)  # let it load the checkpoint
+    except DatabaseUnavailable:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Dᴀᴛᴀʙᴀsᴇ ɪs ᴜɴᴀᴠᴀɪʟᴀʙʟᴇ, ᴛʀʏ ᴀɢᴀɪɴ sʜᴏʀᴛʟʏ.</b>"))
+
+    state = "ʀᴜɴɴɪɴɢ" if backfill.running else ("ᴅᴏɴᴇ" if backfill.done_id >= backfill.tip and backfill.tip else "sᴛᴏᴘᴘᴇᴅ")
+    percent = 100 * backfill.done_id / backfill.tip if backfill.tip else 0
+    text = (
+        f"<b>ʙᴀᴄᴋғɪʟʟ</b> · {state}\n\n"
+        f"ᴘᴏsᴛs: <code>{backfill.done_id}</code> / <code>{backfill.tip}</code> (<code>{percent:.1f}%</code>)\n"
+        f"ɪɴᴅᴇxᴇᴅ: <code>{backfill.indexed}</code>\n"
+        f"ʀᴀᴛᴇ: <code>{backfill.rate():.1f}</code> ᴘᴏsᴛs/s"
+    )
+    eta = backfill.eta()
+    if eta is not None:
+        text += f"\nᴇᴛᴀ: <code>{get_readable_time(int(eta))}</code>"
+    if backfill.error:
+        text += f"\nʟᴀsᴛ ᴇʀʀᴏʀ: <code>{escape(backfill.error)}</code>"
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(text))
+
+
+# Event loop lag, recent stalls with the code that caused them, and the
+# background tasks by kind
+@Bot.on_message(filters.command('health') & filters.private & admin)
+async def loop_health(client: Bot, message: Message):
+    report = loop_monitor.report()
+    lag = report['lag']
+    text = (
+        f"<b>ᴇᴠᴇɴᴛ ʟᴏᴏᴘ</b> (ʟᴀsᴛ ᴍɪɴᴜᴛᴇ)\n"
+        f"ʟᴀɢ: <code>{lag['last_ms']}</code>ms ɴᴏᴡ · <code>{lag['avg_ms']}</code>ms ᴀᴠɢ · <code>{lag['max_ms']}</code>ms ᴍᴀx\n"
+    )
+    if report['slow_sites']:
+        text += "\n<b>sʟᴏᴡ ᴄᴀʟʟʙᴀᴄᴋs</b> (sᴛᴀʟʟs)\n"
+        text += "\n".join(f"<code>{escape(site)}</code>: {n}" for site, n in report['slow_sites'][:5]) + "\n"
+    text += "\n<b>ʙᴀᴄᴋɢʀᴏᴜɴᴅ ᴛᴀsᴋs</b> (ʀᴜɴɴɪɴɢ · ᴏʟᴅᴇsᴛ · ᴅᴏɴᴇ · ғᴀɪʟᴇᴅ)\n"
+    for row in report['tasks']:
+        oldest = get_readable_time(int(row['oldest_s'])) if row['oldest_s'] is not None else "-"
+        text += f"<code>{row['name']}</code>: {row['running']} · {oldest or '0s'} · {row['finished']} · {row['failed']}\n"
+        if row['last_error']:
+            text += f"  ʟᴀsᴛ ᴇʀʀᴏʀ: <code>{escape(row['last_error'][1][:200])}</code>\n"
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(clip_text(text)))
+
+
+# Costliest MongoDB query shapes since startup, /dbtop [count]
+@Bot.on_message(filters.command('dbtop') & filters.private & admin)
+async def db_top(client: Bot, message: Message):
+    if DB_BACKEND != "mongo" or not DB_PROFILE:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Qᴜᴇʀʏ ᴘʀᴏғɪʟɪɴɢ ɴᴇᴇᴅs ᴛʜᴇ ᴍᴏɴɢᴏ ʙᴀᴄᴋᴇɴᴅ ᴡɪᴛʜ DB_PROFILE ᴏɴ.</b>"))
+    from database.profiler import profiler
+    limit = int(message.command[1]) if len(message.command) > 1 and message.command[1].isdigit() else 10
+    rows = profiler.top(min(limit, 30))
+    if not rows:
+        return await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Nᴏ ǫᴜᴇʀɪᴇs ʀᴇᴄᴏʀᴅᴇᴅ ʏᴇᴛ.</b>"))
+    text = f"<b>ᴄᴏsᴛʟɪᴇsᴛ ǫᴜᴇʀɪᴇs sɪɴᴄᴇ sᴛᴀʀᴛ</b> (ᴛᴏᴛᴀʟ · ᴄᴀʟʟs · ᴀᴠɢ · ᴍᴀx · ᴅᴏᴄs)\n"
+    for collection, command, shape, calls, seconds, longest, docs in rows:
+        text += (
+            f"\n<b>{escape(collection)}.{command}</b> <code>{escape(shape)}</code>\n"
+            f"{seconds * 1000:.0f}ms · {calls} · {seconds / calls * 1000:.1f}ms · {longest * 1000:.0f}ms · {docs}\n"
+        )
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(clip_text(text)))
 
 
 #=====================================================================================##
@@ -45,9 +154,9 @@ WAIT_MSG = "<b>Working....</b>"
 
 @Bot.on_message(filters.command('users') & filters.private & admin)
 async def get_users(client: Bot, message: Message):
-    msg = await client.send_message(chat_id=message.chat.id, text=WAIT_MSG)
-    users = await db.full_userbase()
-    await msg.edit(f"{len(users)} users are using this bot")
+    msg = await outbound.call(INTERACTIVE, message.chat.id, lambda: client.send_message(chat_id=message.chat.id, text=WAIT_MSG))
+    users = await db.count_users()
+    await outbound.call(INTERACTIVE, msg.chat.id, lambda: msg.edit(f"{users} users are using this bot"))
 
 # Don't Remove Credit @CodeFlix_Bots, @rohit_1888
 # Ask Doubt on telegram @CodeflixSupport
@@ -72,16 +181,16 @@ async def set_delete_time(client: Bot, message: Message):
 
         await db.set_del_timer(duration)
 
-        await message.reply(f"<b>Dᴇʟᴇᴛᴇ Tɪᴍᴇʀ ʜᴀs ʙᴇᴇɴ sᴇᴛ ᴛᴏ <blockquote>{duration} sᴇᴄᴏɴᴅs.</blockquote></b>")
+        await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(f"<b>Dᴇʟᴇᴛᴇ Tɪᴍᴇʀ ʜᴀs ʙᴇᴇɴ sᴇᴛ ᴛᴏ <blockquote>{duration} sᴇᴄᴏɴᴅs.</blockquote></b>"))
 
     except (IndexError, ValueError):
-        await message.reply("<b>Pʟᴇᴀsᴇ ᴘʀᴏᴠɪᴅᴇ ᴀ ᴠᴀʟɪᴅ ᴅᴜʀᴀᴛɪᴏɴ ɪɴ sᴇᴄᴏɴᴅs.</b> Usage: /dlt_time {duration}")
+        await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply("<b>Pʟᴇᴀsᴇ ᴘʀᴏᴠɪᴅᴇ ᴀ ᴠᴀʟɪᴅ ᴅᴜʀᴀᴛɪᴏɴ ɪɴ sᴇᴄᴏɴᴅs.</b> Usage: /dlt_time {duration}"))
 
 @Bot.on_message(filters.private & filters.command('check_dlt_time') & admin)
 async def check_delete_time(client: Bot, message: Message):
     duration = await db.get_del_timer()
 
-    await message.reply(f"<b><blockquote>Cᴜʀʀᴇɴᴛ ᴅᴇʟᴇᴛᴇ ᴛɪᴍᴇʀ ɪs sᴇᴛ ᴛᴏ {duration}sᴇᴄᴏɴᴅs.</blockquote></b>")
+    await outbound.call(INTERACTIVE, message.chat.id, lambda: message.reply(f"<b><blockquote>Cᴜʀʀᴇɴᴛ ᴅᴇʟᴇᴛᴇ ᴛɪᴍᴇʀ ɪs sᴇᴛ ᴛᴏ {duration}sᴇᴄᴏɴᴅs.</blockquote></b>"))
 
 #=====================================================================================##
 
@@ -0,0 +1,11 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import os
+import sys
+
+# config.py reads everything from the environment; the tests never talk to
+# Telegram or MongoDB, so placeholders and the in-memory backend are enough
+os.environ.setdefault("APP_ID", "1")
+os.environ.setdefault("DB_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,317 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import functools
+import inspect
+import pytest
+from database.database import Rohit, DatabaseUnavailable
+from database.memory import MemoryStorage
+
+
+# MemoryStorage that records the name of every storage call, so a test can
+# pin how many round trips a Rohit method makes
+class RecordingStore(MemoryStorage):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        calls = super().__getattribute__('calls')
+
+        @functools.wraps(attr)
+        async def record(*args, **kwargs):
+            calls.append(name)
+            return await attr(*args, **kwargs)
+        return record
+
+
+async def loaded_db(store=None):
+    # What Rohit.connect loads, without its background loops
+    store = store or RecordingStore()
+    db = Rohit(store)
+    await db.load_caches()
+    await db.load_fsub_snapshot()
+    await db.load_known_users()
+    store.calls.clear()
+    return db, store
+
+
+def run(test):
+    @functools.wraps(test)
+    def wrapper():
+        return asyncio.run(test())
+    return wrapper
+
+
+# ROUND TRIPS PER METHOD
+@run
+async def test_add_user():
+    db, store = await loaded_db()
+    assert await db.add_user(1) is True
+    assert store.calls == ['add_user']
+    assert 1 in store.users
+
+    store.calls.clear()
+    assert await db.add_user(1) is False
+    assert store.calls == []  # known users are answered from memory
+
+
+@run
+async def test_present_user_from_index():
+    db, store = await loaded_db()
+    await db.add_user(1)
+    store.calls.clear()
+    assert await db.present_user(1) is True
+    assert await db.present_user(2) is False
+    assert store.calls == []
+
+
+@run
+async def test_add_and_del_admin():
+    db, store = await loaded_db()
+    assert await db.add_admin(5) is True
+    assert store.calls == ['add_admins']
+    assert store.admins == {5}
+
+    store.calls.clear()
+    assert await db.add_admin(5) is False
+    assert store.calls == []
+
+    assert await db.del_admin(5) is True
+    assert store.calls == ['del_admins']
+    assert store.admins == set()
+
+    store.calls.clear()
+    assert await db.del_admin(5) is False
+    assert store.calls == []
+
+
+@run
+async def test_add_and_del_ban_user():
+    db, store = await loaded_db()
+    assert await db.add_ban_user(7) is True
+    assert store.calls == ['add_bans']
+    assert store.bans == {7}
+
+    store.calls.clear()
+    assert await db.add_ban_user(7) is False
+    assert store.calls == []
+
+    assert await db.del_ban_user(7) is True
+    assert store.calls == ['del_bans']
+
+    store.calls.clear()
+    assert await db.del_ban_user(7) is False
+    assert store.calls == []
+
+
+@run
+async def test_bulk_bans_are_one_write():
+    db, store = await loaded_db()
+    await db.add_ban_user(1)
+    store.calls.clear()
+    assert await db.ban_many([1, 2, 3, 3]) == [2, 3]
+    assert store.calls == ['add_bans']
+    assert store.bans == {1, 2, 3}
+
+    store.calls.clear()
+    assert await db.unban_many([2, 3, 4]) == 2
+    assert store.calls == ['del_bans']
+    assert store.bans == {1}
+
+
+@run
+async def test_add_and_rem_channel():
+    db, store = await loaded_db()
+    assert await db.add_channel(-100) is True
+    assert store.calls == ['add_channel']
+    assert -100 in store.channels
+
+    store.calls.clear()
+    assert await db.add_channel(-100) is False
+    assert store.calls == []
+
+    assert await db.rem_channel(-100) is True
+    assert store.calls == ['rem_channel']
+    assert -100 not in store.channels
+
+    store.calls.clear()
+    assert await db.rem_channel(-100) is False
+    assert store.calls == []
+
+
+@run
+async def test_set_channel_mode():
+    db, store = await loaded_db()
+    await db.add_channel(-100)
+    store.calls.clear()
+    assert await db.set_channel_mode(-100, 'on') is True
+    assert store.calls == ['set_channel_mode']
+    assert await db.get_channel_mode(-100) == 'on'
+
+    store.calls.clear()
+    assert await db.set_channel_mode(-100, 'on') is False
+    assert store.calls == []
+
+
+@run
+async def test_set_del_timer():
+    db, store = await loaded_db()
+    assert await db.set_del_timer(600) is True
+    assert store.calls == ['set_del_timer']
+    assert store.del_timer == 600
+
+    store.calls.clear()
+    assert await db.set_del_timer(600) is False
+    assert store.calls == ['set_del_timer']
+    assert await db.get_del_timer() == 600
+    assert store.calls == ['set_del_timer']
+
+
+@run
+async def test_req_channel_exist_uses_snapshot():
+    store = RecordingStore()
+    await store.add_channel(-100)
+    db = Rohit(store)
+
+    # The first check loads every channel once, later ones are answered from the snapshot
+    assert await db.reqChannel_exist(-100) is True
+    assert await db.reqChannel_exist(-200) is False
+    assert await db.channel_exist(-100) is True
+    assert store.calls == ['add_channel', 'get_channels']
+
+
+@run
+async def test_req_user():
+    db, store = await loaded_db()
+    assert await db.req_user(-100, 1) is True
+    assert await db.req_user(-100, 1) is False
+    assert await db.req_user_exist(-100, 1) is True
+    assert await db.del_req_user(-100, 1) is True
+    assert await db.del_req_user(-100, 1) is False
+    assert store.calls == ['req_user', 'req_user', 'req_user_exist', 'del_req_user', 'del_req_user']
+
+
+# DEGRADED MODE
+@run
+async def test_new_user_counted_when_write_is_spilled():
+    db, store = await loaded_db()
+
+    async def unavailable(user_id):
+        raise asyncio.TimeoutError
+    store.add_user = unavailable
+
+    assert await db.add_user(1) is True
+    assert len(db.spill) == 1
+    assert db.stats.totals['new_users'] == 1
+    assert await db.add_user(1) is False
+    assert db.stats.totals['new_users'] == 1
+
+
+# BATCH MANIFESTS
+@run
+async def test_add_batch_retries_a_taken_id():
+    db, store = await loaded_db()
+    taken = []
+
+    async def first_id_taken(batch_id, doc):
+        if not taken:
+            taken.append(batch_id)
+            return False
+        return await MemoryStorage.add_batch(store, batch_id, doc)
+    store.add_batch = first_id_taken
+
+    batch_id = await db.add_batch([3, 1, 2], "title")
+    assert batch_id != taken[0]
+    assert store.calls == ['add_batch', 'add_batch']
+    assert store.batches[batch_id]['ids'] == [3, 1, 2]
+    assert await db.get_batch(batch_id) == {'ids': [3, 1, 2], 'title': "title", 'created': store.batches[batch_id]['created']}
+
+
+@run
+async def test_add_batch_is_not_spilled():
+    db, store = await loaded_db()
+
+    async def unavailable(batch_id, doc):
+        raise asyncio.TimeoutError
+    store.add_batch = unavailable
+
+    with pytest.raises(DatabaseUnavailable):
+        await db.add_batch([1, 2])
+    assert not db.spill
+    assert not db.batch_cache
+
+
+# FILES INDEX
+def file_doc(msg_id, unique_id):
+    return {'_id': msg_id, 'file_unique_id': unique_id, 'file_name': f"{unique_id}.mkv", 'caption': ""}
+
+
+@run
+async def test_older_post_becomes_the_original():
+    db, store = await loaded_db()
+    await db.add_files([file_doc(50, "u"), file_doc(60, "u")])
+    assert db.duplicates == {60: 50}
+
+    # Backfill reaches an older copy after the live uploads were indexed
+    await db.add_files([file_doc(10, "u")])
+    assert db.duplicates == {50: 10, 60: 10}
+    assert await store.get_duplicates() == {50: 10, 60: 10}
+    assert await db.find_stored("u") == 10
+
+
+@run
+async def test_drop_file_promotes_oldest_duplicate():
+    db, store = await loaded_db()
+    await db.add_files([file_doc(10, "u"), file_doc(50, "u"), file_doc(60, "u")])
+    await db.drop_file(10)
+    assert db.duplicates == {60: 50}
+    assert await store.get_duplicates() == {60: 50}
+    assert 10 not in store.files
+    assert await db.find_stored("u") == 50
+
+
+@run
+async def test_user_lists_keep_their_order():
+    db, store = await loaded_db()
+    await db.ban_many([30, 10, 20])
+    await db.add_admins([9, 3])
+    assert await db.get_ban_users() == [10, 20, 30]
+    await db.ban_many([15])
+    assert await db.get_ban_users() == [10, 15, 20, 30]
+    assert await db.get_all_admins() == [3, 9]
+
+
+@run
+async def test_start_degraded_and_load_caches_later():
+    store = RecordingStore()
+    store.bans = {1}
+    down = [True]
+    get_channels = store.get_channels
+
+    async def channels():
+        if down[0]:
+            raise asyncio.TimeoutError
+        return await get_channels()
+    store.get_channels = channels
+
+    db = Rohit(store)
+    db.breaker.cooldown = 0.01
+    await db.connect()
+    assert db.breaker.state != "closed"
+    assert await db.show_channels() == []
+    assert await db.ban_many([2]) == [2]  # spilled
+    assert len(db.spill) == 1
+
+    down[0] = False
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if db.breaker.state == "closed" and not db.spill and db.known_users.ready:
+            break
+    assert db.ban_cache == {1, 2}
+    assert store.bans == {1, 2}
@@ -0,0 +1,25 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+from health import TaskRegistry
+from metrics import Trace, current_trace, call_source, span
+
+
+def test_spawned_tasks_do_not_inherit_the_handler_trace():
+    async def main():
+        registry = TaskRegistry()
+        trace = Trace("start_command", "start")
+        current_trace.set(trace)
+
+        async def auto_delete():
+            with span('telegram'):
+                pass
+            return current_trace.get(), call_source()
+
+        task_trace, source = await registry.spawn(auto_delete(), "auto_delete")
+        assert task_trace is None
+        assert source == "auto_delete"
+        assert trace.stages == {}
+        assert current_trace.get() is trace  # the handler keeps its own
+    asyncio.run(main())
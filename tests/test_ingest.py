@@ -0,0 +1,97 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import ingest
+from database.database import Rohit
+from database.memory import MemoryStorage
+from ingest import Ingestor, file_meta, find_duplicate
+
+
+class Media:
+
+    def __init__(self, value):
+        self.value = value
+
+
+def make_message(msg_id, unique_id, chat_id=1):
+    document = SimpleNamespace(file_unique_id=unique_id, file_name=f"{unique_id}.mkv", file_size=1, mime_type=None)
+    message = SimpleNamespace(
+        id=msg_id, chat=SimpleNamespace(id=chat_id), media=Media('document'), document=document,
+        caption=f"caption {unique_id}", text=None, date=datetime(2025, 1, 1)
+    )
+    return message
+
+
+class FakeClient:
+
+    def __init__(self, forwardable):
+        self.db_channel = SimpleNamespace(id=-100)
+        self.forwardable = forwardable
+        self.next_id = 1000
+        self.posts = []
+
+    def post_of(self, message):
+        self.next_id += 1
+        post = make_message(self.next_id, message.document.file_unique_id, chat_id=-100)
+        self.posts.append(post)
+        return post
+
+    async def forward_messages(self, chat_id, from_chat, ids, **kwargs):
+        return [self.post_of(message) for message in self.forwardable if message.id in ids]
+
+
+def test_short_forward_result_fails_only_missing_messages(monkeypatch):
+    async def call(lane, chat_id, factory):
+        return await factory()
+    monkeypatch.setattr(ingest.outbound, 'call', call)
+
+    async def main():
+        messages = [make_message(i, f"u{i}") for i in range(1, 5)]
+        client = FakeClient(forwardable=[messages[0], messages[2]])
+
+        async def copy(chat_id, **kwargs):
+            return client.post_of(messages[3])
+        messages[3].copy = copy
+
+        async def deleted(chat_id, **kwargs):
+            raise ValueError("message to copy not found")
+        messages[1].copy = deleted
+
+        ingestor = Ingestor(10, 0)
+        loop = asyncio.get_running_loop()
+        batch = [(client, message, loop.create_future()) for message in messages]
+        await ingestor._store(batch)
+
+        results = [future.exception() or future.result() for _, _, future in batch]
+        assert [post.document.file_unique_id for post in (results[0], results[2], results[3])] == ["u1", "u3", "u4"]
+        assert isinstance(results[1], ValueError)
+        assert len(client.posts) == 3  # nothing stored twice
+        assert (ingestor.stored, ingestor.failed) == (3, 1)
+    asyncio.run(main())
+
+
+def test_find_duplicate_skips_deleted_posts(monkeypatch):
+    async def call(lane, chat_id, factory):
+        return await factory()
+    monkeypatch.setattr(ingest.outbound, 'call', call)
+    monkeypatch.setattr(ingest, 'db', Rohit(MemoryStorage()))
+
+    async def main():
+        await ingest.db.add_files([file_meta(make_message(10, "u")), file_meta(make_message(50, "u"))])
+        client = FakeClient(forwardable=[])
+
+        async def get_messages(chat_id, msg_id):
+            if msg_id == 10:
+                return SimpleNamespace(id=10, empty=True, media=None, caption=None, text=None, date=None)
+            post = make_message(msg_id, "u", chat_id=-100)
+            post.empty = False
+            return post
+        client.get_messages = get_messages
+
+        assert await find_duplicate(client, make_message(1, "u")) == 50
+        assert 10 not in ingest.db.store.files
+        assert await find_duplicate(client, make_message(2, "other")) is None
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+#Codeflix_Botz
+#rohit_1888 on Tg
+
+import asyncio
+import re
+import sqlite3
+import pytest
+from database.memory import MemoryStorage
+from database.sqlite import SQLiteStorage
+
+
+# Behaviour every backend must share, see database/storage.py. MongoStorage
+# needs a server and is not covered here.
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make():
+        if request.param == 'sqlite':
+            return SQLiteStorage(str(tmp_path / "filestore.db"))
+        return MemoryStorage()
+    return make
+
+
+def run_with(make_store, test):
+    async def main():
+        store = make_store()
+        await store.connect()
+        await store.ensure_indexes()
+        try:
+            await test(store)
+        finally:
+            store.close()
+    asyncio.run(main())
+
+
+def test_req_users_of_unknown_and_emptied_channel(make_store):
+    async def test(store):
+        assert await store.get_req_users(-100) is None
+        assert await store.req_user(-100, 1) is True
+        assert await store.req_user(-100, 1) is False
+        assert await store.get_req_users(-100) == [1]
+        assert await store.del_req_user(-100, 1) is True
+        assert await store.get_req_users(-100) == []
+        assert await store.get_req_users(-200) is None
+    run_with(make_store, test)
+
+
+def test_batch_ids_are_never_replaced(make_store):
+    async def test(store):
+        doc = {'ids': [5, 2, 9], 'title': None, 'created': 1}
+        assert await store.add_batch("abc", doc) is True
+        assert await store.add_batch("abc", {'ids': [1], 'title': "other", 'created': 2}) is False
+        assert await store.get_batch("abc") == doc
+        assert await store.get_batch("missing") is None
+    run_with(make_store, test)
+
+
+def file_doc(msg_id, unique_id, file_name, caption=""):
+    # Shaped like ingest.file_meta
+    return {
+        '_id': msg_id, 'media': 'document', 'file_unique_id': unique_id, 'file_name': file_name,
+        'name_lc': file_name.lower(), 'file_size': 1, 'mime_type': None, 'caption': caption, 'date': 0,
+    }
+
+
+def test_set_original_and_del_file(make_store):
+    async def test(store):
+        await store.add_files([file_doc(50, "u", "a.mkv"), dict(file_doc(60, "u", "a.mkv"), dup_of=50), file_doc(10, "u", "a.mkv")])
+        assert await store.find_unique_ids(["u"]) == {"u": 10}  # lowest of two originals
+
+        await store.set_original(50, 10)
+        assert await store.get_duplicates() == {50: 10, 60: 10}
+
+        await store.del_file(10)
+        await store.set_original(10, 50)
+        assert await store.get_duplicates() == {60: 50}
+        assert await store.find_unique_ids(["u"]) == {"u": 50}
+        assert [doc['_id'] for doc in await store.search_files("a")] == [50]
+    run_with(make_store, test)
+
+
+SEARCH_FILES = [
+    file_doc(1, "a", "Big.Buck.Bunny.2008.1080p.mkv"),
+    file_doc(2, "b", "bunny_trailer.mp4", "Big Buck Bunny trailer"),
+    file_doc(3, "c", "Sintel.2010.mkv", "open movie"),
+    file_doc(4, "d", "Ёлка.2024.mkv"),
+]
+SEARCHES = [
+    ("big bunny", [2, 1]),    # every word, newest first
+    ("bun", [2, 1]),          # words are prefixes
+    ("bunny sintel", []),     # not any word
+    ("unny", []),             # only prefixes of a word
+    ("MOVIE", [3]),           # captions, any case
+    ("ёлка 2024", [4]),
+    ("*)(", []),
+]
+
+
+def test_search_files(make_store):
+    async def test(store):
+        await store.add_files(SEARCH_FILES + [dict(file_doc(5, "a", "Big.Buck.Bunny.mkv"), dup_of=1)])
+        for query, expected in SEARCHES:
+            assert [doc['_id'] for doc in await store.search_files(query)] == expected, query
+        # Keyset paging on the last id of the previous page
+        page = await store.search_files("big", limit=1)
+        assert [doc['_id'] for doc in page] == [2]
+        assert [doc['_id'] for doc in await store.search_files("big", before=page[-1]['_id'])] == [1]
+    run_with(make_store, test)
+
+
+# Just enough of a motor collection to run MongoStorage.search_files against
+# the documents add_files would write
+class FakeFiles:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, spec, projection):
+        def matches(doc):
+            if 'dup_of' in doc or doc['_id'] >= spec.get('_id', {}).get('$lt', float('inf')):
+                return False
+            return all(
+                any(re.match(clause['words']['$regex'], word) for word in doc['words'])
+                for clause in spec['$and']
+            )
+        return FakeCursor([doc for doc in self.docs if matches(doc)])
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+def test_mongo_search_files():
+    from database.mongo import MongoStorage, search_words
+
+    store = MongoStorage("mongodb://unused", "test")
+    store.file_data = FakeFiles([dict(doc, words=search_words(doc)) for doc in SEARCH_FILES])
+
+    async def main():
+        for query, expected in SEARCHES:
+            assert [doc['_id'] for doc in await store.search_files(query)] == expected, query
+        assert [doc['_id'] for doc in await store.search_files("big", before=2)] == [1]
+    asyncio.run(main())
+
+
+def test_sqlite_only_lock_errors_are_transient(tmp_path):
+    from database.sqlite import SQLiteBusy
+
+    async def main():
+        store = SQLiteStorage(str(tmp_path / "filestore.db"))
+        await store.connect()
+        try:
+            with pytest.raises(sqlite3.OperationalError) as error:
+                await store._run(store._one, "SELECT * FROM missing_table")
+            assert not isinstance(error.value, store.TRANSIENT_ERRORS)
+
+            other = sqlite3.connect(str(tmp_path / "filestore.db"), timeout=0)
+            other.execute("BEGIN EXCLUSIVE")
+            store.conn.execute("PRAGMA busy_timeout=0")
+            with pytest.raises(store.TRANSIENT_ERRORS):
+                await store.add_user(1)
+            other.rollback()
+            other.close()
+        finally:
+            store.close()
+    asyncio.run(main())